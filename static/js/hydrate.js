@@ -0,0 +1,82 @@
+/*
+ * Fill in the per-user parts of a shared (cached) page; see tccwebsite/hydration.py.
+ *
+ * Markup contract:
+ *   data-hydrate-show="state ..."   shown only in the listed states: "member" /
+ *                                   "anonymous" for the page, or a course state
+ *                                   inside a data-hydrate-course container;
+ *   data-hydrate-text="field"       text replaced by the field (username, or a
+ *                                   course field such as waitlist_position);
+ *   data-hydrate-csrf               input that receives the visitor's CSRF token;
+ *   data-hydrate-messages           container for pending flash messages.
+ */
+(function() {
+    const endpoint = document.currentScript.dataset.endpoint;
+
+    function apply(scope, state, values, inside) {
+        scope.querySelectorAll('[data-hydrate-show]').forEach(function(el) {
+            if ((el.closest('[data-hydrate-course]') !== null) === inside) {
+                el.hidden = !el.dataset.hydrateShow.split(' ').includes(state);
+            }
+        });
+        scope.querySelectorAll('[data-hydrate-text]').forEach(function(el) {
+            const value = values[el.dataset.hydrateText];
+            if ((el.closest('[data-hydrate-course]') !== null) === inside && value !== undefined && value !== null) {
+                el.textContent = value;
+            }
+        });
+    }
+
+    function showMessages(messages) {
+        const container = document.querySelector('[data-hydrate-messages]');
+        if (!container || !messages.length) {
+            return;
+        }
+        messages.forEach(function(message) {
+            const alert = document.createElement('div');
+            alert.className = 'alert alert-' + message.tags + ' alert-dismissible fade show';
+            alert.setAttribute('role', 'alert');
+            alert.textContent = message.text;
+            const close = document.createElement('button');
+            close.type = 'button';
+            close.className = 'btn-close';
+            close.dataset.bsDismiss = 'alert';
+            alert.appendChild(close);
+            container.appendChild(alert);
+        });
+        container.hidden = false;
+    }
+
+    function hydrate(data) {
+        apply(document, data.authenticated ? 'member' : 'anonymous', {username: data.username}, false);
+        document.querySelectorAll('[data-hydrate-course]').forEach(function(container) {
+            const course = data.courses[container.dataset.hydrateCourse];
+            if (course) {
+                apply(container, course.state, course, true);
+            }
+        });
+        document.querySelectorAll('[data-hydrate-csrf]').forEach(function(input) {
+            input.value = data.csrf_token || '';
+        });
+        showMessages(data.messages);
+    }
+
+    const ids = Array.from(document.querySelectorAll('[data-hydrate-course]'), function(el) {
+        return el.dataset.hydrateCourse;
+    });
+    fetch(endpoint + '?courses=' + encodeURIComponent(ids.join(',')), {
+        credentials: 'same-origin',
+        headers: {'Accept': 'application/json'}
+    })
+    .then(function(response) {
+        if (!response.ok) {
+            throw new Error('hydrate: HTTP ' + response.status);
+        }
+        return response.json();
+    })
+    .then(hydrate)
+    .catch(function(error) {
+        // The page stays in its anonymous state.
+        console.error(error);
+    });
+})();
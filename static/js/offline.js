@@ -0,0 +1,99 @@
+/*
+ * Offline shell (templet/offline.html): renders the course list or one course
+ * from the catalog bundle the service worker keeps (see tccwebsite/offline.py).
+ * The page URL is whatever was requested, so /courses/12/ shows course 12.
+ */
+(function() {
+    const CATALOG_CACHE = 'tcc-catalog';
+    const container = document.querySelector('[data-offline-catalog]');
+    const coursesUrl = container.dataset.coursesUrl;
+    const catalogKey = container.dataset.catalogKey;
+
+    function element(tag, className, text) {
+        const el = document.createElement(tag);
+        if (className) {
+            el.className = className;
+        }
+        if (text !== undefined) {
+            el.textContent = text;
+        }
+        return el;
+    }
+
+    function badgeClass(difficulty) {
+        return {beginner: 'success', intermediate: 'warning'}[difficulty] || 'danger';
+    }
+
+    function card(course, detail) {
+        const column = element('div', detail ? 'col-lg-8' : 'col-lg-4 col-md-6 mb-4');
+        const box = element('div', 'card h-100 shadow-sm');
+        const body = element('div', 'card-body');
+        body.appendChild(element('span', 'badge bg-' + badgeClass(course.difficulty) + ' mb-2', course.difficulty_label));
+        body.appendChild(element(detail ? 'h2' : 'h5', 'card-title', course.title));
+        body.appendChild(element('p', 'card-text', course.summary));
+        body.appendChild(element('p', 'text-muted small mb-0', course.duration + ' · ' + course.instructor));
+        const footer = element('div', 'card-footer bg-transparent d-flex justify-content-between align-items-center');
+        footer.appendChild(element('h5', 'text-primary mb-0', course.price));
+        if (detail) {
+            footer.appendChild(element('span', 'text-muted small', 'Connect to the internet to enroll.'));
+        } else {
+            const link = element('a', 'btn btn-primary', 'Learn More');
+            link.href = coursesUrl + course.id + '/';
+            footer.appendChild(link);
+        }
+        box.appendChild(body);
+        box.appendChild(footer);
+        column.appendChild(box);
+        return column;
+    }
+
+    function matches(course, params) {
+        const search = (params.get('search') || '').toLowerCase();
+        if (params.get('difficulty') && course.difficulty !== params.get('difficulty')) {
+            return false;
+        }
+        return !search || [course.title, course.summary, course.instructor].some(function(text) {
+            return text.toLowerCase().includes(search);
+        });
+    }
+
+    function show(bundle) {
+        const courses = bundle.courses.map(function(row) {
+            const course = {};
+            bundle.fields.forEach(function(field, index) { course[field] = row[index]; });
+            return course;
+        });
+        const detail = location.pathname.match(/\/(\d+)\/$/);
+        const row = element('div', 'row');
+        container.replaceChildren(row);
+        if (detail) {
+            const course = courses.find(function(c) { return String(c.id) === detail[1]; });
+            if (course) {
+                document.querySelector('[data-offline-heading]').textContent = course.title;
+                row.appendChild(card(course, true));
+                return;
+            }
+        }
+        const params = new URLSearchParams(location.search);
+        courses.filter(function(course) { return matches(course, params); }).forEach(function(course) {
+            row.appendChild(card(course, false));
+        });
+        if (!row.children.length) {
+            container.replaceChildren(element('p', 'text-muted', 'No saved courses match.'));
+        }
+    }
+
+    caches.open(CATALOG_CACHE)
+        .then(function(cache) { return cache.match(catalogKey); })
+        .then(function(response) {
+            if (!response) {
+                throw new Error('offline: no saved catalog');
+            }
+            return response.json();
+        })
+        .then(show)
+        .catch(function(error) {
+            console.error(error);
+            container.replaceChildren(element('p', 'text-muted', 'The catalog has not been saved on this device yet.'));
+        });
+})();
@@ -0,0 +1,14 @@
+/*
+ * Register the service worker (templet/sw.js) that keeps the course catalog
+ * available offline. The worker unregisters itself when OFFLINE_ENABLED is off.
+ */
+(function() {
+    const url = document.currentScript.dataset.serviceWorker;
+    if ('serviceWorker' in navigator) {
+        window.addEventListener('load', function() {
+            navigator.serviceWorker.register(url, {scope: '/'}).catch(function(error) {
+                console.error('service worker:', error);
+            });
+        });
+    }
+})();
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tccproject.settings')
 
 application = get_asgi_application()
+
+# Same warm-up as wsgi.py, for uvicorn workers.
+if os.environ.get('TCC_WARMUP', 'true').lower() == 'true':
+    from tccwebsite.warmup import warm_up
+
+    warm_up(connections=os.environ.get('TCC_WARMUP_CONNECTIONS', 'true').lower() == 'true')
@@ -0,0 +1,88 @@
+"""
+Gunicorn deployment profile for tccproject.
+
+Usage (see Procfile)::
+
+    gunicorn -c tccproject/gunicorn_config.py
+
+The application is preloaded in the master: Django, Pillow, argon2, URL
+resolvers and compiled templates are imported once and shared with every
+worker through copy-on-write. ``gc.freeze()`` right before forking keeps the
+garbage collector from touching (and therefore copying) those shared pages.
+Database connections are opened per worker after the fork.
+
+Environment:
+    GUNICORN_WORKER_CLASS         sync (default), gthread or uvicorn
+    WEB_CONCURRENCY               worker count (default: sized from CPU count)
+    GUNICORN_MAX_WORKERS          upper bound for the auto-sized count (default 8)
+    GUNICORN_THREADS              threads per gthread worker (default 4)
+    GUNICORN_MAX_REQUESTS         recycle workers after N requests (default 1000)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers don't recycle together (default 100)
+    GUNICORN_TIMEOUT              worker timeout in seconds (default 30)
+    PORT                          port to bind (default 8000)
+"""
+import gc
+import multiprocessing
+import os
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn_worker.UvicornWorker',
+}
+
+_worker_kind = os.environ.get('GUNICORN_WORKER_CLASS', 'sync').lower()
+if _worker_kind not in WORKER_CLASSES:
+    raise RuntimeError(
+        f"GUNICORN_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, got {_worker_kind!r}"
+    )
+
+
+def _auto_workers():
+    cpus = multiprocessing.cpu_count()
+    max_workers = int(os.environ.get('GUNICORN_MAX_WORKERS', '8'))
+    if _worker_kind == 'sync':
+        # Sync workers block on I/O, so oversubscribe the CPUs.
+        return min(cpus * 2 + 1, max_workers)
+    # gthread/uvicorn workers handle concurrency themselves.
+    return min(cpus + 1, max_workers)
+
+
+# ------------------------------------------------------------------------------
+# Server
+# ------------------------------------------------------------------------------
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = WORKER_CLASSES[_worker_kind]
+wsgi_app = 'tccproject.asgi:application' if _worker_kind == 'uvicorn' else 'tccproject.wsgi:application'
+workers = int(os.environ.get('WEB_CONCURRENCY') or _auto_workers())
+threads = int(os.environ.get('GUNICORN_THREADS', '4')) if _worker_kind == 'gthread' else 1
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+preload_app = True
+accesslog = '-'
+
+# The master must not hold DB sockets that every forked worker would share.
+os.environ.setdefault('TCC_WARMUP_CONNECTIONS', 'false')
+
+
+# ------------------------------------------------------------------------------
+# Hooks
+# ------------------------------------------------------------------------------
+def when_ready(server):
+    """Runs in the master after the preloaded app is imported, before any fork."""
+    gc.collect()
+    gc.freeze()
+    server.log.info('Froze %d objects before forking %d %s workers', gc.get_freeze_count(), workers, _worker_kind)
+
+
+def post_worker_init(worker):
+    """Open this worker's database connections and build its in-memory indexes."""
+    from tccwebsite.warmup import warm_connections, warm_typeahead
+
+    warm_typeahead()
+    warm_connections()
@@ -26,31 +26,73 @@ ALLOWED_HOSTS = ['tccproject.onrender.com']
 # ------------------------------------------------------------------------------
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+
+def _database_from_url(url):
+    """Build a DATABASES entry from a URL (SSL is only meaningful off SQLite)."""
+    return dj_database_url.parse(
+        url,
+        conn_max_age=600,
+        ssl_require=not DEBUG and not url.startswith('sqlite'),
+    )
+
+
 if DATABASE_URL:
     # Use Postgres from environment
     DATABASES = {
-        'default': dj_database_url.config(
-            default=DATABASE_URL,
-            conn_max_age=600,
-            ssl_require=not DEBUG
-        )
+        'default': _database_from_url(DATABASE_URL)
     }
 else:
-    # Local SQLite fallback
+    # Local MySQL fallback
     DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'tccproject',
-        'USER': 'root',  # MySQL user for Django
-        'PASSWORD': 'password',  # MySQL root password (leave empty string if no password)
-        'HOST': 'localhost',  # Use TCP protocol, not named pipes
-        'PORT': '3307',  # Default MySQL port
-        'OPTIONS': {
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        },
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': 'tccproject',
+            'USER': 'root',  # MySQL user for Django
+            'PASSWORD': 'password',  # MySQL root password (leave empty string if no password)
+            'HOST': 'localhost',  # Use TCP protocol, not named pipes
+            'PORT': '3307',  # Default MySQL port
+            'OPTIONS': {
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            },
+        }
     }
+
+# Read replicas: comma-separated URLs, e.g.
+#   DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+# Catalog reads are spread over healthy replicas; writes (and clients that
+# wrote within REPLICA_PIN_SECONDS) stay on the primary.
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(
+    url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+):
+    _alias = f'replica_{_index}'
+    DATABASES[_alias] = _database_from_url(_url)
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(_alias)
+
+# Connection pooling: psycopg 3's native pool on Postgres. Django has no pool
+# for MySQL, so there we keep persistent connections (CONN_MAX_AGE) instead.
+# Both validate connections before use via CONN_HEALTH_CHECKS.
+DATABASE_POOL = os.environ.get('DATABASE_POOL', 'true').lower() == 'true'
+DATABASE_POOL_OPTIONS = {
+    'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', '10')),
+    'timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', '10')),
+    'max_idle': float(os.environ.get('DATABASE_POOL_MAX_IDLE', '300')),
+    'max_lifetime': float(os.environ.get('DATABASE_POOL_MAX_LIFETIME', '3600')),
 }
 
+for _database in DATABASES.values():
+    _database['CONN_HEALTH_CHECKS'] = True
+    if DATABASE_POOL and _database['ENGINE'] == 'django.db.backends.postgresql':
+        _database['CONN_MAX_AGE'] = 0  # the pool owns connection lifetime
+        _database.setdefault('OPTIONS', {})['pool'] = dict(DATABASE_POOL_OPTIONS)
+    else:
+        _database.setdefault('CONN_MAX_AGE', 600)
+
+DATABASE_ROUTERS = ['tccwebsite.db_router.PrimaryReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '15'))
+REPLICA_HEALTH_CHECK_INTERVAL = int(os.environ.get('REPLICA_HEALTH_CHECK_INTERVAL', '30'))
 
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -79,6 +121,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'tccwebsite',
 ]
 
@@ -88,12 +131,17 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'tccwebsite.traffic.TrafficCaptureMiddleware',
+    'tccwebsite.http_cache.CachePolicyMiddleware',
+    'tccwebsite.compression.CompressionMiddleware',
+    'tccwebsite.db_router.ReadYourWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tccwebsite.prerender.PrerenderedPageMiddleware',
 ]
 
 # ------------------------------------------------------------------------------
@@ -101,6 +149,8 @@ MIDDLEWARE = [
 # ------------------------------------------------------------------------------
 ROOT_URLCONF = 'tccproject.urls'
 WSGI_APPLICATION = 'tccproject.wsgi.application'
+# Admin lives at a non-default path to reduce casual discovery
+ADMIN_URL = 'tcc-dashboard-9c8f3e/'
 
 # ------------------------------------------------------------------------------
 # Templates
@@ -124,39 +174,70 @@ TEMPLATES = [
 WSGI_APPLICATION = 'tccproject.wsgi.application'
 
 
-# Database
-# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASE_URL = os.environ.get('DATABASE_URL')
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
-if DATABASE_URL:
-    # Use Postgres from environment
-    DATABASES = {
-        'default': dj_database_url.config(
-            default=DATABASE_URL,
-            conn_max_age=600,
-            ssl_require=not DEBUG
-        )
+# ------------------------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------------------------
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
 else:
-    # Local SQLite fallback
-    DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'tccproject',
-        'USER': 'root',  # MySQL user for Django
-        'PASSWORD': 'password',  # MySQL root password (leave empty string if no password)
-        'HOST': 'localhost',  # Use TCP protocol, not named pipes
-        'PORT': '3307',  # Default MySQL port
-        'OPTIONS': {
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        },
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
+# Cached read models are invalidated through the cache itself: version counters
+# (see tccwebsite/versioning.py) and deleted dashboard keys. That only reaches every
+# gunicorn worker through a shared cache. Without Redis each worker has its own
+# locmem cache, so counters and dashboards expire after LOCAL_CACHE_TIMEOUT instead,
+# and other workers show a change within that many seconds. An expired counter
+# also discards everything cached under it (API objects, facet counts, hydrated
+# pages), so without Redis those caches last at most VERSION_TIMEOUT; set it
+# higher than LOCAL_CACHE_TIMEOUT to keep them longer at the cost of staleness.
+CACHE_SHARED = bool(REDIS_URL)
+LOCAL_CACHE_TIMEOUT = int(os.environ.get('LOCAL_CACHE_TIMEOUT', '10'))  # seconds
+VERSION_TIMEOUT = None if CACHE_SHARED else int(os.environ.get('VERSION_TIMEOUT', str(LOCAL_CACHE_TIMEOUT)))
+
+# Per-student dashboard read model (see tccwebsite/dashboard.py)
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '900' if CACHE_SHARED else str(LOCAL_CACHE_TIMEOUT)))
+
+# Lesson progress pings are buffered in the cache and flushed by
+# `manage.py flush_progress --loop` (see tccwebsite/progress.py). Buffering
+# needs a cache shared between processes, so it defaults to on with Redis only.
+PROGRESS_BUFFERED = os.environ.get('PROGRESS_BUFFERED', str(bool(REDIS_URL))).lower() == 'true'
+PROGRESS_FLUSH_INTERVAL = float(os.environ.get('PROGRESS_FLUSH_INTERVAL', '10'))  # seconds
+
+# Trending courses (see tccwebsite/trending.py). Scores are scaled to
+# TRENDING_EPOCH; move it forward and run `manage.py rebuild_trending` within
+# about a thousand half-lives of it.
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', '72'))
+TRENDING_EPOCH = os.environ.get('TRENDING_EPOCH', '2025-01-01')
+TRENDING_ENROLLMENT_WEIGHT = float(os.environ.get('TRENDING_ENROLLMENT_WEIGHT', '1'))
+TRENDING_REVIEW_WEIGHT = float(os.environ.get('TRENDING_REVIEW_WEIGHT', '2'))  # for a five-star review
+TRENDING_REDIS_TIMEOUT = float(os.environ.get('TRENDING_REDIS_TIMEOUT', '0.5'))  # seconds
 
-# Password validation
-# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+# ------------------------------------------------------------------------------
+# Catalog API (read-only)
+# ------------------------------------------------------------------------------
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', '86400'))  # per-object serializer output
+API_MAX_AGE = int(os.environ.get('API_MAX_AGE', '60'))
 
 # ------------------------------------------------------------------------------
 # Passwords
@@ -195,6 +276,60 @@ if not DEBUG:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Completion certificates (see tccwebsite/certificates.py): an optional background
+# image and TrueType fonts; Pillow's built-in font is used when unset.
+CERTIFICATE_TEMPLATE = os.environ.get('CERTIFICATE_TEMPLATE')
+CERTIFICATE_FONT = os.environ.get('CERTIFICATE_FONT')
+CERTIFICATE_BOLD_FONT = os.environ.get('CERTIFICATE_BOLD_FONT', CERTIFICATE_FONT)
+
+# Sitemaps and blog feeds, rewritten on content changes (see tccwebsite/seo.py)
+SITE_URL = os.environ.get('SITE_URL', 'https://tccproject.onrender.com').rstrip('/')
+GENERATED_ROOT = Path(os.environ.get('GENERATED_ROOT', BASE_DIR / 'generated'))
+GENERATED_MAX_AGE = int(os.environ.get('GENERATED_MAX_AGE', '3600'))
+SITEMAP_SHARD_SIZE = int(os.environ.get('SITEMAP_SHARD_SIZE', '5000'))  # pk range per sitemap file
+
+# Pre-rendered public pages served to anonymous visitors (see tccwebsite/prerender.py).
+# Keep them out of STATIC_ROOT: WhiteNoise would serve them to everyone under /static/.
+PRERENDER_ENABLED = os.environ.get('PRERENDER_ENABLED', 'True').lower() == 'true'
+PRERENDER_ROOT = Path(os.environ.get('PRERENDER_ROOT', GENERATED_ROOT / 'prerendered'))
+PRERENDER_DEBOUNCE = float(os.environ.get('PRERENDER_DEBOUNCE', '2'))  # seconds to coalesce edits
+
+# Brotli/gzip for view responses (see tccwebsite/compression.py); Brotli needs the `brotli` package
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+# Pages rendered once for everyone, with per-user bits filled in by static/js/hydrate.js
+# (see tccwebsite/hydration.py)
+HYDRATION_ENABLED = os.environ.get('HYDRATION_ENABLED', 'True').lower() == 'true'
+HYDRATED_PAGE_TIMEOUT = int(os.environ.get('HYDRATED_PAGE_TIMEOUT', '3600'))  # seconds
+# Cache-Control/Surrogate-Key headers from @cache_policy, and purges on content changes
+# (see tccwebsite/http_cache.py). Use tccwebsite.http_cache.HTTPPurger behind a CDN/proxy.
+HTTP_CACHE_PURGER = os.environ.get('HTTP_CACHE_PURGER', 'tccwebsite.http_cache.LoggingPurger')
+HTTP_CACHE_PURGE_URL = os.environ.get('HTTP_CACHE_PURGE_URL', '')
+HTTP_CACHE_PURGE_HEADERS = (
+    {'Authorization': f"Bearer {os.environ['HTTP_CACHE_PURGE_TOKEN']}"} if os.environ.get('HTTP_CACHE_PURGE_TOKEN') else {}
+)
+HTTP_CACHE_PURGE_TIMEOUT = float(os.environ.get('HTTP_CACHE_PURGE_TIMEOUT', '5'))  # seconds
+# Offline catalog: service worker at /sw.js plus a versioned catalog bundle
+# (see tccwebsite/offline.py). Turning it off makes installed workers unregister.
+OFFLINE_ENABLED = os.environ.get('OFFLINE_ENABLED', 'True').lower() == 'true'
+OFFLINE_SYNC_INTERVAL = int(os.environ.get('OFFLINE_SYNC_INTERVAL', '60'))  # seconds between version checks
+OFFLINE_SNAPSHOT_TIMEOUT = int(os.environ.get('OFFLINE_SNAPSHOT_TIMEOUT', str(30 * 24 * 3600)))  # delta base lifetime
+# Request shape capture for `manage.py replay_traffic` (see tccwebsite/traffic.py)
+TRAFFIC_CAPTURE_ENABLED = os.environ.get('TRAFFIC_CAPTURE_ENABLED', 'False').lower() == 'true'
+TRAFFIC_CAPTURE_PATH = os.environ.get('TRAFFIC_CAPTURE_PATH', str(GENERATED_ROOT / 'traffic' / 'traffic-%Y-%m-%d.jsonl'))
+TRAFFIC_CAPTURE_EXCLUDE = (STATIC_URL, MEDIA_URL, f'/{ADMIN_URL}')
+# Query parameters whose values are recorded (everything else is redacted).
+TRAFFIC_CAPTURE_QUERY_PARAMS = {'page', 'sort', 'search', 'q', 'difficulty', 'instructor', 'price', 'duration', 'month', 'courses', 'days', 'months'}
+# Retention (see tccwebsite/retention.py): read contact messages and long-inactive
+# newsletter subscribers are moved to gzipped JSONL files by `manage.py archive_old_rows`.
+RETENTION_ROOT = Path(os.environ.get('RETENTION_ROOT', BASE_DIR / 'archive'))
+CONTACT_RETENTION_DAYS = int(os.environ.get('CONTACT_RETENTION_DAYS', '365'))  # after the message arrived
+NEWSLETTER_RETENTION_DAYS = int(os.environ.get('NEWSLETTER_RETENTION_DAYS', '730'))  # after unsubscribing
+RETENTION_BATCH_SIZE = int(os.environ.get('RETENTION_BATCH_SIZE', '500'))  # rows per transaction
+# Send the page head before rendering the body in views using stream_render (see tccwebsite/streaming.py)
+STREAMING_RENDER_ENABLED = os.environ.get('STREAMING_RENDER_ENABLED', 'True').lower() == 'true'
+
 # ------------------------------------------------------------------------------
 # Login / Redirects
 # ------------------------------------------------------------------------------
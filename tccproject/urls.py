@@ -21,7 +21,7 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     # Move admin to a non-default path to reduce casual discovery
-    path('tcc-dashboard-9c8f3e/', admin.site.urls),
+    path(settings.ADMIN_URL, admin.site.urls),
     path('', include('tccwebsite.urls')),
 ]
 
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tccproject.settings')
 
 application = get_wsgi_application()
+
+# Compile templates, populate URL resolvers and open DB connections before the
+# worker takes traffic. Deployments that fork after loading the app (gunicorn
+# preload) set TCC_WARMUP_CONNECTIONS=false and open connections post-fork.
+if os.environ.get('TCC_WARMUP', 'true').lower() == 'true':
+    from tccwebsite.warmup import warm_up
+
+    warm_up(connections=os.environ.get('TCC_WARMUP_CONNECTIONS', 'true').lower() == 'true')
@@ -1,33 +1,61 @@
 from django.contrib import admin
-from .models import Instructor, Course, Testimonial, BlogPost, Contact, StudentProfile, Enrollment, Newsletter
+from .models import Instructor, Course, Cohort, Testimonial, BlogPost, Contact, StudentProfile, Enrollment, Newsletter, Certificate
+from .admin_perf import AutocompleteFilter, LargeTableAdminMixin
+from .exports import export_action
+from .cohorts import resync_cohort
 
 # Register your models here.
 
 @admin.register(Instructor)
 class InstructorAdmin(admin.ModelAdmin):
     list_display = ['user', 'specialization', 'experience_years']
+    list_select_related = ['user']
     list_filter = ['specialization', 'experience_years']
     search_fields = ['user__first_name', 'user__last_name', 'specialization']
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'difficulty', 'price', 'instructor', 'is_featured', 'created_at']
-    list_filter = ['difficulty', 'is_featured', 'instructor', 'created_at']
+    list_select_related = ['instructor__user']
+    list_filter = ['difficulty', 'is_featured', ('instructor', AutocompleteFilter), 'created_at']
     search_fields = ['title', 'description']
     list_editable = ['is_featured', 'price']
     prepopulated_fields = {}
 
+@admin.register(Cohort)
+class CohortAdmin(admin.ModelAdmin):
+    list_display = ['name', 'course', 'start_date', 'capacity', 'seats_taken', 'is_open']
+    list_select_related = ['course']
+    list_filter = ['is_open', ('course', AutocompleteFilter), 'start_date']
+    search_fields = ['name', 'course__title']
+    readonly_fields = ['seats_taken']
+    autocomplete_fields = ['course']
+    actions = ['recount_seats']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'capacity' in form.changed_data:
+            # Extra seats go to the waitlist straight away.
+            resync_cohort(obj.pk)
+
+    @admin.action(description='Recount seats and promote from the waitlist')
+    def recount_seats(self, request, queryset):
+        promoted = sum(len(resync_cohort(pk)) for pk in queryset.values_list('pk', flat=True))
+        self.message_user(request, f'Seats recounted; {promoted} waitlisted enrollment(s) promoted.')
+
 @admin.register(Testimonial)
-class TestimonialAdmin(admin.ModelAdmin):
+class TestimonialAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['student_name', 'course', 'rating', 'is_featured', 'created_at']
-    list_filter = ['rating', 'is_featured', 'course', 'created_at']
+    list_select_related = ['course']
+    list_filter = ['rating', 'is_featured', ('course', AutocompleteFilter), 'created_at']
     search_fields = ['student_name', 'content']
     list_editable = ['is_featured', 'rating']
 
 @admin.register(BlogPost)
 class BlogPostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'is_published', 'created_at']
-    list_filter = ['is_published', 'author', 'created_at']
+    list_select_related = ['author']
+    list_filter = ['is_published', ('author', AutocompleteFilter), 'created_at']
     search_fields = ['title', 'content']
     list_editable = ['is_published']
     prepopulated_fields = {'slug': ('title',)}
@@ -39,24 +67,66 @@ class ContactAdmin(admin.ModelAdmin):
     search_fields = ['name', 'email', 'subject']
     list_editable = ['is_read']
     readonly_fields = ['created_at']
+    actions = [export_action('contacts', 'csv'), export_action('contacts', 'jsonl', compress=True)]
 
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'phone_number', 'created_at']
+    list_select_related = ['user']
     list_filter = ['created_at']
     search_fields = ['user__first_name', 'user__last_name', 'user__email']
     readonly_fields = ['created_at', 'updated_at']
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
-    list_display = ['student', 'course', 'status', 'progress_percentage', 'enrollment_date']
-    list_filter = ['status', 'enrollment_date', 'course']
+class EnrollmentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['student', 'course', 'cohort', 'status', 'progress_percentage', 'enrollment_date']
+    list_select_related = ['student', 'course', 'cohort']
+    list_filter = [
+        'status', 'enrollment_date', ('course', AutocompleteFilter),
+        ('cohort', AutocompleteFilter), ('student', AutocompleteFilter),
+    ]
     search_fields = ['student__first_name', 'student__last_name', 'course__title']
     list_editable = ['status', 'progress_percentage']
+    actions = [
+        export_action('enrollments', 'csv'),
+        export_action('enrollments', 'csv', compress=True),
+        export_action('enrollments', 'jsonl', compress=True),
+    ]
+
+    # Staff edits bypass cohorts.enroll/cancel, so recount the affected cohorts.
+    def save_model(self, request, obj, form, change):
+        previous = form.initial.get('cohort') if change else None
+        super().save_model(request, obj, form, change)
+        if {'status', 'cohort'} & set(form.changed_data):
+            for cohort_id in {previous, obj.cohort_id} - {None}:
+                resync_cohort(cohort_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        if obj.cohort_id:
+            resync_cohort(obj.cohort_id)
+
+    def delete_queryset(self, request, queryset):
+        cohort_ids = set(queryset.exclude(cohort=None).values_list('cohort_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for cohort_id in cohort_ids:
+            resync_cohort(cohort_id)
+
+@admin.register(Certificate)
+class CertificateAdmin(admin.ModelAdmin):
+    # Rendered by generate_certificates; edit the enrollment, course or student instead.
+    list_display = ['number', 'student_name', 'course_title', 'completion_date', 'generated_at']
+    search_fields = ['number', 'student_name', 'course_title']
+    date_hierarchy = 'completion_date'
+    readonly_fields = [
+        'enrollment', 'number', 'student_name', 'course_title', 'instructor_name', 'completion_date',
+        'png', 'pdf', 'generated_at',
+    ]
 
 @admin.register(Newsletter)
 class NewsletterAdmin(admin.ModelAdmin):
-    list_display = ['email', 'is_active', 'subscribed_at']
+    list_display = ['email', 'is_active', 'subscribed_at', 'deactivated_at']
     list_filter = ['is_active', 'subscribed_at']
     search_fields = ['email']
     list_editable = ['is_active']
+    actions = [export_action('newsletter', 'csv'), export_action('newsletter', 'jsonl', compress=True)]
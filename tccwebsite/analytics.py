@@ -0,0 +1,188 @@
+"""
+Enrollment and revenue analytics rollups.
+
+``EnrollmentDailyStat`` holds per-course, per-day deltas: new enrollments,
+completions, cancellations and revenue (the course price is booked when an
+enrollment enters a paid status and reversed when it leaves one). Signals keep
+the table current one enrollment at a time; ``backfill_analytics`` rebuilds it
+from history a few courses at a time (``rebuild_courses``). Each batch is one
+short transaction that locks its course rows (which holds back new enrollments
+in them) and their enrollments, so a change made meanwhile waits and is applied
+on top of the rebuilt rows rather than counted twice, while every other course
+takes writes as usual. Reports only ever read the rollups.
+
+Reversals use the course's price at the time of the reversal, not the amount
+that was booked: cancelling after a price change leaves the difference in the
+revenue column until ``backfill_analytics`` rebuilds it (from current prices).
+
+A course's rows cascade with the course, so enrollments deleted along with
+their course are not rolled up: deletions are applied once the delete has
+committed, and only if the course still exists.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Course, Enrollment, EnrollmentDailyStat
+
+PAID_STATUSES = ('active', 'completed')
+FACT_FIELDS = ('enrollments', 'completions', 'cancellations', 'revenue')
+
+
+def apply_deltas(course_id, day, **deltas):
+    """Atomically add ``deltas`` to the (course, day) row, creating it if needed."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if EnrollmentDailyStat.objects.filter(course_id=course_id, date=day).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            EnrollmentDailyStat.objects.create(course_id=course_id, date=day, **deltas)
+    except IntegrityError:
+        # Another writer created the row first.
+        EnrollmentDailyStat.objects.filter(course_id=course_id, date=day).update(**updates)
+
+
+def status_deltas(old_status, new_status, price):
+    """Return the fact deltas caused by moving an enrollment between statuses."""
+    deltas = defaultdict(int)
+    was_paid = old_status in PAID_STATUSES
+    is_paid = new_status in PAID_STATUSES
+    if is_paid and not was_paid:
+        deltas['revenue'] += price
+    elif was_paid and not is_paid:
+        deltas['revenue'] -= price
+    if new_status == 'completed' and old_status != 'completed':
+        deltas['completions'] += 1
+    elif old_status == 'completed' and new_status != 'completed':
+        deltas['completions'] -= 1
+    if new_status == 'cancelled' and old_status != 'cancelled':
+        deltas['cancellations'] += 1
+    elif old_status == 'cancelled' and new_status != 'cancelled':
+        deltas['cancellations'] -= 1
+    return deltas
+
+
+def _course_price(course_id):
+    return Course.objects.values_list('price', flat=True).get(pk=course_id)
+
+
+def record_enrollment_created(enrollment):
+    deltas = status_deltas(None, enrollment.status, _course_price(enrollment.course_id))
+    deltas['enrollments'] += 1
+    apply_deltas(enrollment.course_id, timezone.localdate(enrollment.enrollment_date), **deltas)
+
+
+def record_status_change(course_id, old_status, new_status, when=None):
+    if old_status == new_status:
+        return
+    deltas = status_deltas(old_status, new_status, _course_price(course_id))
+    apply_deltas(course_id, timezone.localdate(when or timezone.now()), **deltas)
+
+
+def record_enrollment_deleted(enrollment):
+    course_id, status = enrollment.course_id, enrollment.status
+    day = timezone.localdate(enrollment.enrollment_date)
+
+    def apply():
+        price = Course.objects.filter(pk=course_id).values_list('price', flat=True).first()
+        if price is None:
+            return  # deleted along with its course, and its rows with it
+        deltas = status_deltas(status, None, price)
+        deltas['enrollments'] -= 1
+        apply_deltas(course_id, day, **deltas)
+
+    transaction.on_commit(apply)
+
+
+def backfill_facts(rows, prices):
+    """
+    Aggregate historical enrollment rows into fact deltas.
+
+    ``rows`` are ``(course_id, status, enrollment_date, completion_date)``.
+    Status history is not stored, so revenue and cancellations are booked on
+    the enrollment day and completions on the completion day.
+    """
+    facts = defaultdict(lambda: dict.fromkeys(FACT_FIELDS, 0))
+    for course_id, status, enrolled_at, completed_at in rows:
+        enrolled_day = timezone.localdate(enrolled_at)
+        facts[course_id, enrolled_day]['enrollments'] += 1
+        if status in PAID_STATUSES:
+            facts[course_id, enrolled_day]['revenue'] += prices.get(course_id, Decimal('0'))
+        if status == 'cancelled':
+            facts[course_id, enrolled_day]['cancellations'] += 1
+        if status == 'completed':
+            completed_day = timezone.localdate(completed_at) if completed_at else enrolled_day
+            facts[course_id, completed_day]['completions'] += 1
+    return facts
+
+
+def rebuild_courses(course_ids):
+    """Rebuild the rollups of ``course_ids`` from their enrollments; returns the number of enrollments read."""
+    with transaction.atomic():
+        prices = dict(Course.objects.select_for_update().filter(pk__in=course_ids).values_list('id', 'price'))
+        rows = list(
+            Enrollment.objects.select_for_update().filter(course_id__in=prices)
+            .values_list('course_id', 'status', 'enrollment_date', 'completion_date')
+        )
+        EnrollmentDailyStat.objects.filter(course_id__in=prices).delete()
+        for (course_id, day), deltas in backfill_facts(rows, prices).items():
+            apply_deltas(course_id, day, **deltas)
+    return len(rows)
+
+
+# ------------------------------------------------------------------------------
+# Reports (rollups only)
+# ------------------------------------------------------------------------------
+def course_summary():
+    rows = (
+        EnrollmentDailyStat.objects.values('course_id', 'course__title')
+        .annotate(
+            total_enrollments=Sum('enrollments'),
+            total_completions=Sum('completions'),
+            total_cancellations=Sum('cancellations'),
+            total_revenue=Sum('revenue'),
+        )
+        .order_by('-total_enrollments')
+    )
+    summary = []
+    for row in rows:
+        enrollments = row['total_enrollments'] or 0
+        summary.append({
+            'course_id': row['course_id'],
+            'course_title': row['course__title'],
+            'enrollments': enrollments,
+            'completions': row['total_completions'] or 0,
+            'cancellations': row['total_cancellations'] or 0,
+            'completion_rate': round(100 * (row['total_completions'] or 0) / enrollments, 1) if enrollments else 0.0,
+            'revenue': row['total_revenue'] or Decimal('0'),
+        })
+    return summary
+
+
+def monthly_revenue(months=12):
+    start = (timezone.localdate().replace(day=1) - timedelta(days=31 * (months - 1))).replace(day=1)
+    return list(
+        EnrollmentDailyStat.objects.filter(date__gte=start)
+        .annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(revenue=Sum('revenue'), enrollments=Sum('enrollments'), completions=Sum('completions'))
+        .order_by('month')
+    )
+
+
+def daily_enrollments(days=30):
+    start = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        EnrollmentDailyStat.objects.filter(date__gte=start)
+        .values('date', 'course_id')
+        .annotate(enrollments=Sum('enrollments'), completions=Sum('completions'))
+        .order_by('date', 'course_id')
+    )
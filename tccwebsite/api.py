@@ -0,0 +1,178 @@
+"""
+Read-only JSON catalog API (courses, instructors, testimonials, blog posts).
+
+* ``?fields=id,title`` returns a sparse fieldset and narrows the SQL to the
+  columns (and joins) those fields need.
+* Lists use cursor pagination, so deep pages cost the same as the first one.
+* Serialized objects are cached under their version from ``versioning.py``;
+  responses carry an ETag built from those versions and answer
+  ``If-None-Match`` with ``304 Not Modified``. File URLs are host-relative, so
+  a cached object is the same whichever host name served it first.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from .models import BlogPost, Course, Instructor, Testimonial
+from .serializers import BlogPostSerializer, CourseSerializer, InstructorSerializer, TestimonialSerializer
+from .versioning import get_versions
+
+
+class CatalogCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+class InstructorCursorPagination(CatalogCursorPagination):
+    ordering = 'id'
+
+
+class CachedCatalogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Base class for the catalog endpoints.
+
+    Subclasses set ``version_namespace`` and may describe non-column fields in
+    ``field_sources`` as ``{field: ([columns], [select_related paths])}``.
+    """
+
+    pagination_class = CatalogCursorPagination
+    version_namespace = None
+    always_load = ['id']
+    field_sources = {}
+
+    # --- sparse fieldsets ---------------------------------------------------
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            available = list(self.serializer_class.Meta.fields)
+            raw = self.request.query_params.get('fields')
+            if not raw:
+                self._requested_fields = available
+            else:
+                requested = [name.strip() for name in raw.split(',') if name.strip()]
+                unknown = sorted(set(requested) - set(available))
+                if unknown:
+                    raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}"})
+                self._requested_fields = [name for name in available if name in requested]
+        return self._requested_fields
+
+    def get_queryset(self):
+        columns = set(self.always_load)
+        related = set()
+        for name in self.get_requested_fields():
+            field_columns, field_related = self.field_sources.get(name, ([name], []))
+            columns.update(field_columns)
+            related.update(field_related)
+        queryset = self.queryset.all()
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset.only(*sorted(columns))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_context(self):
+        # Without a request, file and image fields serialize to relative URLs.
+        return {**super().get_serializer_context(), 'request': None}
+
+    # --- per-object cache ---------------------------------------------------
+    def object_versions(self, objects):
+        return get_versions(self.version_namespace, [obj.pk for obj in objects])
+
+    def serialize(self, objects):
+        fields_key = hashlib.md5(','.join(self.get_requested_fields()).encode()).hexdigest()[:12]
+        versions = self.object_versions(objects)
+        keys = {
+            obj.pk: f"api:{self.version_namespace}:{obj.pk}:{versions[obj.pk]}:{fields_key}"
+            for obj in objects
+        }
+        cached = cache.get_many(keys.values())
+        missing = [obj for obj in objects if keys[obj.pk] not in cached]
+        if missing:
+            fresh = dict(zip(
+                (keys[obj.pk] for obj in missing),
+                self.get_serializer(missing, many=True).data,
+            ))
+            cache.set_many(fresh, settings.API_CACHE_TIMEOUT)
+            cached.update(fresh)
+        etag_source = f"{fields_key}|" + ','.join(f"{obj.pk}:{versions[obj.pk]}" for obj in objects)
+        return [cached[keys[obj.pk]] for obj in objects], etag_source
+
+    # --- conditional responses ---------------------------------------------
+    def respond(self, request, data, etag_source, response_factory):
+        etag = quote_etag(hashlib.sha1(f"{request.get_full_path()}|{etag_source}".encode()).hexdigest())
+        # Weak comparison (RFC 9110 13.1.2): compression.py weakens the ETag of encoded responses.
+        if_none_match = {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = response_factory(data)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.API_MAX_AGE)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        data, etag_source = self.serialize(page)
+        etag_source += f"|next={self.paginator.get_next_link()}"
+        return self.respond(request, data, etag_source, self.get_paginated_response)
+
+    def retrieve(self, request, *args, **kwargs):
+        data, etag_source = self.serialize([self.get_object()])
+        return self.respond(request, data[0], etag_source, Response)
+
+
+class CourseViewSet(CachedCatalogViewSet):
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+    version_namespace = 'course'
+    always_load = ['id', 'instructor', 'created_at']
+    field_sources = {
+        'instructor_name': (['instructor__user__first_name', 'instructor__user__last_name'], ['instructor__user']),
+        'url': (['id'], []),
+    }
+
+    def object_versions(self, objects):
+        # A course's payload also changes when its instructor's name does.
+        courses = get_versions('course', [course.pk for course in objects])
+        instructors = get_versions('instructor', {course.instructor_id for course in objects})
+        return {course.pk: f"{courses[course.pk]}.{instructors[course.instructor_id]}" for course in objects}
+
+
+class InstructorViewSet(CachedCatalogViewSet):
+    queryset = Instructor.objects.all()
+    serializer_class = InstructorSerializer
+    pagination_class = InstructorCursorPagination
+    version_namespace = 'instructor'
+    always_load = ['id', 'user']
+    field_sources = {
+        'name': (['user__first_name', 'user__last_name'], ['user']),
+    }
+
+
+class TestimonialViewSet(CachedCatalogViewSet):
+    queryset = Testimonial.objects.all()
+    serializer_class = TestimonialSerializer
+    version_namespace = 'testimonial'
+    always_load = ['id', 'created_at']
+
+
+class BlogPostViewSet(CachedCatalogViewSet):
+    queryset = BlogPost.objects.filter(is_published=True)
+    serializer_class = BlogPostSerializer
+    version_namespace = 'blogpost'
+    lookup_field = 'slug'
+    always_load = ['id', 'slug', 'created_at']
+    field_sources = {
+        'author_name': (['author__first_name', 'author__last_name'], ['author']),
+        'url': (['slug'], []),
+    }
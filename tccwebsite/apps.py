@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TccwebsiteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tccwebsite'
+
+    def ready(self):
+        # Connect the connection_created counter used by the pool metrics view.
+        from . import db_pool  # noqa: F401
+        from . import signals  # noqa: F401
@@ -0,0 +1,172 @@
+"""
+Save-time processing of blog post content.
+
+``render(content)`` turns the stored post body (HTML, or plain text with blank
+lines between paragraphs) into sanitized HTML with anchors on its headings,
+plus a table of contents and a reading time. ``BlogPost`` keeps the results in
+their own columns (filled by a ``pre_save`` handler), so ``blog_detail`` emits
+them as-is and listings never need to load ``content``.
+"""
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+
+from django.utils.html import linebreaks
+from django.utils.text import slugify
+
+WORDS_PER_MINUTE = 200
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'em', 'figcaption', 'figure',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre',
+    's', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead',
+    'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Elements dropped together with everything inside them.
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'template', 'noscript', 'svg', 'math'}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'code': {'class'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+TOC_LEVELS = {'h2', 'h3'}
+HEADING_TAGS = {'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# Opening either of these implicitly closes an open <p> / <li>.
+BLOCK_TAGS = {'blockquote', 'figure', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'ol', 'p', 'pre', 'table', 'ul'}
+
+_HAS_BLOCKS = re.compile(r'<(?:p|div|h[1-6]|ul|ol|blockquote|pre|table)\b', re.IGNORECASE)
+_SCHEME = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+
+def _safe_url(value):
+    value = value.strip()
+    # Browsers ignore control characters and whitespace inside schemes.
+    match = _SCHEME.match(re.sub(r'[\x00-\x20]', '', value))
+    return match is None or match.group(1).lower() in ALLOWED_SCHEMES
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+        self.toc = []
+        self.anchors = set()
+        self.heading = None  # (tag, index in parts, text parts) while inside a heading
+
+    # --- helpers ------------------------------------------------------------
+    def _anchor(self, title):
+        base = slugify(title) or 'section'
+        anchor, counter = base, 2
+        while anchor in self.anchors:
+            anchor = f"{base}-{counter}"
+            counter += 1
+        self.anchors.add(anchor)
+        return anchor
+
+    def _attributes(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        rendered = []
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _safe_url(value):
+                continue
+            rendered.append(f' {name}="{escape(value, quote=True)}"')
+        if tag == 'a' and any(part.startswith(' href=') for part in rendered):
+            rendered.append(' rel="nofollow noopener"')
+        return ''.join(rendered)
+
+    # --- parser callbacks ---------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        if self.open_tags and (
+            (tag in BLOCK_TAGS and self.open_tags[-1] == 'p') or (tag == 'li' and self.open_tags[-1] == 'li')
+        ):
+            self._close(self.open_tags.pop())
+        if tag in VOID_TAGS:
+            self.parts.append(f'<{tag}{self._attributes(tag, attrs)}>')
+            return
+        if tag in HEADING_TAGS and self.heading is None:
+            # The id is filled in at the end tag, once the heading text is known.
+            self.heading = (tag, len(self.parts), [])
+            self.parts.append(None)
+        else:
+            self.parts.append(f'<{tag}{self._attributes(tag, attrs)}>')
+        self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag.lower() not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside this element.
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self._close(open_tag)
+            if open_tag == tag:
+                break
+
+    def _close(self, tag):
+        if self.heading is not None and tag == self.heading[0]:
+            heading_tag, index, text = self.heading
+            title = ' '.join(''.join(text).split())
+            anchor = self._anchor(title)
+            self.parts[index] = f'<{heading_tag} id="{anchor}">'
+            if heading_tag in TOC_LEVELS and title:
+                self.toc.append({'level': int(heading_tag[1]), 'id': anchor, 'title': title})
+            self.heading = None
+        self.parts.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.parts.append(escape(data, quote=False))
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading[2].append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self._close(self.open_tags.pop())
+
+
+def render(content):
+    """Return ``{'html', 'toc', 'reading_time'}`` for a post body."""
+    content = content or ''
+    if not _HAS_BLOCKS.search(content):
+        # Plain text (or inline markup only): blank lines separate paragraphs.
+        content = linebreaks(content)
+    sanitizer = _Sanitizer()
+    sanitizer.feed(content)
+    sanitizer.close()
+    words = len(' '.join(sanitizer.text).split())
+    return {
+        'html': ''.join(sanitizer.parts),
+        'toc': sanitizer.toc,
+        'reading_time': max(1, math.ceil(words / WORDS_PER_MINUTE)),
+    }
@@ -0,0 +1,208 @@
+"""
+Completion certificates (PNG and PDF), rendered with Pillow.
+
+Completed enrollments without a ``Certificate`` are the queue: progress
+flushes complete enrollments with ``bulk_update`` (no signals), so nothing is
+enqueued per save. ``manage.py generate_certificates`` renders the queue in a
+process pool. Each worker loads the background template and the fonts once
+(``init_worker``), renders from plain payload dicts without touching the
+database and writes the files itself; the parent only stores the rows.
+
+Files are content-addressed under ``MEDIA_ROOT/certificates/<sha[:2]>/<sha>.<ext>``:
+rendering is deterministic (the PDF dates are the completion date), so a
+re-render of unchanged details reuses the same files, and a file name never
+points at different bytes, so it doubles as the download's ETag.
+``certificate_download`` serves the stored file; the first click on a
+certificate the batch has not reached yet renders that one in-process.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from PIL import Image, ImageDraw, ImageFont
+
+from .models import Certificate, Enrollment
+
+SIZE = (2000, 1414)  # A4 landscape at ~170 dpi
+PDF_RESOLUTION = 170
+INK = (33, 37, 41)
+ACCENT = (13, 110, 253)
+DETAIL_FIELDS = ['number', 'student_name', 'course_title', 'instructor_name', 'completion_date']
+
+_assets = None  # per process: (media_root, template image, fonts)
+
+
+# ------------------------------------------------------------------------------
+# Rendering (runs in pool workers; no database access)
+# ------------------------------------------------------------------------------
+def _font(path, size):
+    return ImageFont.truetype(path, size) if path else ImageFont.load_default(size=size)
+
+
+def _plain_template():
+    image = Image.new('RGB', SIZE, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 40, SIZE[0] - 41, SIZE[1] - 41), outline=ACCENT, width=12)
+    draw.rectangle((80, 80, SIZE[0] - 81, SIZE[1] - 81), outline=INK, width=2)
+    return image
+
+
+def init_worker(media_root, template_path, font_path, bold_font_path):
+    """Load the template and fonts once per process."""
+    global _assets
+    template = Image.open(template_path).convert('RGB').resize(SIZE) if template_path else _plain_template()
+    fonts = {
+        'heading': _font(bold_font_path, 110),
+        'name': _font(bold_font_path, 120),
+        'title': _font(bold_font_path, 80),
+        'body': _font(font_path, 48),
+        'small': _font(font_path, 34),
+    }
+    _assets = (Path(media_root), template, fonts)
+
+
+def render(payload):
+    """Return ``(png_bytes, pdf_bytes)`` for a payload from ``payload_for``."""
+    _media_root, template, fonts = _assets
+    image = template.copy()
+    draw = ImageDraw.Draw(image)
+    completed = date.fromisoformat(payload['completion_date'])
+    lines = [
+        (260, 'Certificate of Completion', 'heading', ACCENT),
+        (450, 'This certifies that', 'body', INK),
+        (580, payload['student_name'], 'name', INK),
+        (720, 'has successfully completed', 'body', INK),
+        (840, payload['course_title'], 'title', INK),
+        (980, f"taught by {payload['instructor_name']}", 'body', INK),
+        (1060, f"on {completed:%B} {completed.day}, {completed.year}", 'body', INK),
+        (1250, f"The Coding School · Certificate no. {payload['number']}", 'small', INK),
+    ]
+    for y, text, font, color in lines:
+        draw.text((SIZE[0] // 2, y), text, font=fonts[font], fill=color, anchor='mm')
+
+    png = io.BytesIO()
+    image.save(png, 'PNG')
+    stamp = datetime.combine(completed, datetime.min.time()).timetuple()
+    pdf = io.BytesIO()
+    image.save(
+        pdf, 'PDF', resolution=PDF_RESOLUTION, title=f"Certificate {payload['number']}",
+        creationDate=stamp, modDate=stamp,
+    )
+    return png.getvalue(), pdf.getvalue()
+
+
+def store(data, extension):
+    """Write ``data`` under its SHA-256 (once) and return the path relative to ``MEDIA_ROOT``."""
+    media_root = _assets[0]
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'certificates/{digest[:2]}/{digest}.{extension}'
+    path = media_root / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as handle:
+            handle.write(data)
+        os.replace(handle.name, path)  # concurrent writers produce identical bytes
+    return name
+
+
+def generate(payload):
+    """Pool task: render and store one certificate, returning the row values."""
+    png, pdf = render(payload)
+    return {**payload, 'png': store(png, 'png'), 'pdf': store(pdf, 'pdf')}
+
+
+def worker_args():
+    return (
+        str(settings.MEDIA_ROOT), settings.CERTIFICATE_TEMPLATE,
+        settings.CERTIFICATE_FONT, settings.CERTIFICATE_BOLD_FONT,
+    )
+
+
+# ------------------------------------------------------------------------------
+# Payloads and rows (parent process)
+# ------------------------------------------------------------------------------
+def _enrollment_rows(queryset):
+    return queryset.values(
+        'pk', 'completion_date', 'enrollment_date', 'student__username',
+        student_full_name=Concat(F('student__first_name'), Value(' '), F('student__last_name')),
+        course_title=F('course__title'),
+        instructor_name=Concat(
+            F('course__instructor__user__first_name'), Value(' '), F('course__instructor__user__last_name')
+        ),
+    )
+
+
+def payload_for(row):
+    completed = row['completion_date'] or row['enrollment_date']
+    return {
+        'enrollment_id': row['pk'],
+        'number': f"TCC-{timezone.localdate(completed).year}-{row['pk']:06d}",
+        'student_name': row['student_full_name'].strip() or row['student__username'],
+        'course_title': row['course_title'],
+        'instructor_name': row['instructor_name'].strip(),
+        'completion_date': timezone.localdate(completed).isoformat(),
+    }
+
+
+def _details(certificate):
+    return {
+        **{field: getattr(certificate, field) for field in DETAIL_FIELDS},
+        'completion_date': certificate.completion_date.isoformat(),
+    }
+
+
+def pending_payloads(refresh=False):
+    """
+    Payloads of completed enrollments without a certificate; with ``refresh``,
+    also of those whose certificate shows outdated details (a renamed course...).
+    """
+    completed = Enrollment.objects.filter(status='completed').order_by('pk')
+    if not refresh:
+        for row in _enrollment_rows(completed.filter(certificate__isnull=True)).iterator(chunk_size=2000):
+            yield payload_for(row)
+        return
+    existing = {certificate.pk: _details(certificate) for certificate in Certificate.objects.only(*DETAIL_FIELDS)}
+    for row in _enrollment_rows(completed).iterator(chunk_size=2000):
+        payload = payload_for(row)
+        details = {field: payload[field] for field in DETAIL_FIELDS}
+        if existing.get(row['pk']) != details:
+            yield payload
+
+
+def save_rows(results):
+    """Create or update the certificate rows for ``generate`` results."""
+    # MySQL/MariaDB upsert with ON DUPLICATE KEY UPDATE, which takes no conflict target.
+    features = connections[router.db_for_write(Certificate)].features
+    target = {'unique_fields': ['enrollment']} if features.supports_update_conflicts_with_target else {}
+    Certificate.objects.bulk_create(
+        [
+            Certificate(
+                enrollment_id=result['enrollment_id'], png=result['png'], pdf=result['pdf'],
+                **{field: result[field] for field in DETAIL_FIELDS},
+            )
+            for result in results
+        ],
+        update_conflicts=True,
+        update_fields=[*DETAIL_FIELDS, 'png', 'pdf', 'generated_at'],
+        **target,
+    )
+
+
+def ensure(enrollment):
+    """The certificate of a completed enrollment, rendering it in-process if it is missing or outdated."""
+    payload = payload_for(_enrollment_rows(Enrollment.objects.filter(pk=enrollment.pk)).get())
+    certificate = Certificate.objects.filter(pk=enrollment.pk).first()
+    if certificate is None or _details(certificate) != {field: payload[field] for field in DETAIL_FIELDS}:
+        if _assets is None:
+            init_worker(*worker_args())
+        save_rows([generate(payload)])
+        certificate = Certificate.objects.get(pk=enrollment.pk)
+    return certificate
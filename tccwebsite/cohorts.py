@@ -0,0 +1,152 @@
+"""
+Enrollment with seat-limited cohorts and a waitlist.
+
+Seats are taken with a conditional ``UPDATE ... SET seats_taken = seats_taken
++ 1 WHERE seats_taken < capacity``: the database serializes concurrent updates
+of the cohort row and re-checks the condition, so a cohort can never be
+overbooked (the ``cohort_seats_within_capacity`` constraint backs this up).
+When that update finds the cohort full, the request locks the cohort row
+before joining the waitlist, and releasing a seat holds the same lock while it
+promotes the oldest waitlisted enrollment. That way a seat cannot be freed
+while someone is in the middle of joining the waitlist and be left empty.
+
+Enrolling is idempotent: a repeated or concurrent request for the same
+student and course returns the existing enrollment (a cancelled one is
+reopened). Courses without an open cohort keep the old behaviour of unlimited
+enrollment.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Cohort, Enrollment
+
+# Statuses that occupy a cohort seat.
+SEAT_STATUSES = ('pending', 'active', 'completed')
+
+ENROLLED = 'enrolled'
+WAITLISTED = 'waitlisted'
+EXISTING = 'existing'
+
+
+def current_cohort(course):
+    """The next open cohort of ``course`` that has not started yet, if any."""
+    return (
+        Cohort.objects.filter(course=course, is_open=True, start_date__gte=timezone.localdate())
+        .order_by('start_date', 'pk')
+        .first()
+    )
+
+
+def _take_seat(cohort_id):
+    return Cohort.objects.filter(pk=cohort_id, seats_taken__lt=F('capacity')).update(
+        seats_taken=F('seats_taken') + 1
+    ) == 1
+
+
+def _claim_seat_or_queue(cohort_id):
+    """Return True if a seat was taken, False if the caller must join the waitlist."""
+    if _take_seat(cohort_id):
+        return True
+    # Full: hold the cohort row so a concurrent release sees our waitlist entry.
+    Cohort.objects.select_for_update().get(pk=cohort_id)
+    return _take_seat(cohort_id)
+
+
+def enroll(student, course, cohort=None):
+    """
+    Enroll ``student`` in ``course``; returns ``(enrollment, outcome)``.
+
+    ``outcome`` is ``ENROLLED``, ``WAITLISTED`` or ``EXISTING``.
+    """
+    existing = Enrollment.objects.filter(student=student, course=course).first()
+    if existing is not None and existing.status != 'cancelled':
+        return existing, EXISTING
+
+    cohort = cohort or current_cohort(course)
+    try:
+        with transaction.atomic():
+            if existing is not None:
+                existing = Enrollment.objects.select_for_update().get(pk=existing.pk)
+                if existing.status != 'cancelled':
+                    return existing, EXISTING
+            seated = cohort is None or _claim_seat_or_queue(cohort.pk)
+            status = 'active' if seated else 'waitlisted'
+            if existing is not None:
+                # Re-enrolling joins the back of the queue, like a new request.
+                existing.cohort = cohort
+                existing.status = status
+                existing.enrollment_date = timezone.now()
+                existing.save(update_fields=['cohort', 'status', 'enrollment_date'])
+                enrollment = existing
+            else:
+                enrollment = Enrollment.objects.create(student=student, course=course, cohort=cohort, status=status)
+    except IntegrityError:
+        # A concurrent request enrolled this student first; our seat was rolled back.
+        return Enrollment.objects.get(student=student, course=course), EXISTING
+    return enrollment, ENROLLED if seated else WAITLISTED
+
+
+def _promote_next(cohort_id):
+    """Give a freed seat to the oldest waitlisted enrollment; the cohort row must be locked."""
+    queue = Enrollment.objects.filter(cohort_id=cohort_id, status='waitlisted').order_by('enrollment_date', 'pk')
+    promoted = queue.select_for_update().first()
+    if promoted is None:
+        return None
+    promoted.status = 'active'
+    promoted.save(update_fields=['status'])
+    return promoted
+
+
+def cancel(enrollment):
+    """
+    Cancel an enrollment. A freed cohort seat passes straight to the head of
+    the waitlist, or is returned to the cohort. Returns the promoted enrollment.
+    """
+    with transaction.atomic():
+        if enrollment.cohort_id:
+            Cohort.objects.select_for_update().get(pk=enrollment.cohort_id)
+        current = Enrollment.objects.select_for_update().get(pk=enrollment.pk)
+        if current.status == 'cancelled':
+            return None
+        held_seat = current.cohort_id is not None and current.status in SEAT_STATUSES
+        current.status = 'cancelled'
+        current.save(update_fields=['status'])
+        enrollment.status = 'cancelled'
+
+        if not held_seat:
+            return None
+        promoted = _promote_next(current.cohort_id)
+        if promoted is None:
+            Cohort.objects.filter(pk=current.cohort_id).update(seats_taken=F('seats_taken') - 1)
+        return promoted
+
+
+def waitlist_position(enrollment):
+    if enrollment.status != 'waitlisted':
+        return None
+    ahead = Enrollment.objects.filter(
+        cohort_id=enrollment.cohort_id, status='waitlisted', enrollment_date__lt=enrollment.enrollment_date
+    ).count()
+    return ahead + 1
+
+
+def resync_cohort(cohort_id):
+    """
+    Recount a cohort's seats from its enrollments and fill any free seats from
+    the waitlist. Used after edits that bypass ``enroll``/``cancel`` (the admin,
+    capacity changes). Returns the promoted enrollments.
+    """
+    promoted = []
+    with transaction.atomic():
+        cohort = Cohort.objects.select_for_update().get(pk=cohort_id)
+        taken = Enrollment.objects.filter(cohort_id=cohort_id, status__in=SEAT_STATUSES).count()
+        while taken < cohort.capacity:
+            enrollment = _promote_next(cohort_id)
+            if enrollment is None:
+                break
+            promoted.append(enrollment)
+            taken += 1
+        # Over capacity only if staff seated students by hand; never push past the constraint.
+        Cohort.objects.filter(pk=cohort_id).update(seats_taken=min(taken, cohort.capacity))
+    return promoted
@@ -0,0 +1,138 @@
+"""
+Compression of dynamic responses.
+
+WhiteNoise serves pre-compressed static files; ``CompressionMiddleware``
+handles everything the views produce. It negotiates Brotli (when the optional
+``brotli`` package is installed) or gzip from ``Accept-Encoding`` and leaves
+alone:
+
+* responses smaller than ``COMPRESSION_MIN_SIZE`` or of a non-text type;
+* responses that already have a ``Content-Encoding`` or ask for ``no-transform``;
+* pages that embed a CSRF token. Compressing a secret next to text an attacker
+  can inject into the page (search terms, form input) lets the attacker
+  recover it from the compressed sizes (BREACH), so those pages go out as-is.
+
+Streaming responses (see ``streaming.stream_render``) are compressed chunk by
+chunk with a sync flush after each chunk, so early flushes still reach the
+browser early.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only.
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|rss\+xml|atom\+xml)|image/svg\+xml)', re.IGNORECASE
+)
+# Random bytes in the gzip header vary the length of every response (Django's
+# GZipMiddleware does the same) as extra protection for pages we do compress.
+GZIP_RANDOM_BYTES = 100
+
+
+def _accepted_encodings(header):
+    """Return the codings in an ``Accept-Encoding`` header with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = re.search(r'q=([0-9.]+)', params)
+        try:
+            if quality and float(quality.group(1)) == 0:
+                continue
+        except ValueError:
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = _accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def _compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=GZIP_RANDOM_BYTES)
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def embeds_csrf_token(request):
+    # Set by get_token() (i.e. {% csrf_token %}); CsrfViewMiddleware resets it
+    # to False once the cookie is sent, so only its presence tells.
+    return 'CSRF_COOKIE_NEEDS_UPDATE' in request.META
+
+
+class CompressionMiddleware:
+    """Brotli/gzip compression for view responses, with BREACH-aware exclusions."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if settings.COMPRESSION_ENABLED:
+            self.compress(request, response)
+        return response
+
+    def compress(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return
+        if response.streaming:
+            if response.is_async:
+                return
+        elif len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if embeds_csrf_token(request):
+            return
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            compressed = _compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
@@ -0,0 +1,174 @@
+"""
+``CourseCard`` read model: one narrow row per course with exactly what a
+course card in a listing shows (no ``description`` TextField, no joins).
+
+Signals keep it in sync incrementally:
+
+* course saves rewrite the course's own columns (``sync_course``);
+* instructor and instructor-user saves rewrite ``instructor_name``;
+* testimonial changes recompute the course's rating and review count;
+* enrollment status transitions move ``enrollment_count`` by +1/-1.
+
+Writes that bypass signals (``QuerySet.update``, raw SQL, fixtures loaded
+without signals) can leave cards behind; ``rebuild_course_cards`` recomputes
+every card from the source tables and reports the drift it fixed.
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import Truncator
+
+from .cohorts import SEAT_STATUSES
+from .models import Course, CourseCard, Enrollment, Instructor, Testimonial
+
+SUMMARY_WORDS = 20
+# Enrollments counted on cards: students holding a place, not the waitlist.
+COUNTED_STATUSES = SEAT_STATUSES
+
+LISTING_FIELDS = [
+    'title', 'summary', 'difficulty', 'duration', 'price', 'course_image', 'is_featured',
+    'created_at', 'instructor_id', 'instructor_name',
+]
+AGGREGATE_FIELDS = ['rating_avg', 'review_count', 'enrollment_count']
+
+
+def summarize(description):
+    return Truncator(description or '').words(SUMMARY_WORDS)[:CourseCard._meta.get_field('summary').max_length]
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+def _rating(value):
+    return None if value is None else Decimal(value).quantize(Decimal('0.01'))
+
+
+def _listing_values(course, instructor_name):
+    return {
+        'title': course.title,
+        'summary': summarize(course.description),
+        'difficulty': course.difficulty,
+        'duration': course.duration,
+        'price': course.price,
+        'course_image': course.course_image.name or '',
+        'is_featured': course.is_featured,
+        'created_at': course.created_at,
+        'instructor_id': course.instructor_id,
+        'instructor_name': instructor_name,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Incremental maintenance (called from signals.py)
+# ------------------------------------------------------------------------------
+def sync_course(course):
+    first_name, last_name = Instructor.objects.filter(pk=course.instructor_id).values_list(
+        'user__first_name', 'user__last_name'
+    ).get()
+    _card, created = CourseCard.objects.update_or_create(
+        course_id=course.pk, defaults=_listing_values(course, _full_name(first_name, last_name))
+    )
+    if created:
+        # A missing card for an existing course (drift) needs its aggregates too.
+        refresh_ratings(course.pk)
+        CourseCard.objects.filter(course_id=course.pk).update(
+            enrollment_count=Enrollment.objects.filter(course_id=course.pk, status__in=COUNTED_STATUSES).count()
+        )
+
+
+def refresh_instructor(instructor_id):
+    names = Instructor.objects.filter(pk=instructor_id).values_list('user__first_name', 'user__last_name').first()
+    if names is not None:
+        CourseCard.objects.filter(instructor_id=instructor_id).update(instructor_name=_full_name(*names))
+
+
+def refresh_ratings(course_id):
+    if course_id is None:
+        return
+    stats = Testimonial.objects.filter(course_id=course_id).aggregate(avg=Avg('rating'), count=Count('pk'))
+    CourseCard.objects.filter(course_id=course_id).update(rating_avg=_rating(stats['avg']), review_count=stats['count'])
+
+
+def enrollment_changed(course_id, old_status, new_status):
+    """Adjust the card for a status transition (``None`` = created / deleted); returns whether the count moved."""
+    delta = (new_status in COUNTED_STATUSES) - (old_status in COUNTED_STATUSES)
+    if delta:
+        CourseCard.objects.filter(course_id=course_id).update(enrollment_count=F('enrollment_count') + delta)
+    return bool(delta)
+
+
+# ------------------------------------------------------------------------------
+# Full rebuild
+# ------------------------------------------------------------------------------
+def card_rows(course_model=Course, testimonial_model=Testimonial, enrollment_model=Enrollment):
+    """
+    Yield ``{field: value}`` for every course's card, computed from the source
+    tables in one query. Takes the models so migrations can pass historical ones.
+    """
+    reviews = testimonial_model.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    enrolled = (
+        enrollment_model.objects.filter(course=OuterRef('pk'), status__in=COUNTED_STATUSES)
+        .order_by().values('course')
+    )
+    rows = course_model.objects.annotate(
+        card_rating_avg=Subquery(reviews.annotate(value=Avg('rating')).values('value')),
+        card_review_count=Coalesce(Subquery(reviews.annotate(value=Count('pk')).values('value')), 0),
+        card_enrollment_count=Coalesce(Subquery(enrolled.annotate(value=Count('pk')).values('value')), 0),
+    ).values(
+        'pk', 'title', 'description', 'difficulty', 'duration', 'price', 'course_image', 'is_featured',
+        'created_at', 'instructor_id', 'instructor__user__first_name', 'instructor__user__last_name',
+        'card_rating_avg', 'card_review_count', 'card_enrollment_count',
+    )
+    for row in rows.iterator(chunk_size=500):
+        yield {
+            'course_id': row['pk'],
+            'title': row['title'],
+            'summary': summarize(row['description']),
+            'difficulty': row['difficulty'],
+            'duration': row['duration'],
+            'price': row['price'],
+            'course_image': row['course_image'] or '',
+            'is_featured': row['is_featured'],
+            'created_at': row['created_at'],
+            'instructor_id': row['instructor_id'],
+            'instructor_name': _full_name(row['instructor__user__first_name'], row['instructor__user__last_name']),
+            'rating_avg': _rating(row['card_rating_avg']),
+            'review_count': row['card_review_count'],
+            'enrollment_count': row['card_enrollment_count'],
+        }
+
+
+def rebuild(dry_run=False):
+    """
+    Bring every card in line with the source tables.
+
+    Returns ``(created, updated, deleted)``: the drift found (and fixed unless
+    ``dry_run``).
+    """
+    fields = LISTING_FIELDS + AGGREGATE_FIELDS
+    existing = {card.course_id: card for card in CourseCard.objects.all()}
+    to_create, to_update = [], []
+    for row in card_rows():
+        card = existing.pop(row['course_id'], None)
+        if card is None:
+            to_create.append(CourseCard(**row))
+            continue
+        changed = False
+        for field in fields:
+            current = getattr(card, field)
+            if field == 'course_image':
+                current = current.name or ''
+            if current != row[field]:
+                setattr(card, field, row[field])
+                changed = True
+        if changed:
+            to_update.append(card)
+
+    if not dry_run:
+        CourseCard.objects.bulk_create(to_create, batch_size=500)
+        CourseCard.objects.bulk_update(to_update, fields, batch_size=500)
+        # Cards whose course is gone (the FK cascades, so only after raw deletes).
+        CourseCard.objects.filter(pk__in=list(existing)).delete()
+    return len(to_create), len(to_update), len(existing)
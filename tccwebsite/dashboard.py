@@ -0,0 +1,80 @@
+"""
+Student dashboard read model.
+
+``get_student_dashboard`` returns every enrollment of a student together with
+the course and instructor columns the profile page shows, fetched in one
+annotated query, plus aggregate stats computed from those rows. The result is
+cached per student and invalidated by the signals in ``signals.py``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Left
+
+from .models import Enrollment
+
+PAID_STATUSES = ('active', 'completed')
+
+
+def dashboard_cache_key(user_id):
+    return f"dashboard:{user_id}"
+
+
+def _load_enrollments(user_id):
+    status_labels = dict(Enrollment.STATUS_CHOICES)
+    rows = list(
+        Enrollment.objects.filter(student_id=user_id)
+        .order_by('-enrollment_date')
+        .values(
+            'id',
+            'status',
+            'progress_percentage',
+            'enrollment_date',
+            'completion_date',
+            'course_id',
+            course_title=F('course__title'),
+            course_price=F('course__price'),
+            course_image=F('course__course_image'),
+            course_summary=Left('course__description', 200),
+            instructor_name=Concat(
+                'course__instructor__user__first_name',
+                Value(' '),
+                'course__instructor__user__last_name',
+            ),
+        )
+    )
+    for row in rows:
+        row['status_label'] = status_labels.get(row['status'], row['status'])
+    return rows
+
+
+def _compute_stats(rows):
+    counted = [row for row in rows if row['status'] not in ('cancelled', 'waitlisted')]
+    return {
+        'total': len(rows),
+        'active': sum(1 for row in rows if row['status'] == 'active'),
+        'completed': sum(1 for row in rows if row['status'] == 'completed'),
+        'pending': sum(1 for row in rows if row['status'] == 'pending'),
+        'waitlisted': sum(1 for row in rows if row['status'] == 'waitlisted'),
+        'average_progress': round(
+            sum(row['progress_percentage'] for row in counted) / len(counted)
+        ) if counted else 0,
+        'total_spent': sum(
+            (row['course_price'] for row in rows if row['status'] in PAID_STATUSES), 0
+        ),
+    }
+
+
+def get_student_dashboard(user):
+    """Return ``{'enrollments': [...], 'stats': {...}}`` for ``user``, cached."""
+    key = dashboard_cache_key(user.pk)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        rows = _load_enrollments(user.pk)
+        dashboard = {'enrollments': rows, 'stats': _compute_stats(rows)}
+        cache.set(key, dashboard, settings.DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
+
+
+def invalidate_student_dashboards(user_ids):
+    cache.delete_many([dashboard_cache_key(user_id) for user_id in set(user_ids)])
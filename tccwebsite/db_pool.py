@@ -0,0 +1,51 @@
+"""
+Connection pool metrics.
+
+Postgres aliases use psycopg's pool, which already tracks checkout wait time;
+other backends use persistent connections, for which we count how many
+physical connections this process has opened.
+"""
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_connects = {}  # alias -> number of physical connections opened by this process
+
+
+def _record_connection(sender, connection, **kwargs):
+    _connects[connection.alias] = _connects.get(connection.alias, 0) + 1
+
+
+connection_created.connect(_record_connection, dispatch_uid='tccwebsite.db_pool')
+
+
+def pool_stats():
+    """Return per-alias pool/connection metrics for the current process."""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            pool_data = pool.get_stats()
+            checkouts = pool_data.get('requests_num', 0)
+            wait_ms = pool_data.get('requests_wait_ms', 0)
+            stats[alias] = {
+                'mode': 'pool',
+                'pool_min': pool.min_size,
+                'pool_max': pool.max_size,
+                'pool_size': pool_data.get('pool_size', 0),
+                'pool_available': pool_data.get('pool_available', 0),
+                'requests_waiting': pool_data.get('requests_waiting', 0),
+                'checkouts': checkouts,
+                'checkout_wait_ms_total': wait_ms,
+                'checkout_wait_ms_avg': round(wait_ms / checkouts, 3) if checkouts else 0.0,
+                'checkout_errors': pool_data.get('requests_errors', 0),
+                'connections_opened': pool_data.get('connections_num', 0),
+            }
+        else:
+            stats[alias] = {
+                'mode': 'persistent',
+                'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+                'connections_opened': _connects.get(alias, 0),
+                'is_open': connection.connection is not None,
+            }
+    return stats
@@ -0,0 +1,135 @@
+"""
+Primary/replica database routing with read-your-writes stickiness.
+
+Reads go to a healthy replica listed in ``settings.DATABASE_REPLICAS`` and fall
+back to ``default`` when none answers. Any write pins the rest of the request
+to the primary, and ``ReadYourWritesMiddleware`` keeps the client pinned for
+``REPLICA_PIN_SECONDS`` afterwards so a user never reads stale state right after
+enrolling, registering or editing their profile.
+
+Local testing with two SQLite files::
+
+    python manage.py migrate
+    cp primary.sqlite3 replica.sqlite3
+    DATABASE_URL=sqlite:///primary.sqlite3 \\
+    DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py runserver
+"""
+import logging
+import random
+import time
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE_NAME = 'tcc_primary_pin'
+PIN_COOKIE_SALT = 'tccwebsite.db_router'
+
+_state = Local()
+_replica_health = {}  # alias -> (is_healthy, checked_at)
+
+
+def pin_to_primary():
+    """Send every remaining query of the current request to the primary."""
+    _state.pinned = True
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def _reset_state(pinned=False):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def replica_is_healthy(alias):
+    """Cheap, cached liveness probe so a dead replica is skipped, not retried per query."""
+    now = time.monotonic()
+    cached = _replica_health.get(alias)
+    if cached and now - cached[1] < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return cached[0]
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        healthy = True
+    except DatabaseError:
+        logger.warning('Replica %s failed its health check; reading from primary', alias)
+        try:
+            connections[alias].close()
+        except DatabaseError:
+            pass
+        healthy = False
+
+    _replica_health[alias] = (healthy, now)
+    return healthy
+
+
+class PrimaryReplicaRouter:
+    """Route reads to replicas and writes to ``default``."""
+
+    def db_for_read(self, model, **hints):
+        if is_pinned():
+            return 'default'
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_is_healthy(alias)]
+        if not replicas:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        _state.pinned = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication, never directly.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin unsafe requests, and clients that wrote recently, to the primary.
+
+    The pin is a short-lived signed cookie, so it follows the browser across
+    workers without any shared server-side state.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.method not in ('GET', 'HEAD', 'OPTIONS') or self._has_recent_write(request)
+        # State is reset here rather than after the response so that lazily
+        # rendered (streamed) bodies still see the pin.
+        _reset_state(pinned)
+
+        response = self.get_response(request)
+
+        if getattr(_state, 'wrote', False):
+            response.set_signed_cookie(
+                PIN_COOKIE_NAME,
+                '1',
+                salt=PIN_COOKIE_SALT,
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def _has_recent_write(self, request):
+        return request.get_signed_cookie(
+            PIN_COOKIE_NAME,
+            default=None,
+            salt=PIN_COOKIE_SALT,
+            max_age=settings.REPLICA_PIN_SECONDS,
+        ) is not None
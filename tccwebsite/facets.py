@@ -0,0 +1,203 @@
+"""
+Faceted course browsing.
+
+Facets: difficulty, instructor, price band (naira) and duration. For a given
+filter state all bucket counts come from one conditional-aggregate query: each
+bucket's ``Count`` is filtered by the bucket plus every *other* facet's
+selection, which is what lets a visitor widen a facet they already picked.
+Counts are cached under the normalized filter state and the ``catalog``
+version, which ``signals.py`` bumps whenever a course or instructor changes.
+Filters and counts run against the ``CourseCard`` read model; only a search
+joins back to ``Course`` for the description. The ``sort`` parameter travels
+with the filter state (so pagination keeps it) but does not affect counts.
+"""
+import hashlib
+import re
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Course, CourseCard, Instructor
+from .versioning import get_version
+
+FACET_CACHE_TIMEOUT = 60 * 60
+
+# (slug, label, lower bound inclusive, upper bound exclusive)
+PRICE_BANDS = [
+    ('under-150k', 'Under ₦150,000', None, 150000),
+    ('150k-250k', '₦150,000 – ₦249,999', 150000, 250000),
+    ('250k-350k', '₦250,000 – ₦349,999', 250000, 350000),
+    ('350k-plus', '₦350,000 and above', 350000, None),
+]
+
+FACET_NAMES = ['difficulty', 'instructor', 'price', 'duration']
+FACET_LABELS = {
+    'difficulty': 'All Levels',
+    'instructor': 'All Instructors',
+    'price': 'Any Price',
+    'duration': 'Any Duration',
+}
+
+# sort value -> (label, ordering); the first one is the default.
+SORT_ORDERS = {
+    'newest': ('Newest', ('-created_at',)),
+    'trending': ('Trending', ('-trending_score', '-created_at')),
+}
+DEFAULT_SORT = next(iter(SORT_ORDERS))
+
+
+def _duration_weeks(duration):
+    match = re.match(r'\s*(\d+)\s*(week|month)', duration.lower())
+    if not match:
+        return float('inf')
+    amount = int(match.group(1))
+    return amount * 4 if match.group(2) == 'month' else amount
+
+
+def _vocabulary():
+    """Instructor and duration buckets, which depend on the catalog contents."""
+    key = f"facets:vocabulary:{get_version('catalog')}"
+    vocabulary = cache.get(key)
+    if vocabulary is None:
+        instructors = [
+            (str(pk), f"{first_name} {last_name}".strip(), specialization)
+            for pk, first_name, last_name, specialization in Instructor.objects.filter(course__isnull=False)
+            .distinct()
+            .order_by('user__first_name', 'user__last_name')
+            .values_list('pk', 'user__first_name', 'user__last_name', 'specialization')
+        ]
+        durations = sorted(
+            Course.objects.order_by().values_list('duration', flat=True).distinct(),
+            key=lambda value: (_duration_weeks(value), value),
+        )
+        vocabulary = {'instructors': instructors, 'durations': durations}
+        cache.set(key, vocabulary, FACET_CACHE_TIMEOUT)
+    return vocabulary
+
+
+def get_buckets():
+    """Return ``{facet: [(value, label, Q), ...]}`` for every facet."""
+    vocabulary = _vocabulary()
+    price_buckets = []
+    for slug, label, low, high in PRICE_BANDS:
+        condition = Q()
+        if low is not None:
+            condition &= Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        price_buckets.append((slug, label, condition))
+    return {
+        'difficulty': [(value, label, Q(difficulty=value)) for value, label in Course.DIFFICULTY_CHOICES],
+        'instructor': [
+            (pk, f"{name} ({specialization})" if specialization else name, Q(instructor_id=int(pk)))
+            for pk, name, specialization in vocabulary['instructors']
+        ],
+        'price': price_buckets,
+        'duration': [(value, value, Q(duration=value)) for value in vocabulary['durations']],
+    }
+
+
+def parse_filters(params, buckets=None):
+    """Return the normalized filter state: only known facet values, plus the search term."""
+    buckets = buckets or get_buckets()
+    state = {}
+    for facet in FACET_NAMES:
+        value = params.get(facet)
+        if value and any(value == bucket[0] for bucket in buckets[facet]):
+            state[facet] = value
+    search = (params.get('search') or '').strip()
+    if search:
+        state['search'] = search
+    if params.get('sort') in SORT_ORDERS and params['sort'] != DEFAULT_SORT:
+        state['sort'] = params['sort']
+    return state
+
+
+def search_q(term):
+    return (
+        Q(title__icontains=term) |
+        Q(course__description__icontains=term) |
+        Q(instructor_name__icontains=term)
+    )
+
+
+def _facet_q(facet, value, buckets):
+    for bucket_value, _label, condition in buckets[facet]:
+        if bucket_value == value:
+            return condition
+    return Q()
+
+
+def _selection_q(state, buckets, exclude=None):
+    condition = Q()
+    for facet in FACET_NAMES:
+        if facet != exclude and facet in state:
+            condition &= _facet_q(facet, state[facet], buckets)
+    return condition
+
+
+def apply_filters(queryset, state, buckets=None):
+    buckets = buckets or get_buckets()
+    if 'search' in state:
+        queryset = queryset.filter(search_q(state['search']))
+    return queryset.filter(_selection_q(state, buckets))
+
+
+def apply_sort(queryset, state):
+    return queryset.order_by(*SORT_ORDERS[state.get('sort', DEFAULT_SORT)][1])
+
+
+def sort_options(state):
+    selected = state.get('sort', DEFAULT_SORT)
+    return [
+        {'value': value, 'label': label, 'selected': value == selected}
+        for value, (label, _ordering) in SORT_ORDERS.items()
+    ]
+
+
+def filter_querystring(state):
+    """Query string for the state, for pagination links (search comes last)."""
+    return urlencode(sorted(state.items(), key=lambda item: (item[0] == 'search', item[0])))
+
+
+def _count(condition):
+    return Count('pk', filter=condition) if condition else Count('pk')
+
+
+def get_facet_counts(state, buckets=None):
+    """
+    Return ``{'total': n, 'facets': [{'name', 'all_label', 'selected', 'buckets': [...]}, ...]}``.
+
+    One aggregate query per distinct filter state, cached until the catalog changes.
+    """
+    buckets = buckets or get_buckets()
+    filters = {name: value for name, value in state.items() if name != 'sort'}
+    normalized = filter_querystring({**filters, 'search': state.get('search', '').lower()})
+    key = f"facets:counts:{get_version('catalog')}:{hashlib.md5(normalized.encode()).hexdigest()}"
+    counts = cache.get(key)
+    if counts is None:
+        base = CourseCard.objects.all()
+        if 'search' in state:
+            base = base.filter(search_q(state['search']))
+
+        aggregates = {'total': _count(_selection_q(state, buckets))}
+        for facet in FACET_NAMES:
+            others = _selection_q(state, buckets, exclude=facet)
+            for index, (_value, _label, condition) in enumerate(buckets[facet]):
+                aggregates[f"{facet}_{index}"] = _count(others & condition)
+        counts = base.aggregate(**aggregates)
+        cache.set(key, counts, FACET_CACHE_TIMEOUT)
+
+    facets = []
+    for facet in FACET_NAMES:
+        facets.append({
+            'name': facet,
+            'all_label': FACET_LABELS[facet],
+            'selected': state.get(facet, ''),
+            'buckets': [
+                {'value': value, 'label': label, 'count': counts[f"{facet}_{index}"]}
+                for index, (value, label, _condition) in enumerate(buckets[facet])
+            ],
+        })
+    return {'total': counts['total'], 'facets': facets}
@@ -0,0 +1,253 @@
+"""
+HTTP caching policy for views, with surrogate-key purging.
+
+Views declare how shared caches (a CDN or reverse proxy) may keep their
+responses with ``@cache_policy``; ``CachePolicyMiddleware`` turns that into
+``Cache-Control``/``Vary``/``Surrogate-Key`` headers once every other
+middleware is done, so it can see cookies and ``Vary: Cookie`` added late:
+
+* ``SHARED`` pages are the same for every visitor (hydrated pages). They stay
+  public unless the response turned out to depend on the session anyway.
+* ``AUTH`` pages differ by login: anonymous responses are public (``Vary:
+  Cookie``), logged-in ones ``private, no-cache``.
+* ``PRIVATE`` responses are only ever cached by the browser.
+
+A response that sets a cookie is never public.
+
+``Surrogate-Key`` lists the objects a page shows. Views pass what they render
+to ``tag()``: model instances become ``course-<pk>``, ``instructor-<pk>``,
+``post-<slug>`` and so on, querysets and pages add their collection key
+(``courses``, ``posts``...) plus the keys of the rows the template actually
+loaded. Keys are resolved when the view returns, which for a streamed response
+(``streaming.stream_render``) is before its body renders: querysets the body
+evaluates only contribute their collection key there. Purges therefore also
+hit the collection key of every collection whose rows show the changed data
+(course cards show instructor names, so renaming an instructor purges
+``courses``). Saves and deletes purge the matching keys through the purger named by
+``HTTP_CACHE_PURGER``: ``LoggingPurger`` (default, records and logs) or
+``HTTPPurger`` (sends ``PURGE`` with a ``Surrogate-Key`` header to
+``HTTP_CACHE_PURGE_URL``).
+"""
+import collections
+import functools
+import logging
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.paginator import Page
+from django.db import models, transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .models import BlogPost, Cohort, Course, CourseCard, Enrollment, Instructor, Testimonial
+
+logger = logging.getLogger(__name__)
+
+SHARED = 'shared'
+AUTH = 'auth'
+PRIVATE = 'private'
+
+COLLECTION_KEYS = {
+    Course: 'courses',
+    CourseCard: 'courses',
+    Instructor: 'instructors',
+    BlogPost: 'posts',
+    Testimonial: 'testimonials',
+}
+
+
+@dataclass(frozen=True)
+class Policy:
+    max_age: int = 0
+    s_maxage: int = None
+    stale_while_revalidate: int = None
+    stale_if_error: int = None
+    per_user: str = AUTH
+    vary: tuple = ()
+    keys: tuple = ()
+
+
+# ------------------------------------------------------------------------------
+# Surrogate keys
+# ------------------------------------------------------------------------------
+def instance_keys(instance):
+    """Keys of the pages that show ``instance``."""
+    if isinstance(instance, (Course, CourseCard)):
+        return {f'course-{instance.pk}', f'instructor-{instance.instructor_id}'}
+    if isinstance(instance, BlogPost):
+        return {f'post-{instance.slug}'}
+    if isinstance(instance, Cohort):
+        return {f'course-{instance.course_id}'}
+    return {f'{instance._meta.model_name}-{instance.pk}'}
+
+
+def keys_for(*values):
+    """Surrogate keys for rendered values: instances, querysets, pages, lists or raw keys."""
+    keys = set()
+    for value in values:
+        if isinstance(value, str):
+            keys.add(value)
+        elif isinstance(value, models.Model):
+            keys |= instance_keys(value)
+        elif isinstance(value, Page):
+            keys |= keys_for(value.object_list)
+        elif isinstance(value, models.QuerySet):
+            if value.model in COLLECTION_KEYS:
+                keys.add(COLLECTION_KEYS[value.model])
+            # Rows the template loaded; never run a query just for headers.
+            if value._result_cache is not None:
+                keys |= keys_for(*value._result_cache)
+        elif isinstance(value, (list, tuple, set)):
+            keys |= keys_for(*value)
+    return keys
+
+
+def tag(request, *values):
+    """
+    Record what a response shows. Resolved once the view has returned: after
+    rendering for ``render()``, so lazy querysets add their rows' keys, but
+    before the body of a streamed response, where they only add their
+    collection key.
+    """
+    if not hasattr(request, '_cache_tags'):
+        request._cache_tags = []
+    request._cache_tags.extend(values)
+
+
+def purge_keys_for(instance):
+    """Keys to purge when ``instance`` is saved or deleted."""
+    if isinstance(instance, User):
+        # Instructor and author names are shown on their pages.
+        keys = {f'instructor-{pk}' for pk in Instructor.objects.filter(user=instance).values_list('pk', flat=True)}
+        if keys:
+            # ...and on course cards, which streamed pages only tag as ``courses``.
+            keys.add('courses')
+        if BlogPost.objects.filter(author=instance, is_published=True).exists():
+            keys.add('posts')
+        return keys
+    if isinstance(instance, Enrollment):
+        # The course listing shows enrollment counts.
+        return {'courses'}
+    keys = instance_keys(instance)
+    if type(instance) in COLLECTION_KEYS:
+        keys.add(COLLECTION_KEYS[type(instance)])
+    if isinstance(instance, Instructor):
+        keys.add('courses')
+    if isinstance(instance, BlogPost) and getattr(instance, '_loaded_slug', None):
+        keys.add(f'post-{instance._loaded_slug}')
+    return keys
+
+
+# ------------------------------------------------------------------------------
+# Policies
+# ------------------------------------------------------------------------------
+def cache_policy(max_age=0, s_maxage=None, stale_while_revalidate=None, stale_if_error=None,
+                 per_user=AUTH, vary=(), keys=()):
+    """Declare the HTTP caching policy of a view (applied by ``CachePolicyMiddleware``)."""
+    policy = Policy(max_age, s_maxage, stale_while_revalidate, stale_if_error, per_user, tuple(vary), tuple(keys))
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            response.cache_policy = policy
+            return response
+        wrapped.cache_policy = policy
+        return wrapped
+    return decorator
+
+
+def _is_public(request, response, policy):
+    if policy.per_user == PRIVATE or response.cookies:
+        return False
+    if policy.per_user == SHARED:
+        return 'cookie' not in response.get('Vary', '').lower()
+    user = getattr(request, 'user', None)
+    return user is None or not user.is_authenticated
+
+
+def apply_policy(request, response, policy):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return
+    if policy.vary:
+        patch_vary_headers(response, policy.vary)
+    if policy.per_user == AUTH:
+        patch_vary_headers(response, ('Cookie',))
+    public = _is_public(request, response, policy)
+
+    if not response.has_header('Cache-Control'):
+        if public:
+            directives = {'public': True, 'max_age': policy.max_age}
+            for name in ('s_maxage', 'stale_while_revalidate', 'stale_if_error'):
+                if getattr(policy, name) is not None:
+                    directives[name] = getattr(policy, name)
+            patch_cache_control(response, **directives)
+        elif policy.per_user == PRIVATE:
+            patch_cache_control(response, private=True, max_age=policy.max_age)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+
+    if public:
+        keys = keys_for(*policy.keys, *getattr(request, '_cache_tags', ()))
+        if keys:
+            response['Surrogate-Key'] = ' '.join(sorted(keys))
+
+
+class CachePolicyMiddleware:
+    """Apply ``@cache_policy`` after the session, CSRF and message middleware have run."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        policy = getattr(response, 'cache_policy', None)
+        if policy is not None:
+            apply_policy(request, response, policy)
+        return response
+
+
+# ------------------------------------------------------------------------------
+# Purging
+# ------------------------------------------------------------------------------
+class LoggingPurger:
+    """Logs purges and keeps the most recent keys in ``purged`` (for tests and local runs)."""
+
+    def __init__(self):
+        self.purged = collections.deque(maxlen=1000)
+
+    def purge(self, keys):
+        self.purged.extend(sorted(keys))
+        logger.info('Purge surrogate keys: %s', ' '.join(sorted(keys)))
+
+
+class HTTPPurger:
+    """Sends ``PURGE`` with a ``Surrogate-Key`` header to ``HTTP_CACHE_PURGE_URL``."""
+
+    def purge(self, keys):
+        request = urllib.request.Request(
+            settings.HTTP_CACHE_PURGE_URL,
+            method='PURGE',
+            headers={'Surrogate-Key': ' '.join(sorted(keys)), **settings.HTTP_CACHE_PURGE_HEADERS},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=settings.HTTP_CACHE_PURGE_TIMEOUT):
+                pass
+        except (urllib.error.URLError, OSError):
+            # The cached copies expire on their own; don't fail the save.
+            logger.exception('Purging surrogate keys %s failed', sorted(keys))
+
+
+@functools.lru_cache(maxsize=None)
+def get_purger():
+    return import_string(settings.HTTP_CACHE_PURGER)()
+
+
+def schedule_purge(instance):
+    """Purge the pages showing ``instance`` once the transaction commits."""
+    keys = purge_keys_for(instance)
+    if keys:
+        transaction.on_commit(lambda: get_purger().purge(keys))
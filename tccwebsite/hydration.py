@@ -0,0 +1,84 @@
+"""
+Shared page bodies with per-user fragments filled in by the browser.
+
+A hydrated page (``course_detail`` today) is rendered once, as an anonymous
+visitor would see it, and cached for everyone. Markup that differs per user
+carries ``data-hydrate-*`` attributes: every variant is in the page, hidden
+except the anonymous one. ``static/js/hydrate.js`` then makes one request to
+``views.hydrate`` for the visitor's state (login, enrollment state of the
+courses on the page, pending flash messages, a CSRF token for members) and
+shows the matching variants.
+
+The page itself never touches the session, so it stays identical across users
+and compressible; only the small JSON response is personal.
+"""
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+
+from . import cohorts
+from .http_cache import keys_for
+from .models import Enrollment
+
+# Values of ``enrollment_state`` / ``data-hydrate-show`` in course markup.
+ANONYMOUS = 'anonymous'
+CAN_ENROLL = 'enroll'
+ENROLLED = 'enrolled'
+WAITLISTED = 'waitlisted'
+
+MAX_COURSES = 50
+
+
+def shared_page(key, template_name, get_context):
+    """
+    Return ``(html, surrogate_keys)`` for the cached anonymous rendering of a
+    page, rendering it on a miss.
+    """
+    page = cache.get(key)
+    if page is None:
+        context = get_context()
+        # No request: context processors do not run, so nothing user-specific
+        # (user, messages, CSRF token) can leak into the shared copy.
+        html = render_to_string(template_name, {**context, 'hydrate': True})
+        page = (html, sorted(keys_for(*(value for value in context.values() if not isinstance(value, str)))))
+        cache.set(key, page, settings.HYDRATED_PAGE_TIMEOUT)
+    return page
+
+
+def course_states(user, course_ids):
+    """Return ``{course_id: {'state', 'waitlist_position'}}`` for ``user``."""
+    if not user.is_authenticated:
+        return {course_id: {'state': ANONYMOUS, 'waitlist_position': None} for course_id in course_ids}
+    states = {course_id: {'state': CAN_ENROLL, 'waitlist_position': None} for course_id in course_ids}
+    enrollments = Enrollment.objects.filter(student=user, course_id__in=course_ids).exclude(status='cancelled')
+    for enrollment in enrollments:
+        if enrollment.status == 'waitlisted':
+            states[enrollment.course_id] = {
+                'state': WAITLISTED, 'waitlist_position': cohorts.waitlist_position(enrollment),
+            }
+        else:
+            states[enrollment.course_id] = {'state': ENROLLED, 'waitlist_position': None}
+    return states
+
+
+def parse_course_ids(value):
+    ids = []
+    for part in value.split(','):
+        if part.strip().isdigit() and len(ids) < MAX_COURSES:
+            ids.append(int(part))
+    return ids
+
+
+def user_fragments(request, course_ids):
+    """Everything a hydrated page needs to know about the current visitor."""
+    user = request.user
+    return {
+        'authenticated': user.is_authenticated,
+        'username': user.username if user.is_authenticated else None,
+        # Only members see forms on hydrated pages.
+        'csrf_token': get_token(request) if user.is_authenticated else None,
+        'courses': {str(course_id): state for course_id, state in course_states(user, course_ids).items()},
+        'messages': [{'tags': message.tags, 'text': str(message)} for message in messages.get_messages(request)],
+    }
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tccwebsite import retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Move read contact messages and long-inactive newsletter subscribers past their retention '
+        'period to gzipped JSONL files, in small resumable batches (see tccwebsite/retention.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('policies', nargs='*', help=f"{', '.join(sorted(retention.POLICIES))} (default: all)")
+        parser.add_argument('--older-than', type=int, metavar='DAYS', help="Override the policy's retention days")
+        parser.add_argument('--batch-size', type=int, help='Rows per transaction (default: RETENTION_BATCH_SIZE)')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches per policy')
+        parser.add_argument('--max-seconds', type=float, help='Stop starting new batches after this long per policy')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the eligible rows')
+
+    def handle(self, *args, **options):
+        policies = options['policies'] or sorted(retention.POLICIES)
+        unknown = sorted(set(policies) - set(retention.POLICIES))
+        if unknown:
+            raise CommandError(f"Unknown policy(s): {', '.join(unknown)}")
+        if options['older_than'] is not None and options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative')
+        for policy in policies:
+            before = retention.cutoff(policy, options['older_than'])
+            if options['dry_run']:
+                count = retention.eligible(policy, before).count()
+                self.stdout.write(f'{policy}: {count} row(s) older than {before:%Y-%m-%d %H:%M} would be archived')
+                continue
+            stats = retention.archive(
+                policy,
+                days=options['older_than'],
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches'],
+                max_seconds=options['max_seconds'],
+                pause=options['pause'],
+                log=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+            remaining = retention.eligible(policy, before).exists()
+            self.stdout.write(self.style.SUCCESS(
+                f"{policy}: archived {stats['rows']} row(s) in {stats['batches']} batch(es) "
+                f"to {retention.policy_root(policy)} in {stats['seconds']:.2f}s "
+                f"({stats['rows_per_second']:,.0f} rows/s)"
+                + ('; more rows are eligible, run again to continue' if remaining else '')
+            ))
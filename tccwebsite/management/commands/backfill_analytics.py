@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tccwebsite.analytics import rebuild_courses
+from tccwebsite.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the enrollment/revenue rollups from enrollment history, a batch of courses per transaction. '
+        'Enrollment writes to the batch being rebuilt wait for it; other courses are not affected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses-per-batch', type=int, default=20)
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['courses_per_batch']
+        course_ids = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+
+        processed = 0
+        started = time.monotonic()
+        for start in range(0, len(course_ids), batch_size):
+            batch = course_ids[start:start + batch_size]
+            processed += rebuild_courses(batch)
+            self.stdout.write(f'Processed {processed} enrollments (courses up to id {batch[-1]})')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled rollups of {len(course_ids)} courses from {processed} enrollments '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
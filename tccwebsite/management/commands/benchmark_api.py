@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test import RequestFactory
+
+from tccwebsite.api import CourseViewSet
+from tccwebsite.models import Course
+from tccwebsite.serializers import CourseSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare course serialization throughput: DRF serializer, cached serializer output and raw values()'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=100, help='Courses serialized per iteration')
+
+    def handle(self, *args, **options):
+        iterations, limit = options['iterations'], options['limit']
+        fields = list(CourseSerializer.Meta.fields)
+
+        def drf_serializer():
+            courses = list(Course.objects.select_related('instructor__user')[:limit])
+            return json.dumps(CourseSerializer(courses, many=True).data, default=str)
+
+        viewset = CourseViewSet(action_map={'get': 'list'})
+        viewset.request = viewset.initialize_request(RequestFactory().get('/api/v1/courses/'))
+        viewset.format_kwarg = None
+
+        def cached_serializer():
+            courses = list(viewset.get_queryset()[:limit])
+            return json.dumps(viewset.serialize(courses)[0], default=str)
+
+        def values_rows():
+            rows = Course.objects.values(
+                'id', 'title', 'description', 'difficulty', 'duration', 'price',
+                'is_featured', 'course_image', 'instructor', 'created_at', 'updated_at',
+                instructor_name=Concat(
+                    F('instructor__user__first_name'), Value(' '), F('instructor__user__last_name')
+                ),
+            )[:limit]
+            return json.dumps(list(rows), default=str)
+
+        cache.clear()
+        count = min(limit, Course.objects.count())
+        if not count:
+            self.stderr.write('No courses to serialize; run load_courses first.')
+            return
+
+        self.stdout.write(f'{count} courses x {iterations} iterations ({len(fields)} fields)')
+        for name, func in [('drf serializer', drf_serializer),
+                           ('cached serializer', cached_serializer),
+                           ('values()', values_rows)]:
+            func()  # warm caches and connections
+            started = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name:<18} {count * iterations / elapsed:>12,.0f} objects/s '
+                f'{elapsed / iterations * 1000:>8.2f} ms/iteration'
+            )
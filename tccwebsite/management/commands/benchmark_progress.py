@@ -0,0 +1,56 @@
+import random
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tccwebsite import progress
+from tccwebsite.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = 'Compare progress ping throughput: direct row UPDATEs vs cache buffering plus one flush'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pings', type=int, default=2000)
+        parser.add_argument('--enrollments', type=int, default=50, help='Distinct enrollments pinged')
+
+    def handle(self, *args, **options):
+        ids = list(
+            Enrollment.objects.exclude(status__in=progress.FROZEN_STATUSES)
+            .values_list('pk', flat=True)[:options['enrollments']]
+        )
+        if not ids:
+            raise CommandError('No active enrollments to ping')
+        original = dict(Enrollment.objects.filter(pk__in=ids).values_list('pk', 'progress_percentage'))
+        original_status = dict(Enrollment.objects.filter(pk__in=ids).values_list('pk', 'status'))
+        # Climb towards, but never reach, 100% so nothing is completed by the benchmark.
+        pings = [(random.choice(ids), min(99, 1 + i * 98 // options['pings'])) for i in range(options['pings'])]
+
+        try:
+            for mode, buffered in (('direct', False), ('buffered', True)):
+                self._reset(original)
+                with mock.patch.object(progress.settings, 'PROGRESS_BUFFERED', buffered), \
+                        CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for enrollment_id, value in pings:
+                        progress.record(enrollment_id, value)
+                    ingest = time.perf_counter() - started
+                    progress.flush()
+                    total = time.perf_counter() - started
+                self.stdout.write(
+                    f'{mode:>8}: {len(pings) / ingest:>10.0f} pings/s ingest, {total * 1000:8.1f} ms incl. flush, '
+                    f'{len(queries)} queries'
+                )
+        finally:
+            self._reset(original, original_status)
+
+    def _reset(self, original, statuses=None):
+        for enrollment_id, value in original.items():
+            updates = {'progress_percentage': value}
+            if statuses:
+                updates['status'] = statuses[enrollment_id]
+            Enrollment.objects.filter(pk=enrollment_id).update(**updates)
+        progress.cache.delete_many([progress._value_key(enrollment_id) for enrollment_id in original])
@@ -0,0 +1,74 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: import the WSGI app, then time two requests.
+CHILD_SCRIPT = r'''
+import json, resource, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from tccproject.wsgi import application
+loaded = time.perf_counter()
+
+def request(path):
+    environ = {'PATH_INFO': path, 'HTTP_HOST': sys.argv[1]}
+    setup_testing_defaults(environ)
+    begin = time.perf_counter()
+    body = application(environ, lambda status, headers, exc_info=None: None)
+    for _chunk in body:
+        pass
+    if hasattr(body, 'close'):
+        body.close()
+    return (time.perf_counter() - begin) * 1000
+
+first = request(sys.argv[2])
+second = request(sys.argv[2])
+print(json.dumps({
+    'load_ms': (loaded - started) * 1000,
+    'first_request_ms': first,
+    'second_request_ms': second,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Benchmark worker startup: app load time and first-request latency, with and without warm-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per mode')
+        parser.add_argument('--path', default='/courses/', help='Path requested after startup')
+
+    def handle(self, *args, **options):
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        modes = {
+            'cold': {'TCC_WARMUP': 'false'},
+            'warm': {'TCC_WARMUP': 'true', 'TCC_WARMUP_CONNECTIONS': 'true'},
+        }
+
+        self.stdout.write(f"{'mode':<6} {'load ms':>10} {'1st req ms':>12} {'2nd req ms':>12} {'max RSS MB':>12}")
+        for mode, env in modes.items():
+            samples = [self._run_child(env, host, options['path']) for _ in range(options['runs'])]
+            medians = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+            self.stdout.write(
+                f"{mode:<6} {medians['load_ms']:>10.1f} {medians['first_request_ms']:>12.1f} "
+                f"{medians['second_request_ms']:>12.1f} {medians['max_rss_mb']:>12.1f}"
+            )
+
+    def _run_child(self, env, host, path):
+        child_env = {**os.environ, **env}
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, host, path],
+            cwd=settings.BASE_DIR,
+            env=child_env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
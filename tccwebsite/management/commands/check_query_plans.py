@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tccwebsite import query_plans, synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every query of the main views (see tccwebsite/query_plans.py) and fail when a "
+        "view's plan sequentially scans a table that the committed baseline does not allow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help='Only these scenarios (default: all)')
+        parser.add_argument('--update-baseline', action='store_true', help='Accept the current plans as the baseline')
+        parser.add_argument('--baseline', default=query_plans.BASELINE_PATH, help='Baseline JSON file')
+        parser.add_argument('--show-plans', action='store_true', help='Print the plan of every sequential scan')
+
+    def handle(self, *args, **options):
+        scenarios = query_plans.SCENARIOS
+        if options['scenarios']:
+            known = {scenario.name: scenario for scenario in scenarios}
+            unknown = sorted(set(options['scenarios']) - set(known))
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(unknown)}. Known: {', '.join(known)}")
+            scenarios = [known[name] for name in options['scenarios']]
+        if not synthetic.exists():
+            self.stderr.write(self.style.WARNING(
+                'No synthetic data loaded: plans on a small database are not representative '
+                '(run generate_synthetic_data first).'
+            ))
+
+        try:
+            results = query_plans.run(scenarios)
+        except query_plans.PlanError as exc:
+            raise CommandError(str(exc))
+
+        vendor = query_plans.vendor()
+        baseline = query_plans.load_baseline(options['baseline'])
+        if options['update_baseline']:
+            if options['scenarios']:
+                raise CommandError('--update-baseline records every scenario; run it without scenario names.')
+            query_plans.save_baseline(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Recorded the {vendor} baseline in {options['baseline']}"))
+            return
+        if baseline is None:
+            self.stderr.write(self.style.WARNING(
+                f'No {vendor} baseline yet: every sequential scan is reported (accept them with --update-baseline).'
+            ))
+
+        regressions, fixed = query_plans.compare(results, baseline)
+        width = max(len(name) for name in results)
+        self.stdout.write(f"{'scenario':<{width}}  queries  sequential scans")
+        for name, result in results.items():
+            tables = ', '.join(
+                f'{table}{" (NEW)" if table in regressions.get(name, []) else ""}' for table in sorted(result['scans'])
+            )
+            self.stdout.write(f"{name:<{width}}  {result['queries']:>7}  {tables or '-'}")
+            if options['show_plans'] or name in regressions:
+                for table, queries in sorted(result['scans'].items()):
+                    if not options['show_plans'] and table not in regressions[name]:
+                        continue
+                    sql, lines = queries[0]
+                    self.stdout.write(f'    {table}: {sql}')
+                    for line in lines:
+                        self.stdout.write(f'        {line}')
+        for name, tables in fixed.items():
+            self.stdout.write(f"{name}: fewer scans of {', '.join(tables)}; refresh the baseline with --update-baseline")
+
+        if regressions:
+            count = sum(len(tables) for tables in regressions.values())
+            raise CommandError(f'{count} new sequential scan(s) in {len(regressions)} scenario(s)')
+        self.stdout.write(self.style.SUCCESS(f'No plan regressions ({vendor}, {len(results)} scenario(s))'))
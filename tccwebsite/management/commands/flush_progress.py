@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tccwebsite import progress
+
+
+class Command(BaseCommand):
+    help = 'Write buffered lesson progress to the database (once, or every --interval seconds with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing until interrupted')
+        parser.add_argument('--interval', type=float, default=settings.PROGRESS_FLUSH_INTERVAL)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            result = progress.flush(batch_size=options['batch_size'])
+            if result is None:
+                self.stdout.write('Another flush is running; skipped')
+            elif result[0] or not options['loop']:
+                seen, updated, completed = result
+                self.stdout.write(
+                    f'Flushed {seen} enrollment(s): {updated} updated, {completed} completed '
+                    f'in {time.monotonic() - started:.3f}s'
+                )
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
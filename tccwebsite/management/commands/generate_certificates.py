@@ -0,0 +1,41 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tccwebsite import certificates
+
+
+class Command(BaseCommand):
+    help = 'Render certificates for completed enrollments that have none, in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=200, help='Certificates rendered per database write')
+        parser.add_argument('--refresh', action='store_true',
+                            help='Also re-render certificates whose student, course or instructor details changed')
+
+    def handle(self, *args, **options):
+        batch_size, workers = options['batch_size'], options['workers']
+        started = time.monotonic()
+        payloads = iter(list(certificates.pending_payloads(refresh=options['refresh'])))
+        done = 0
+        # Workers are forked while the first batch is submitted; they must not
+        # inherit an open database connection.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=certificates.init_worker, initargs=certificates.worker_args(),
+        ) as pool:
+            while batch := list(itertools.islice(payloads, batch_size)):
+                results = list(pool.map(certificates.generate, batch, chunksize=max(1, len(batch) // (workers * 4))))
+                certificates.save_rows(results)
+                done += len(results)
+                self.stdout.write(f'{done} certificate(s) rendered')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done} certificate(s) in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f}/s) '
+            f'with {workers} worker(s)'
+        ))
@@ -0,0 +1,18 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tccwebsite import seo
+
+
+class Command(BaseCommand):
+    help = 'Rewrite every sitemap shard, the sitemap index and the blog RSS/Atom feeds'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        shards = seo.generate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote sitemap index, {shards} shard(s) and feeds to {settings.GENERATED_ROOT} '
+            f'in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tccwebsite import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-load a large synthetic dataset (see tccwebsite/synthetic.py) for check_query_plans. '
+        'Never run it against production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help='Multiplier for every table (1 = 20,000 students)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='Delete the synthetic rows instead')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['clear']:
+            deleted = synthetic.clear()
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {deleted} synthetic row(s) in {time.monotonic() - started:.2f}s'
+            ))
+            return
+        if synthetic.exists():
+            raise CommandError('Synthetic data is already loaded; run with --clear first.')
+        counts = synthetic.generate(
+            scale=options['scale'], seed=options['seed'], log=lambda line: self.stdout.write(f'  {line}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(counts.values())} synthetic row(s) in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tccwebsite import prerender
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the public pages served to anonymous visitors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='*',
+            help="Pages to build: about, admissions, courses, blog, blog_detail:<slug> or blog_detail:* "
+                 "(default: everything)",
+        )
+
+    def handle(self, *args, **options):
+        targets = set(options['targets'])
+        known = set(prerender.SINGLE_PAGES) | set(prerender.LISTINGS)
+        unknown = {target for target in targets if target not in known and not target.startswith('blog_detail:')}
+        if unknown:
+            raise CommandError(f"Unknown target(s): {', '.join(sorted(unknown))}")
+
+        started = time.monotonic()
+        built = prerender.build(targets) if targets else prerender.build_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Pre-rendered {built} page(s) to {settings.PRERENDER_ROOT} in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tccwebsite import course_cards
+
+
+class Command(BaseCommand):
+    help = 'Recompute every CourseCard from courses, instructors, testimonials and enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report cards that drifted')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created, updated, deleted = course_cards.rebuild(dry_run=options['dry_run'])
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        message = (
+            f'{verb} {created} missing, {updated} stale and {deleted} orphaned course card(s) '
+            f'in {time.monotonic() - started:.2f}s'
+        )
+        self.stdout.write(self.style.SUCCESS(message) if not (created or updated or deleted) else message)
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tccwebsite import trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending course scores (column and Redis sorted set) from recent enrollments and testimonials'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        scored = trending.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt trending scores: {scored} course(s) with recent activity in {time.monotonic() - started:.2f}s'
+        ))
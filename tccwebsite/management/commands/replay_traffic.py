@@ -0,0 +1,158 @@
+import http.client
+import http.cookiejar
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tccwebsite import traffic
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect is the response being measured; following it would add a request.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class _LocalCookiePolicy(http.cookiejar.DefaultCookiePolicy):
+    # Send Secure cookies over plain HTTP: local servers run with production cookie settings.
+    def return_ok_secure(self, cookie, request):
+        return True
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay captured traffic (see tccwebsite/traffic.py) against a running server and report '
+        'throughput, latency percentiles and error rates per URL name'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Captured JSONL files')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at most')
+        parser.add_argument('--speedup', type=float, default=1.0,
+                            help='Replay this many times faster than captured; 0 sends as fast as possible')
+        parser.add_argument('--limit', type=int, help='Replay only the first N requests')
+        parser.add_argument('--login', metavar='USERNAME:PASSWORD',
+                            help='Send requests captured as logged in with this account (otherwise anonymous)')
+        parser.add_argument('--host', help='Host header to send (one of ALLOWED_HOSTS), if not the base URL\'s')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds per request')
+
+    def handle(self, *args, **options):
+        records = traffic.read_records(options['files'])
+        skipped = sum(1 for record in records if record['method'] not in SAFE_METHODS)
+        records = [record for record in records if record['method'] in SAFE_METHODS][:options['limit']]
+        if not records:
+            raise CommandError('No GET/HEAD requests to replay.')
+        base_url = options['base_url'].rstrip('/')
+        headers = {'Accept-Encoding': 'gzip, br'}
+        if options['host']:
+            headers['Host'] = options['host']
+        anonymous = self._opener()
+        member = self._login(base_url, headers, options) if options['login'] else anonymous
+
+        results = defaultdict(list)  # url_name -> [(latency_ms, outcome)]
+        lock = threading.Lock()
+        lag = []
+
+        def send(record, due):
+            url = base_url + record['path']
+            if record['query']:
+                url += '?' + urllib.parse.urlencode([tuple(pair) for pair in record['query']])
+            opener = anonymous if record['auth'] == 'anon' else member
+            request = urllib.request.Request(url, method=record['method'], headers=headers)
+            started = time.perf_counter()
+            try:
+                with opener.open(request, timeout=options['timeout']) as response:
+                    response.read()
+                    outcome = response.status
+            except urllib.error.HTTPError as exc:
+                outcome = exc.code
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as exc:
+                outcome = exc.__class__.__name__
+            latency = (time.perf_counter() - started) * 1000
+            with lock:
+                results[record['url_name'] or record['path']].append((latency, outcome))
+                lag.append(max(0.0, started - due) * 1000)
+
+        speedup = options['speedup']
+        first_ts = records[0]['ts']
+        self.stdout.write(
+            f"Replaying {len(records)} requests ({skipped} non-GET skipped) spanning "
+            f"{records[-1]['ts'] - first_ts:.0f}s at "
+            f"{'full speed' if not speedup else f'{speedup:g}x'} with {options['concurrency']} workers"
+        )
+        futures = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for record in records:
+                due = started + ((record['ts'] - first_ts) / speedup if speedup else 0)
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(send, record, due))
+        elapsed = time.perf_counter() - started
+        for future in futures:
+            future.result()
+        self._report(results, elapsed, lag)
+
+    def _opener(self, cookies=None):
+        # Anonymous requests keep no cookies, like the first visit they were captured as.
+        handlers = [_NoRedirect()]
+        if cookies is not None:
+            handlers.append(urllib.request.HTTPCookieProcessor(cookies))
+        return urllib.request.build_opener(*handlers)
+
+    def _login(self, base_url, headers, options):
+        """An opener holding the session of ``--login``, signed in through the login form."""
+        username, _, password = options['login'].partition(':')
+        cookies = http.cookiejar.CookieJar(_LocalCookiePolicy())
+        opener = self._opener(cookies)
+        login_url = f'{base_url}/login/'
+        try:
+            with opener.open(urllib.request.Request(login_url, headers=headers), timeout=options['timeout']):
+                pass
+            csrf_token = next((cookie.value for cookie in cookies if cookie.name == 'csrftoken'), '')
+            data = urllib.parse.urlencode({
+                'username': username, 'password': password, 'csrfmiddlewaretoken': csrf_token,
+            }).encode()
+            request = urllib.request.Request(login_url, data=data, headers={**headers, 'Referer': login_url})
+            with opener.open(request, timeout=options['timeout']) as response:
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        except (urllib.error.URLError, OSError) as exc:
+            raise CommandError(f'Could not reach {login_url}: {exc}')
+        if status != 302:
+            raise CommandError(f'Logging in as {username} failed (HTTP {status}).')
+        return opener
+
+    def _report(self, results, elapsed, lag):
+        total = sum(len(rows) for rows in results.values())
+        self.stdout.write(
+            f'{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), '
+            f'start lag p50 {traffic.percentile(sorted(lag), 0.5):.0f} ms / '
+            f'max {max(lag):.0f} ms (raise --concurrency if lag grows)'
+        )
+        header = f"{'url name':<28} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        failed = 0
+        for name, rows in sorted(results.items(), key=lambda item: -len(item[1])):
+            latencies = sorted(latency for latency, _outcome in rows)
+            errors = sum(1 for _latency, outcome in rows if not isinstance(outcome, int) or outcome >= 500)
+            failed += errors
+            self.stdout.write(
+                f'{name[:28]:<28} {len(rows):>6} {len(rows) / elapsed:>7.1f} '
+                f'{traffic.percentile(latencies, 0.5):>8.1f} {traffic.percentile(latencies, 0.9):>8.1f} '
+                f'{traffic.percentile(latencies, 0.99):>8.1f} {latencies[-1]:>8.1f} {errors / len(rows):>7.1%}'
+            )
+        summary = f'Error rate {failed / total:.1%} (5xx and connection failures)'
+        self.stdout.write(self.style.SUCCESS(summary) if not failed else self.style.WARNING(summary))
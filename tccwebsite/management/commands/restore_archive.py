@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tccwebsite import retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-insert rows archived by archive_old_rows. Rows that exist again are skipped; '
+        'each file is deleted once fully restored unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('policy', choices=sorted(retention.POLICIES))
+        parser.add_argument('files', nargs='*', help="Archive files (default: all of the policy's files)")
+        parser.add_argument('--batch-size', type=int, help='Rows per transaction (default: RETENTION_BATCH_SIZE)')
+        parser.add_argument('--keep', action='store_true', help='Keep the archive files')
+
+    def handle(self, *args, **options):
+        policy = options['policy']
+        files = [Path(name) for name in options['files']] or retention.archive_files(policy)
+        missing = [str(path) for path in files if not path.is_file()]
+        if missing:
+            raise CommandError(f"No such archive file(s): {', '.join(missing)}")
+        rows = skipped = seconds = 0
+        for path in files:
+            stats = retention.restore_file(policy, path, batch_size=options['batch_size'], keep=options['keep'])
+            rows, skipped, seconds = rows + stats['rows'], skipped + stats['skipped'], seconds + stats['seconds']
+            if stats['conflicts']:
+                self.stderr.write(self.style.WARNING(
+                    f"{path}: {stats['conflicts']} row(s) clash with existing rows; the file was kept"
+                ))
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f"{path.name}: {stats['rows']} restored, {stats['skipped']} already present "
+                    f"({stats['rows_per_second']:,.0f} rows/s)"
+                )
+        rate = rows / seconds if seconds > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{policy}: restored {rows} row(s) from {len(files)} file(s), {skipped} already present, '
+            f'in {seconds:.2f}s ({rate:,.0f} rows/s)'
+        ))
+        if rows:
+            self.stdout.write(
+                'Restored rows are still past retention: mark them unread or reactivate them, '
+                'or the next archive_old_rows run moves them again.'
+            )
@@ -0,0 +1,147 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from tccwebsite import cohorts
+from tccwebsite.models import Cohort, Course, Enrollment, Instructor
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent (and duplicate) enrollment requests at a scratch cohort, then concurrent '
+        'cancellations, and check that seats are never overbooked. Run it against PostgreSQL/MySQL; '
+        'SQLite serializes writers and will mostly report lock timeouts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seats', type=int, default=20)
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--duplicates', type=int, default=2, help='Requests per student (double clicks)')
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--cancel', type=int, default=10, help='Seated students who cancel afterwards')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch data for inspection')
+
+    def handle(self, *args, **options):
+        seats, students = options['seats'], options['students']
+        tag = uuid.uuid4().hex[:8]
+        course, cohort, users = self._setup(tag, seats, students)
+        try:
+            self._run(course, cohort, users, options)
+        finally:
+            if not options['keep']:
+                self._teardown(tag, course)
+
+    # --- scratch data -------------------------------------------------------
+    def _setup(self, tag, seats, students):
+        instructor_user = User.objects.create(username=f'stress-{tag}-instructor', first_name='Stress')
+        instructor = Instructor.objects.create(
+            user=instructor_user, bio='Load test', specialization='Load testing', experience_years=1
+        )
+        course = Course.objects.create(
+            title=f'Stress test {tag}', description='Scratch course for stress_enrollment',
+            difficulty='beginner', duration='1 week', price=0, instructor=instructor,
+        )
+        cohort = Cohort.objects.create(
+            course=course, name=f'Stress {tag}', capacity=seats,
+            start_date=timezone.localdate() + timedelta(days=30),
+        )
+        User.objects.bulk_create(User(username=f'stress-{tag}-{i}') for i in range(students))
+        users = list(User.objects.filter(username__startswith=f'stress-{tag}-').exclude(pk=instructor_user.pk))
+        return course, cohort, users
+
+    def _teardown(self, tag, course):
+        Enrollment.objects.filter(course=course).delete()
+        course.delete()
+        User.objects.filter(username__startswith=f'stress-{tag}-').delete()
+
+    # --- load ---------------------------------------------------------------
+    def _concurrently(self, jobs, threads):
+        """Run ``jobs`` (callables) on ``threads`` threads, all released at once; returns results."""
+        go = threading.Event()
+
+        def run(job):
+            go.wait()
+            try:
+                return job()
+            except DatabaseError as exc:
+                return f'error: {exc.__class__.__name__}'
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(run, job) for job in jobs]
+            go.set()
+            return [future.result() for future in futures]
+
+    def _run(self, course, cohort, users, options):
+        seats, threads = options['seats'], options['threads']
+
+        requests = [user for user in users for _ in range(options['duplicates'])]
+        random.shuffle(requests)
+        started = time.monotonic()
+        outcomes = Counter(self._concurrently(
+            [lambda user=user: cohorts.enroll(user, course, cohort)[1] for user in requests], threads
+        ))
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{len(requests)} enrollment requests in {elapsed:.2f}s '
+            f'({len(requests) / elapsed:.0f}/s): {dict(outcomes)}'
+        )
+        enroll_failed = sum(count for outcome, count in outcomes.items() if outcome.startswith('error'))
+        self._check(course, cohort, expected_seated=None if enroll_failed else min(seats, len(users)),
+                    label='after enrollment')
+
+        seated = list(Enrollment.objects.filter(course=course, status__in=cohorts.SEAT_STATUSES))
+        waitlisted_before = Enrollment.objects.filter(course=course, status='waitlisted').count()
+        leaving = random.sample(seated, min(options['cancel'], len(seated)))
+        results = self._concurrently([lambda e=e: cohorts.cancel(e) or 'cancelled' for e in leaving], threads)
+        promoted = [result for result in results if isinstance(result, Enrollment)]
+        failed = sum(1 for result in results if isinstance(result, str) and result.startswith('error'))
+        cancelled = len(leaving) - failed
+        self.stdout.write(
+            f'{cancelled} cancellations ({failed} failed) promoted {len(promoted)} waitlisted student(s)'
+        )
+        self._check(
+            course, cohort,
+            expected_seated=None if enroll_failed else min(seats, len(seated) + waitlisted_before - cancelled),
+            label='after cancellations',
+        )
+        if len(promoted) != min(cancelled, waitlisted_before):
+            raise CommandError(f'Expected {min(cancelled, waitlisted_before)} promotions, got {len(promoted)}')
+
+        # Promotions must follow the queue: nobody still waiting joined before a promoted student.
+        waiting = Enrollment.objects.filter(course=course, status='waitlisted').order_by('enrollment_date', 'pk').first()
+        if waiting and any(
+            (e.enrollment_date, e.pk) > (waiting.enrollment_date, waiting.pk) for e in promoted
+        ):
+            raise CommandError('Waitlist promotions were not first-come, first-served')
+        if enroll_failed or failed:
+            self.stdout.write(self.style.WARNING('Some requests failed with database errors (see counts above).'))
+        self.stdout.write(self.style.SUCCESS('No overbooking, no duplicate enrollments, FIFO promotions.'))
+
+    def _check(self, course, cohort, expected_seated, label):
+        cohort.refresh_from_db()
+        rows = Enrollment.objects.filter(course=course)
+        seated = rows.filter(status__in=cohorts.SEAT_STATUSES).count()
+        duplicates = rows.count() - rows.values('student').distinct().count()
+        self.stdout.write(
+            f'{label}: {seated} seated / capacity {cohort.capacity} (counter {cohort.seats_taken}), '
+            f'{rows.filter(status="waitlisted").count()} waitlisted, {duplicates} duplicate rows'
+        )
+        if seated > cohort.capacity:
+            raise CommandError(f'Overbooked: {seated} seated for {cohort.capacity} seats')
+        if seated != cohort.seats_taken:
+            raise CommandError(f'Seat counter drifted: counter {cohort.seats_taken}, seated {seated}')
+        if duplicates:
+            raise CommandError(f'{duplicates} duplicate enrollment row(s)')
+        if expected_seated is not None and seated != expected_seated:
+            raise CommandError(f'Expected {expected_seated} seated, found {seated} (requests failed?)')
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Admin ``search_fields`` use ``icontains``, which Postgres compiles to
+# ``UPPER(col::text) LIKE UPPER('%term%')``. Trigram GIN indexes on that exact
+# expression turn those searches from sequential scans into index scans.
+# Other backends have no equivalent index type and are left untouched.
+TRIGRAM_INDEXES = [
+    ('tcc_course_title_trgm', 'tccwebsite_course', 'title'),
+    ('tcc_course_description_trgm', 'tccwebsite_course', 'description'),
+    ('tcc_testimonial_student_name_trgm', 'tccwebsite_testimonial', 'student_name'),
+    ('tcc_testimonial_content_trgm', 'tccwebsite_testimonial', 'content'),
+    ('tcc_auth_user_first_name_trgm', 'auth_user', 'first_name'),
+    ('tcc_auth_user_last_name_trgm', 'auth_user', 'last_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0004_newsletter_studentprofile_enrollment'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
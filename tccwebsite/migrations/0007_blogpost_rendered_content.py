@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:06
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from tccwebsite import blog_content
+
+
+def render_existing_posts(apps, schema_editor):
+    BlogPost = apps.get_model('tccwebsite', 'BlogPost')
+    posts = []
+    for post in BlogPost.objects.only('id', 'content', 'created_at').iterator(chunk_size=200):
+        rendered = blog_content.render(post.content)
+        post.content_html = rendered['html']
+        post.toc = rendered['toc']
+        post.reading_time = rendered['reading_time']
+        post.published_month = timezone.localdate(post.created_at).replace(day=1)
+        posts.append(post)
+        if len(posts) == 200:
+            BlogPost.objects.bulk_update(posts, ['content_html', 'toc', 'reading_time', 'published_month'])
+            posts = []
+    if posts:
+        BlogPost.objects.bulk_update(posts, ['content_html', 'toc', 'reading_time', 'published_month'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0006_enrollmentdailystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='published_month',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0007_blogpost_rendered_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('active', 'Active'), ('waitlisted', 'Waitlisted'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Cohort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('seats_taken', models.PositiveIntegerField(default=0, editable=False)),
+                ('is_open', models.BooleanField(default=True, help_text='Accepting enrollments')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cohorts', to='tccwebsite.course')),
+            ],
+            options={
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='cohort',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='enrollments', to='tccwebsite.cohort'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['cohort', 'status', 'enrollment_date'], name='enrollment_cohort_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cohort',
+            constraint=models.CheckConstraint(condition=models.Q(('seats_taken__lte', models.F('capacity'))), name='cohort_seats_within_capacity'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from tccwebsite import course_cards
+
+
+def build_cards(apps, schema_editor):
+    CourseCard = apps.get_model('tccwebsite', 'CourseCard')
+    rows = course_cards.card_rows(
+        apps.get_model('tccwebsite', 'Course'),
+        apps.get_model('tccwebsite', 'Testimonial'),
+        apps.get_model('tccwebsite', 'Enrollment'),
+    )
+    CourseCard.objects.bulk_create((CourseCard(**row) for row in rows), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0008_cohorts_and_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseCard',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='tccwebsite.course')),
+                ('title', models.CharField(max_length=200)),
+                ('summary', models.CharField(blank=True, max_length=300)),
+                ('difficulty', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], max_length=20)),
+                ('duration', models.CharField(max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('course_image', models.ImageField(blank=True, upload_to='courses/')),
+                ('is_featured', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('instructor_name', models.CharField(blank=True, max_length=301)),
+                ('rating_avg', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('enrollment_count', models.PositiveIntegerField(default=0)),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tccwebsite.instructor')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='coursecard_created_idx')],
+            },
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0009_coursecard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursecard',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='coursecard',
+            index=models.Index(fields=['-trending_score'], name='coursecard_trending_idx'),
+        ),
+    ]
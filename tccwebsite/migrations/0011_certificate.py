@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0010_coursecard_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='certificate', serialize=False, to='tccwebsite.enrollment')),
+                ('number', models.CharField(max_length=30, unique=True)),
+                ('student_name', models.CharField(max_length=301)),
+                ('course_title', models.CharField(max_length=200)),
+                ('instructor_name', models.CharField(max_length=301)),
+                ('completion_date', models.DateField()),
+                ('png', models.FileField(max_length=200, upload_to='')),
+                ('pdf', models.FileField(max_length=200, upload_to='')),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
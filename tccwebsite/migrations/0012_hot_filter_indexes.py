@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0011_certificate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='blogpost_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['-created_at'], name='course_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['difficulty', '-created_at'], name='course_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecard',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['-created_at'], name='coursecard_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecard',
+            index=models.Index(fields=['difficulty', '-created_at'], name='coursecard_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsletter',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subscribed_at'], name='newsletter_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['-created_at'], name='testimonial_featured_idx'),
+        ),
+    ]
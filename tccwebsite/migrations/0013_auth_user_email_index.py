@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# ``clean_email`` in forms.py checks ``email__iexact``. Postgres compiles that
+# to ``UPPER(email::text) = UPPER(%s)``, which only an index on the same
+# expression can serve; SQLite compiles it to ``email LIKE %s ESCAPE '\'``,
+# which uses an index when the column is indexed with the NOCASE collation.
+# auth_user belongs to django.contrib.auth, so the index is created here.
+INDEX_NAME = 'tcc_auth_user_email_ci'
+INDEX_SQL = {
+    'postgresql': f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON auth_user ((UPPER(email::text)))',
+    'sqlite': f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON auth_user (email COLLATE NOCASE)',
+}
+
+
+def create_email_index(apps, schema_editor):
+    sql = INDEX_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor in INDEX_SQL:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0012_hot_filter_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
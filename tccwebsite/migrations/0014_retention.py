@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:44
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_inactive_subscribers(apps, schema_editor):
+    # When existing subscribers were deactivated is unknown: start their
+    # retention period now rather than archiving them on the first run.
+    Newsletter = apps.get_model('tccwebsite', 'Newsletter')
+    Newsletter.objects.filter(is_active=False, deactivated_at__isnull=True).update(deactivated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0013_auth_user_email_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletter',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(stamp_inactive_subscribers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['created_at'], name='contact_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsletter',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deactivated_at'], name='newsletter_inactive_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+# The hot-filter indexes of 0012 and 0014 are partial (``WHERE is_featured``
+# and so on). Backends without partial indexes (MySQL/MariaDB) skip them
+# entirely, so there the flag leads a plain composite index instead.
+FALLBACK_INDEXES = [
+    ('course', ['is_featured', '-created_at'], 'course_featured_full_idx'),
+    ('coursecard', ['is_featured', '-created_at'], 'coursecard_featured_full_idx'),
+    ('testimonial', ['is_featured', '-created_at'], 'testimonial_featured_full_idx'),
+    ('blogpost', ['is_published', '-created_at'], 'blogpost_published_full_idx'),
+    ('newsletter', ['is_active', 'subscribed_at'], 'newsletter_active_full_idx'),
+    ('newsletter', ['is_active', 'deactivated_at'], 'newsletter_inactive_full_idx'),
+    ('contact', ['is_read', 'created_at'], 'contact_read_full_idx'),
+]
+
+# ``email__iexact`` on MySQL compiles to ``email LIKE %s``; the default
+# collations are case-insensitive, so a plain index on the column serves it
+# (see 0013 for the other backends).
+EMAIL_INDEX_NAME = 'tcc_auth_user_email_ci'
+
+
+def _fallbacks(apps):
+    for model_name, fields, name in FALLBACK_INDEXES:
+        yield apps.get_model('tccwebsite', model_name), models.Index(fields=fields, name=name)
+
+
+def create_fallback_indexes(apps, schema_editor):
+    if not schema_editor.connection.features.supports_partial_indexes:
+        for model, index in _fallbacks(apps):
+            schema_editor.add_index(model, index)
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(f'CREATE INDEX {EMAIL_INDEX_NAME} ON auth_user (email)')
+
+
+def drop_fallback_indexes(apps, schema_editor):
+    if not schema_editor.connection.features.supports_partial_indexes:
+        for model, index in _fallbacks(apps):
+            schema_editor.remove_index(model, index)
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(f'DROP INDEX {EMAIL_INDEX_NAME} ON auth_user')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tccwebsite', '0015_enrollment_cohort_set_null'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fallback_indexes, drop_fallback_indexes),
+    ]
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -32,6 +33,15 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Partial: only the handful of featured rows are indexed.
+            models.Index(fields=['-created_at'], condition=models.Q(is_featured=True), name='course_featured_idx'),
+            models.Index(fields=['difficulty', '-created_at'], name='course_difficulty_idx'),
+            # The catalog API pages through courses newest first.
+            models.Index(fields=['-created_at'], name='course_created_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
@@ -47,6 +57,11 @@ class Testimonial(models.Model):
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(is_featured=True), name='testimonial_featured_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.student_name} - {self.rating} stars"
 
@@ -60,9 +75,17 @@ class BlogPost(models.Model):
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Derived from content on save (see blog_content.py)
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, help_text="Minutes")
+    published_month = models.DateField(null=True, blank=True, editable=False, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(is_published=True), name='blogpost_published_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -78,6 +101,12 @@ class Contact(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            # Retention: read messages, oldest first (see retention.py).
+            models.Index(fields=['created_at'], condition=models.Q(is_read=True), name='contact_read_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} - {self.subject}"
 
@@ -96,16 +125,47 @@ class StudentProfile(models.Model):
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name}"
 
+class Cohort(models.Model):
+    """A seat-limited intake of a course. ``seats_taken`` is maintained by cohorts.py."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='cohorts')
+    name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    capacity = models.PositiveIntegerField()
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+    is_open = models.BooleanField(default=True, help_text="Accepting enrollments")
+    
+    class Meta:
+        ordering = ['start_date']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(seats_taken__lte=models.F('capacity')),
+                name='cohort_seats_within_capacity',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.course} - {self.name}"
+    
+    def clean(self):
+        if self.capacity is not None and self.capacity < self.seats_taken:
+            raise ValidationError({'capacity': f"{self.seats_taken} seats are already taken."})
+    
+    @property
+    def seats_left(self):
+        return max(0, self.capacity - self.seats_taken)
+
 class Enrollment(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('active', 'Active'),
+        ('waitlisted', 'Waitlisted'),
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     ]
     
     student = models.ForeignKey(User, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    cohort = models.ForeignKey(Cohort, on_delete=models.SET_NULL, blank=True, null=True, related_name='enrollments')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     enrollment_date = models.DateTimeField(auto_now_add=True)
     completion_date = models.DateTimeField(blank=True, null=True)
@@ -113,6 +173,10 @@ class Enrollment(models.Model):
     
     class Meta:
         unique_together = ['student', 'course']
+        indexes = [
+            # Waitlist promotion: oldest waitlisted enrollment of a cohort.
+            models.Index(fields=['cohort', 'status', 'enrollment_date'], name='enrollment_cohort_queue_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.first_name} - {self.course.title}"
@@ -121,6 +185,80 @@ class Newsletter(models.Model):
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=True)
     subscribed_at = models.DateTimeField(auto_now_add=True)
+    # Set by signals.py when is_active is switched off; retention.py archives from it.
+    deactivated_at = models.DateTimeField(blank=True, null=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['subscribed_at'], condition=models.Q(is_active=True), name='newsletter_active_idx'),
+            models.Index(fields=['deactivated_at'], condition=models.Q(is_active=False), name='newsletter_inactive_idx'),
+        ]
     
     def __str__(self):
         return self.email
+
+class EnrollmentDailyStat(models.Model):
+    """Per-course, per-day enrollment facts, maintained incrementally by analytics.py."""
+    date = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    enrollments = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # naira
+    
+    class Meta:
+        unique_together = ['date', 'course']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.course_id} @ {self.date}"
+
+class CourseCard(models.Model):
+    """What a course listing card shows, denormalized and kept in sync by course_cards.py."""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    title = models.CharField(max_length=200)
+    summary = models.CharField(max_length=300, blank=True)
+    difficulty = models.CharField(max_length=20, choices=Course.DIFFICULTY_CHOICES)
+    duration = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    course_image = models.ImageField(upload_to='courses/', blank=True)
+    is_featured = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    instructor = models.ForeignKey(Instructor, on_delete=models.CASCADE, related_name='+')
+    instructor_name = models.CharField(max_length=301, blank=True)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True)
+    review_count = models.PositiveIntegerField(default=0)
+    enrollment_count = models.PositiveIntegerField(default=0)
+    # Undecayed, epoch-scaled activity score; see trending.py.
+    trending_score = models.FloatField(default=0)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='coursecard_created_idx'),
+            models.Index(fields=['-trending_score'], name='coursecard_trending_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_featured=True), name='coursecard_featured_idx'),
+            models.Index(fields=['difficulty', '-created_at'], name='coursecard_difficulty_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+    
+    def get_absolute_url(self):
+        return reverse('course_detail', kwargs={'pk': self.pk})
+
+
+class Certificate(models.Model):
+    """Completion certificate of an enrollment; rendered by certificates.py into content-addressed files."""
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, primary_key=True, related_name='certificate')
+    number = models.CharField(max_length=30, unique=True)
+    student_name = models.CharField(max_length=301)
+    course_title = models.CharField(max_length=200)
+    instructor_name = models.CharField(max_length=301)
+    completion_date = models.DateField()
+    png = models.FileField(max_length=200)
+    pdf = models.FileField(max_length=200)
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.number} - {self.student_name}"
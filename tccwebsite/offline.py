@@ -0,0 +1,96 @@
+"""
+Offline catalog: a compact, versioned JSON bundle of the course catalog for
+the service worker (``templet/sw.js``).
+
+The bundle is ``{"version", "fields", "courses": [[...], ...]}``: one row per
+course in ``FIELDS`` order, prices already formatted like the ``naira``
+filter. ``version`` is a hash of the rows, so it only changes when something
+the bundle shows changes. Each published version's ``{id: row hash}``
+snapshot is kept in the cache for ``OFFLINE_SNAPSHOT_TIMEOUT``, which lets a
+client that sends the version it has (``?since=``) receive only the changed
+and removed rows; anyone further behind gets the full bundle.
+
+Everything is cached under the ``catalog`` version (bumped by ``signals.py``
+on course and instructor changes), so serving the version or a delta costs a
+cache read.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.templatetags.static import static
+
+from .models import CourseCard
+from .templatetags.currency_filters import naira
+from .versioning import get_version
+
+FIELDS = ['id', 'title', 'summary', 'difficulty', 'difficulty_label', 'duration', 'price', 'instructor']
+
+# Third-party assets of base.html, precached alongside our own static files.
+CDN_ASSETS = [
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+]
+STATIC_ASSETS = ['css/style.css', 'img/tcc-logo.png', 'js/hydrate.js', 'js/offline.js', 'js/register-sw.js']
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def _rows():
+    labels = dict(CourseCard._meta.get_field('difficulty').choices)
+    cards = CourseCard.objects.order_by('pk').values_list(
+        'pk', 'title', 'summary', 'difficulty', 'duration', 'price', 'instructor_name',
+    )
+    return [
+        [pk, title, summary, difficulty, labels.get(difficulty, difficulty), duration, naira(price), instructor]
+        for pk, title, summary, difficulty, duration, price, instructor in cards
+    ]
+
+
+def current_bundle():
+    """The full bundle for the current catalog version."""
+    key = f"offline:bundle:{get_version('catalog')}"
+    bundle = cache.get(key)
+    if bundle is None:
+        rows = _rows()
+        bundle = {'version': _digest(rows), 'fields': FIELDS, 'courses': rows}
+        cache.set(
+            f"offline:snapshot:{bundle['version']}",
+            {row[0]: _digest(row) for row in rows},
+            settings.OFFLINE_SNAPSHOT_TIMEOUT,
+        )
+        cache.set(key, bundle, settings.OFFLINE_SNAPSHOT_TIMEOUT)
+    return bundle
+
+
+def current_version():
+    return current_bundle()['version']
+
+
+def delta(since):
+    """
+    What a client holding version ``since`` needs: ``{'version', 'full': True,
+    'courses'}`` when it must replace its copy, ``{'version', 'full': False,
+    'courses' (changed rows), 'removed' (ids)}`` otherwise.
+    """
+    bundle = current_bundle()
+    snapshot = cache.get(f'offline:snapshot:{since}') if since else None
+    if snapshot is None:
+        return {**bundle, 'full': True, 'removed': []}
+    current_ids = {row[0] for row in bundle['courses']}
+    return {
+        'version': bundle['version'],
+        'fields': FIELDS,
+        'full': False,
+        'courses': [row for row in bundle['courses'] if snapshot.get(row[0]) != _digest(row)],
+        'removed': sorted(set(snapshot) - current_ids),
+    }
+
+
+def precache_urls():
+    """Same-origin and CDN URLs the service worker stores on install."""
+    return [static(path) for path in STATIC_ASSETS] + CDN_ASSETS
@@ -0,0 +1,323 @@
+"""
+Pre-rendered public pages.
+
+About, admissions, the unfiltered course listing, the blog listing and blog
+posts only change when staff edit content, so they are rendered to HTML files
+under ``PRERENDER_ROOT`` and ``PrerenderedPageMiddleware`` answers anonymous
+GETs from those files. Anything else (a logged-in visitor, pending flash
+messages, filters in the query string, a file that is not built yet) falls
+through to the normal view.
+
+Builds are incremental: signals map each change to the pages it can affect
+(``targets_for``) and queue them for a background thread, which renders them
+after the transaction commits, coalescing bursts of edits. Enrollments only
+move the counts on the course listing, so they go through ``schedule_with_purge``:
+the listing's surrogate keys are purged by the worker once the page is rebuilt,
+so a shared cache refetching straight away never gets the old file, and a burst
+of enrollments costs one rebuild and one purge. ``prerender_pages``
+rebuilds everything. Files live on the local disk, so each instance keeps its
+own copy; a missing listing page is queued for building on first request.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import close_old_connections, transaction
+from django.http import Http404, HttpRequest, HttpResponse, QueryDict
+from django.urls import Resolver404, resolve, reverse
+from django.utils.cache import patch_vary_headers
+
+from . import http_cache
+from .models import BlogPost, Course, Enrollment, Instructor, Testimonial
+from .views import BLOG_POSTS_PER_PAGE, COURSES_PER_PAGE
+
+logger = logging.getLogger(__name__)
+
+SINGLE_PAGES = ['about', 'admissions']
+LISTINGS = ['courses', 'blog']
+ALL_DETAILS = 'blog_detail:*'
+PAGE_QUERY = re.compile(r'^page=([1-9]\d{0,3})$')
+
+
+def file_path(path, page=1):
+    name = 'index.html' if page == 1 else f'page-{page}.html'
+    return os.path.join(settings.PRERENDER_ROOT, path.strip('/'), name)
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp, 'wb') as handle:
+        handle.write(content)
+    os.replace(temp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ------------------------------------------------------------------------------
+# Rendering
+# ------------------------------------------------------------------------------
+def render_page(path, page=1):
+    """Render ``path`` as an anonymous visitor would see it; returns bytes or None."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.META = {
+        'HTTP_HOST': urlparse(settings.SITE_URL).netloc,
+        'SERVER_PORT': '443',
+        'QUERY_STRING': f'page={page}' if page > 1 else '',
+    }
+    request.GET = QueryDict(request.META['QUERY_STRING'])
+    request.user = AnonymousUser()
+
+    match = resolve(path)
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        # An unpublished or deleted post: build_page drops its file.
+        return None
+    if response.status_code != 200:
+        return None
+    if 'CSRF_COOKIE' in request.META:
+        # The page embeds a CSRF token, which must not be shared between visitors.
+        logger.warning('Not pre-rendering %s: it uses a CSRF token', path)
+        return None
+    return response.content
+
+
+def build_page(path, page=1):
+    content = render_page(path, page)
+    target = file_path(path, page)
+    if content is None:
+        _remove(target)
+    else:
+        _write(target, content)
+    return content is not None
+
+
+def _page_count(name):
+    if name == 'courses':
+        count, per_page = Course.objects.count(), COURSES_PER_PAGE
+    else:
+        count, per_page = BlogPost.objects.filter(is_published=True).count(), BLOG_POSTS_PER_PAGE
+    return max(1, math.ceil(count / per_page))
+
+
+def build_listing(name):
+    path = reverse(name)
+    pages = _page_count(name)
+    built = sum(build_page(path, page) for page in range(1, pages + 1))
+    # Drop pages past the end after the listing shrank.
+    directory = os.path.dirname(file_path(path))
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            match = re.match(r'^page-(\d+)\.html$', filename)
+            if match and int(match.group(1)) > pages:
+                _remove(os.path.join(directory, filename))
+    return built
+
+
+def build_blog_details(slugs=None):
+    """Render the given posts (all published ones by default) and prune unpublished ones."""
+    published = set(BlogPost.objects.filter(is_published=True).values_list('slug', flat=True))
+    built = 0
+    for slug in (published if slugs is None else slugs):
+        built += build_page(reverse('blog_detail', args=[slug]))
+    directory = os.path.join(settings.PRERENDER_ROOT, reverse('blog').strip('/'))
+    if os.path.isdir(directory):
+        for slug in os.listdir(directory):
+            if slug not in published and os.path.isdir(os.path.join(directory, slug)):
+                _remove(os.path.join(directory, slug, 'index.html'))
+    return built
+
+
+def build(targets):
+    """Build a set of targets: page names, ``blog_detail:<slug>`` or ``blog_detail:*``."""
+    built = 0
+    slugs = set()
+    for target in sorted(targets):
+        if target in SINGLE_PAGES:
+            built += build_page(reverse(target))
+        elif target in LISTINGS:
+            built += build_listing(target)
+        elif target.startswith('blog_detail:') and target != ALL_DETAILS:
+            slugs.add(target.split(':', 1)[1])
+    if ALL_DETAILS in targets:
+        built += build_blog_details()
+    elif slugs:
+        built += build_blog_details(slugs)
+    return built
+
+
+def build_all():
+    return build(set(SINGLE_PAGES) | set(LISTINGS) | {ALL_DETAILS})
+
+
+# ------------------------------------------------------------------------------
+# Change tracking
+# ------------------------------------------------------------------------------
+def _post_is_recent(post):
+    # Every post page lists the latest posts, so a change among the newest
+    # four (the page's own post is excluded from its list) touches them all.
+    newest = list(
+        BlogPost.objects.filter(is_published=True).order_by('-created_at').values_list('created_at', flat=True)[:4]
+    )
+    return len(newest) < 4 or (post.created_at is not None and post.created_at >= newest[-1])
+
+
+def targets_for(instance):
+    """Return the pre-rendered pages a change to ``instance`` can affect."""
+    if isinstance(instance, Course):
+        return {'courses'}
+    if isinstance(instance, Instructor):
+        return {'about', 'courses'}
+    if isinstance(instance, Testimonial):
+        # Course cards show the rating.
+        return {'courses'} if instance.course_id else set()
+    if isinstance(instance, Enrollment):
+        # Course cards show the enrollment count.
+        return {'courses'}
+    if isinstance(instance, BlogPost):
+        targets = {'blog', f'blog_detail:{instance.slug}'}
+        if _post_is_recent(instance):
+            targets.add(ALL_DETAILS)
+        return targets
+    if isinstance(instance, User):
+        # Instructor and author names are shown on these pages.
+        targets = set()
+        if Instructor.objects.filter(user=instance).exists():
+            targets |= {'about', 'courses'}
+        if BlogPost.objects.filter(author=instance, is_published=True).exists():
+            targets |= {'blog', ALL_DETAILS}
+        return targets
+    return set()
+
+
+# ------------------------------------------------------------------------------
+# Background rebuilds
+# ------------------------------------------------------------------------------
+_pending = set()
+_pending_purges = set()
+_condition = threading.Condition()
+_worker = None
+
+
+def _run():
+    while True:
+        with _condition:
+            while not _pending:
+                _condition.wait()
+        time.sleep(settings.PRERENDER_DEBOUNCE)
+        with _condition:
+            targets, purges = set(_pending), set(_pending_purges)
+            _pending.clear()
+            _pending_purges.clear()
+        started = time.monotonic()
+        try:
+            built = build(targets)
+            logger.info('Pre-rendered %d page(s) for %s in %.2fs', built, sorted(targets), time.monotonic() - started)
+        except Exception:
+            logger.exception('Pre-rendering %s failed', sorted(targets))
+        finally:
+            close_old_connections()
+        if purges:
+            http_cache.get_purger().purge(purges)
+
+
+def enqueue(targets, purge_keys=()):
+    global _worker
+    if not targets:
+        return
+    with _condition:
+        _pending.update(targets)
+        _pending_purges.update(purge_keys)
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='prerender', daemon=True)
+            _worker.start()
+        _condition.notify()
+
+
+def schedule(instance):
+    """Queue the pages affected by ``instance`` for rebuilding once the transaction commits."""
+    if not settings.PRERENDER_ENABLED:
+        return
+    targets = targets_for(instance)
+    if targets:
+        transaction.on_commit(lambda: enqueue(targets))
+
+
+def schedule_with_purge(instance):
+    """Like ``schedule`` plus ``http_cache.schedule_purge``, with the purge made after the rebuild."""
+    if not settings.PRERENDER_ENABLED:
+        http_cache.schedule_purge(instance)
+        return
+    targets, keys = targets_for(instance), http_cache.purge_keys_for(instance)
+    if targets:
+        transaction.on_commit(lambda: enqueue(targets, keys))
+    elif keys:
+        http_cache.schedule_purge(instance)
+
+
+# ------------------------------------------------------------------------------
+# Serving
+# ------------------------------------------------------------------------------
+class PrerenderedPageMiddleware:
+    """Serve pre-rendered pages to anonymous GETs; everything else goes to the view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.serve(request) if settings.PRERENDER_ENABLED else None
+        return response if response is not None else self.get_response(request)
+
+    def serve(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        page = 1
+        query = request.META.get('QUERY_STRING', '')
+        if query:
+            match = PAGE_QUERY.match(query)
+            if not match:
+                return None
+            page = int(match.group(1))
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        url_name = match.url_name
+        if url_name not in SINGLE_PAGES + LISTINGS + ['blog_detail']:
+            return None
+        if page > 1 and url_name not in LISTINGS:
+            return None
+        if request.user.is_authenticated or len(messages.get_messages(request)):
+            return None
+
+        try:
+            with open(file_path(request.path_info, page), 'rb') as handle:
+                content = handle.read()
+        except FileNotFoundError:
+            if page == 1 and url_name != 'blog_detail':
+                enqueue({url_name, ALL_DETAILS} if url_name == 'blog' else {url_name})
+            return None
+
+        response = HttpResponse(content)
+        response['X-Prerendered'] = '1'
+        # Same caching policy as the view; the page shows the post besides the collection keys.
+        response.cache_policy = getattr(match.func, 'cache_policy', None)
+        if url_name == 'blog_detail':
+            http_cache.tag(request, 'posts', f"post-{match.kwargs['slug']}")
+        patch_vary_headers(response, ['Cookie'])
+        return response
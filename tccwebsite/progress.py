@@ -0,0 +1,196 @@
+"""
+Buffered lesson-progress ingestion.
+
+Lesson players report progress every few seconds. With buffering on
+(``PROGRESS_BUFFERED``, needs a shared cache such as Redis) a ping only
+touches the cache:
+
+* ``progress:value:<id>`` keeps the highest value reported for an enrollment.
+  The cache has no atomic maximum, so two racing pings can leave the lower
+  value; the player's next ping raises it again. Reaching 100% also sets
+  ``progress:done:<id>``, which nothing lowers, so a completion is never lost;
+* the first ping since the last flush claims ``progress:dirty:<id>`` with
+  ``cache.add`` and appends the enrollment id to a slot numbered by
+  ``cache.incr('progress:seq')``, so the flusher can find it without scanning.
+
+``flush_progress`` (run in a loop by a worker process) reads the slots written
+since the previous flush, applies the values with one ``bulk_update`` per
+batch and marks enrollments that reached 100% as completed. A slot is numbered
+before its id is written, so a flush stops at an empty slot and carries on
+from it next time; only a slot still empty after ``SLOT_GRACE_SECONDS`` (its
+writer died, or it was evicted) is skipped. ``bulk_update``
+bypasses model signals, so the flush records the analytics and invalidates
+dashboards itself. Without buffering every ping is applied immediately.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics
+from .dashboard import invalidate_student_dashboards
+from .models import Enrollment
+
+BUFFER_TIMEOUT = 60 * 60 * 24
+OWNER_TIMEOUT = 60 * 60 * 24
+SEQ_KEY = 'progress:seq'
+FLUSHED_KEY = 'progress:flushed'
+FLUSH_LOCK_KEY = 'progress:flush-lock'
+SLOT_GRACE_SECONDS = 60
+# Statuses that no longer (or not yet) track progress.
+FROZEN_STATUSES = ('cancelled', 'waitlisted')
+
+
+def _value_key(enrollment_id):
+    return f"progress:value:{enrollment_id}"
+
+
+def _dirty_key(enrollment_id):
+    return f"progress:dirty:{enrollment_id}"
+
+
+def _done_key(enrollment_id):
+    return f"progress:done:{enrollment_id}"
+
+
+def _slot_key(slot):
+    return f"progress:slot:{slot}"
+
+
+def _gap_key(slot):
+    return f"progress:gap:{slot}"
+
+
+def owner_id(enrollment_id):
+    """Student id of an enrollment (cached; ownership never changes), or None."""
+    key = f"progress:owner:{enrollment_id}"
+    student_id = cache.get(key)
+    if student_id is None:
+        student_id = Enrollment.objects.filter(pk=enrollment_id).values_list('student_id', flat=True).first()
+        if student_id is not None:
+            cache.set(key, student_id, OWNER_TIMEOUT)
+    return student_id
+
+
+def _next_slot():
+    try:
+        return cache.incr(SEQ_KEY)
+    except ValueError:
+        cache.add(SEQ_KEY, 0, None)
+        return cache.incr(SEQ_KEY)
+
+
+def record(enrollment_id, value):
+    """Record a progress ping; returns True if it was buffered, False if written directly."""
+    if not settings.PROGRESS_BUFFERED:
+        apply_progress({enrollment_id: value})
+        return False
+
+    key = _value_key(enrollment_id)
+    current = cache.get(key)
+    if current is None or value > current:
+        cache.set(key, value, BUFFER_TIMEOUT)
+    if value >= 100:
+        cache.set(_done_key(enrollment_id), 1, BUFFER_TIMEOUT)
+    # The value must be stored before the marker, or a flush could miss it.
+    if cache.add(_dirty_key(enrollment_id), 1, BUFFER_TIMEOUT):
+        cache.set(_slot_key(_next_slot()), enrollment_id, BUFFER_TIMEOUT)
+    return True
+
+
+def apply_progress(values):
+    """
+    Write ``{enrollment_id: progress}`` to the database in one bulk UPDATE.
+
+    Progress never goes backwards; reaching 100% completes the enrollment.
+    Returns ``(updated, completed)`` counts.
+    """
+    now = timezone.now()
+    changed, completed = [], []
+    with transaction.atomic():
+        rows = (
+            Enrollment.objects.select_for_update()
+            .filter(pk__in=list(values))
+            .exclude(status__in=FROZEN_STATUSES)
+            .only('id', 'student_id', 'course_id', 'status', 'progress_percentage', 'completion_date')
+        )
+        for enrollment in rows:
+            progress = min(100, max(enrollment.progress_percentage, values[enrollment.pk]))
+            finishing = progress >= 100 and enrollment.status != 'completed'
+            if progress == enrollment.progress_percentage and not finishing:
+                continue
+            enrollment.progress_percentage = progress
+            if finishing:
+                completed.append((enrollment, enrollment.status))
+                enrollment.status = 'completed'
+                enrollment.completion_date = now
+            changed.append(enrollment)
+        if changed:
+            Enrollment.objects.bulk_update(changed, ['progress_percentage', 'status', 'completion_date'])
+        for enrollment, old_status in completed:
+            analytics.record_status_change(enrollment.course_id, old_status, 'completed', when=now)
+    if changed:
+        invalidate_student_dashboards(enrollment.student_id for enrollment in changed)
+    return len(changed), len(completed)
+
+
+def _slot_abandoned(slot):
+    """Whether an empty slot has stayed empty for longer than ``SLOT_GRACE_SECONDS``."""
+    cache.add(_gap_key(slot), time.time(), BUFFER_TIMEOUT)
+    first_seen = cache.get(_gap_key(slot))
+    return first_seen is None or time.time() - first_seen > SLOT_GRACE_SECONDS
+
+
+def flush(batch_size=500):
+    """
+    Move buffered progress into the database.
+
+    Returns ``(enrollments_seen, updated, completed)``; ``None`` if another
+    flush holds the lock.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, 300):
+        return None
+    seen = updated = completed = 0
+    try:
+        last = cache.get(SEQ_KEY) or 0
+        flushed = cache.get(FLUSHED_KEY) or 0
+        if flushed > last:
+            # The sequence counter was evicted and restarted.
+            flushed = 0
+        for start in range(flushed + 1, last + 1, batch_size):
+            numbers = range(start, min(start + batch_size, last + 1))
+            found = cache.get_many([_slot_key(slot) for slot in numbers])
+            done = []
+            for slot in numbers:
+                # Numbered but not written yet: stop here and pick it up next time.
+                if _slot_key(slot) not in found and not _slot_abandoned(slot):
+                    break
+                done.append(slot)
+            ids = {found[_slot_key(slot)] for slot in done if _slot_key(slot) in found}
+            # Clear the markers before reading values: a ping that lands in
+            # between re-marks its enrollment and is picked up next time.
+            cache.delete_many([_dirty_key(enrollment_id) for enrollment_id in ids])
+            buffered = cache.get_many(
+                [_value_key(enrollment_id) for enrollment_id in ids] + [_done_key(enrollment_id) for enrollment_id in ids]
+            )
+            values = {
+                enrollment_id: 100 if _done_key(enrollment_id) in buffered else buffered[_value_key(enrollment_id)]
+                for enrollment_id in ids
+                if _value_key(enrollment_id) in buffered or _done_key(enrollment_id) in buffered
+            }
+            cache.delete_many([_done_key(enrollment_id) for enrollment_id in ids])
+            if values:
+                batch_updated, batch_completed = apply_progress(values)
+                updated += batch_updated
+                completed += batch_completed
+            seen += len(values)
+            cache.delete_many([_slot_key(slot) for slot in done] + [_gap_key(slot) for slot in done])
+            if done:
+                cache.set(FLUSHED_KEY, done[-1], None)
+            if len(done) < len(numbers):
+                break
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return seen, updated, completed
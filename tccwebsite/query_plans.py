@@ -0,0 +1,243 @@
+"""
+Query-plan regression harness (``manage.py check_query_plans``).
+
+Each scenario requests one page (or API endpoint, or form post) through the
+test client with cold caches and captures every ``SELECT`` it runs. Each
+query is then ``EXPLAIN``ed on the connection that ran it, and the tables
+the plan reads with a full sequential scan are collected:
+
+* PostgreSQL: ``Seq Scan`` nodes of ``EXPLAIN (FORMAT JSON)``;
+* SQLite: ``SCAN <table>`` lines of ``EXPLAIN QUERY PLAN`` without an index;
+* MySQL: ``type = ALL`` rows of ``EXPLAIN``.
+
+The result is compared with the committed baseline (``BASELINE_PATH``, one
+section per database vendor), which records how many of each scenario's
+queries sequentially scan each table: any table scanned by more queries than
+the baseline allows is a regression. Some scans are legitimate (facet counts
+aggregate every course card; a few lookup tables stay small) and are accepted
+by recording them with ``--update-baseline``.
+
+Planners choose sequential scans for small tables whatever indexes exist, so
+run it against the ``generate_synthetic_data`` dataset (``synthetic.py``).
+"""
+import json
+import re
+from collections import namedtuple
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .models import BlogPost, CourseCard, Enrollment
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'query_plan_baseline.json'
+
+# ``path`` and ``data`` take the fixtures from ``fixtures()``.
+Scenario = namedtuple('Scenario', 'name path method data login', defaults=('get', None, False))
+
+SCENARIOS = [
+    Scenario('home', lambda f: reverse('home')),
+    Scenario('courses', lambda f: reverse('courses')),
+    Scenario('courses:difficulty', lambda f: reverse('courses') + '?difficulty=intermediate'),
+    Scenario('courses:trending', lambda f: reverse('courses') + '?sort=trending'),
+    Scenario('course_suggest', lambda f: reverse('course_suggest') + '?q=dat'),
+    Scenario('course_detail', lambda f: reverse('course_detail', args=[f['course']])),
+    Scenario('blog', lambda f: reverse('blog')),
+    Scenario('blog_archive', lambda f: reverse('blog_archive', args=[f['month'].year, f['month'].month])),
+    Scenario('blog_detail', lambda f: reverse('blog_detail', args=[f['post']])),
+    Scenario('profile', lambda f: reverse('profile'), login=True),
+    Scenario(
+        'register:taken_email', lambda f: reverse('register'), method='post',
+        data=lambda f: {'email': f['email'].upper()},
+    ),
+    Scenario('offline_catalog', lambda f: reverse('offline_catalog')),
+    Scenario('api:courses', lambda f: reverse('api-course-list')),
+    Scenario('api:posts', lambda f: reverse('api-post-list')),
+]
+
+# Queries the harness itself cannot explain (or that are not worth it).
+SKIPPED_SQL = re.compile(r'^\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT|SET\b)', re.IGNORECASE)
+# ``"table" U0`` / ``"table" AS "T3"``: Django's aliases, which SQLite and MySQL report instead of the table.
+ALIAS_RE = re.compile(r'[`"](\w+)[`"]\s+(?:AS\s+)?[`"]?([A-Z]\d+)[`"]?\b')
+
+
+class PlanError(Exception):
+    pass
+
+
+def fixtures():
+    """Concrete rows for the scenarios' URLs (the most recent ones, like real traffic)."""
+    post = BlogPost.objects.filter(is_published=True, published_month__isnull=False).only('slug', 'published_month').first()
+    course = CourseCard.objects.only('pk').first()
+    enrollment = Enrollment.objects.only('student_id').order_by('-enrollment_date').first()
+    if post is None or course is None or enrollment is None:
+        raise PlanError('The database needs courses, published posts and enrollments; run generate_synthetic_data.')
+    student = User.objects.get(pk=enrollment.student_id)
+    return {'course': course.pk, 'post': post.slug, 'month': post.published_month, 'user': student, 'email': student.email}
+
+
+# ------------------------------------------------------------------------------
+# Capturing
+# ------------------------------------------------------------------------------
+def _consume(response):
+    if response.streaming:
+        b''.join(response.streaming_content)
+
+
+def capture(scenario, fixtures):
+    """Return ``[(alias, sql), ...]`` for the SELECTs the scenario runs with cold caches."""
+    client = Client()
+    if scenario.login:
+        client.force_login(fixtures['user'])
+    cache.clear()
+    path = scenario.path(fixtures)
+    data = scenario.data(fixtures) if scenario.data else None
+    with ExitStack() as stack:
+        contexts = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections}
+        response = getattr(client, scenario.method)(path, data, secure=True)
+        _consume(response)
+    if response.status_code >= 400:
+        raise PlanError(f'{scenario.name}: {scenario.method.upper()} {path} returned {response.status_code}')
+    return [
+        (alias, query['sql'])
+        for alias, context in contexts.items()
+        for query in context.captured_queries
+        if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH')) and not SKIPPED_SQL.match(query['sql'])
+    ]
+
+
+# ------------------------------------------------------------------------------
+# Explaining
+# ------------------------------------------------------------------------------
+def _postgresql_plan(cursor, sql):
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, scanned = [], set()
+
+    def walk(node, depth):
+        relation = node.get('Relation Name')
+        detail = node['Node Type'] + (f' on {relation}' if relation else '')
+        if node.get('Index Name'):
+            detail += f" using {node['Index Name']}"
+        lines.append('  ' * depth + detail)
+        if node['Node Type'] == 'Seq Scan':
+            scanned.add(relation)
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan[0]['Plan'], 0)
+    return lines, scanned
+
+
+def _sqlite_plan(cursor, sql):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+    lines, scanned = [], set()
+    for _id, _parent, _unused, detail in cursor.fetchall():
+        lines.append(detail)
+        match = re.match(r'SCAN (\S+)$', detail)
+        if match:
+            scanned.add(match.group(1))
+    return lines, scanned
+
+
+def _mysql_plan(cursor, sql):
+    cursor.execute(f'EXPLAIN {sql}')
+    columns = [column[0] for column in cursor.description]
+    lines, scanned = [], set()
+    for row in cursor.fetchall():
+        row = dict(zip(columns, row))
+        lines.append(f"{row['table']}: type={row['type']} key={row['key']}")
+        if row['type'] == 'ALL':
+            scanned.add(row['table'])
+    return lines, scanned
+
+
+PLANNERS = {'postgresql': _postgresql_plan, 'sqlite': _sqlite_plan, 'mysql': _mysql_plan}
+
+
+def explain(alias, sql):
+    """Return ``(plan lines, sequentially scanned tables)`` for one query."""
+    connection = connections[alias]
+    planner = PLANNERS.get(connection.vendor)
+    if planner is None:
+        raise PlanError(f'No EXPLAIN support for {connection.vendor}')
+    aliases = dict((short, table) for table, short in ALIAS_RE.findall(sql))
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        lines, scanned = planner(cursor, sql)
+    # Subqueries and constant rows are not tables.
+    return lines, {aliases.get(name, name) for name in scanned} & tables
+
+
+# ------------------------------------------------------------------------------
+# Running and comparing
+# ------------------------------------------------------------------------------
+def run(scenarios=SCENARIOS):
+    """
+    Capture and explain every scenario; returns ``{name: {'queries': n,
+    'scans': {table: [(sql, plan lines), ...]}}}``.
+    """
+    results = {}
+    # Cold, private caches (so every query runs) and no prerendered files.
+    with override_settings(
+        ALLOWED_HOSTS=['testserver'],
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-plans'}},
+        PRERENDER_ENABLED=False,
+        TRAFFIC_CAPTURE_ENABLED=False,
+    ):
+        data = fixtures()
+        for scenario in scenarios:
+            queries = capture(scenario, data)
+            scans = {}
+            for alias, sql in queries:
+                lines, scanned = explain(alias, sql)
+                for table in scanned:
+                    scans.setdefault(table, []).append((sql, lines))
+            results[scenario.name] = {'queries': len(queries), 'scans': scans}
+    return results
+
+
+def vendor():
+    return connections['default'].vendor
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        return json.loads(Path(path).read_text()).get(vendor())
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    path = Path(path)
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    baseline[vendor()] = {
+        name: {table: len(queries) for table, queries in result['scans'].items()} for name, result in results.items()
+    }
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+
+def compare(results, baseline):
+    """
+    Return ``(regressions, fixed)``: ``{scenario: [tables]}`` scanned by more
+    queries than the baseline allows, and by fewer.
+    """
+    baseline = baseline or {}
+    regressions, fixed = {}, {}
+    for name, result in results.items():
+        accepted = baseline.get(name, {})
+        scans = {table: len(queries) for table, queries in result['scans'].items()}
+        new = sorted(table for table, count in scans.items() if count > accepted.get(table, 0))
+        gone = sorted(table for table, count in accepted.items() if count > scans.get(table, 0))
+        if new:
+            regressions[name] = new
+        if gone:
+            fixed[name] = gone
+    return regressions, fixed
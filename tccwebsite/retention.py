@@ -0,0 +1,204 @@
+"""
+Retention: move old rows out of the hot tables into gzipped JSONL archives.
+
+Policies (``POLICIES``):
+
+* ``contacts``: messages marked read that arrived more than
+  ``CONTACT_RETENTION_DAYS`` ago;
+* ``newsletter``: subscribers inactive for more than
+  ``NEWSLETTER_RETENTION_DAYS`` (``deactivated_at``, stamped by ``signals.py``).
+
+``archive_old_rows`` moves rows in batches of ``RETENTION_BATCH_SIZE``, each in
+its own short transaction: select the oldest eligible rows (skipping rows an
+admin edit has locked, where the backend supports ``SKIP LOCKED``), write them
+to a file, fsync it, delete them, commit. The database is the only progress
+state, so an interrupted run loses nothing and the next run carries on.
+
+Files are ``RETENTION_ROOT/<policy>/<policy>-<first pk>-<last pk>-<digest>.jsonl.gz``,
+named after the rows they hold, one JSON object per row in the ``exports.py``
+JSONL format. The gzip stream carries no timestamp, so a batch retried after a
+crash between the file write and the commit rewrites the same file with the
+same bytes. ``restore_archive`` inserts archived rows again with their
+original primary keys, skipping rows that are back already, and deletes each
+file once it is fully restored; a file with rows that clash with live ones
+(an email that has subscribed again) is kept. Restored rows are still eligible, so mark them unread or
+reactivate them, or the next run archives them again.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .exports import gzip_chunks, jsonl_chunks
+from .models import Contact, Newsletter
+
+POLICIES = {
+    'contacts': {
+        'model': Contact,
+        'eligible': lambda cutoff: {'is_read': True, 'created_at__lt': cutoff},
+        'order': ['created_at', 'pk'],
+        'days': lambda: settings.CONTACT_RETENTION_DAYS,
+    },
+    'newsletter': {
+        'model': Newsletter,
+        'eligible': lambda cutoff: {'is_active': False, 'deactivated_at__lt': cutoff},
+        'order': ['deactivated_at', 'pk'],
+        'days': lambda: settings.NEWSLETTER_RETENTION_DAYS,
+    },
+}
+
+
+def _fields(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def cutoff(policy, days=None):
+    days = POLICIES[policy]['days']() if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def eligible(policy, before):
+    spec = POLICIES[policy]
+    return spec['model']._default_manager.filter(**spec['eligible'](before))
+
+
+def policy_root(policy):
+    return Path(settings.RETENTION_ROOT) / policy
+
+
+# ------------------------------------------------------------------------------
+# Archiving
+# ------------------------------------------------------------------------------
+def _filename(policy, pks):
+    digest = hashlib.sha256(','.join(map(str, sorted(pks))).encode()).hexdigest()[:12]
+    return f'{policy}-{min(pks):010d}-{max(pks):010d}-{digest}.jsonl.gz'
+
+
+def _write(path, chunks):
+    """Write ``chunks`` to ``path`` atomically and durably."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(handle.name, path)
+
+
+def archive_batch(policy, before, batch_size):
+    """Move up to ``batch_size`` eligible rows to one file; returns ``(rows, path)``, ``(0, None)`` when done."""
+    spec = POLICIES[policy]
+    model = spec['model']
+    fields = _fields(model)
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        queryset = eligible(policy, before).using(using).order_by(*spec['order'])
+        if connections[using].features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        rows = list(queryset.values_list(*fields)[:batch_size])
+        if not rows:
+            return 0, None
+        pks = [row[fields.index(model._meta.pk.attname)] for row in rows]
+        path = policy_root(policy) / _filename(policy, pks)
+        _write(path, gzip_chunks(jsonl_chunks(fields, rows)))
+        model._default_manager.using(using).filter(pk__in=pks).delete()
+    return len(rows), path
+
+
+def archive(policy, days=None, batch_size=None, max_batches=None, max_seconds=None, pause=0, log=None):
+    """
+    Archive ``policy`` until nothing is eligible (or a limit is hit); returns
+    ``{'rows', 'batches', 'files', 'seconds', 'rows_per_second'}``.
+    """
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    before = cutoff(policy, days)
+    started = time.monotonic()
+    stats = {'rows': 0, 'batches': 0, 'files': []}
+    while max_batches is None or stats['batches'] < max_batches:
+        if max_seconds is not None and time.monotonic() - started >= max_seconds:
+            break
+        batch_started = time.monotonic()
+        moved, path = archive_batch(policy, before, batch_size)
+        if not moved:
+            break
+        stats['rows'] += moved
+        stats['batches'] += 1
+        stats['files'].append(path)
+        if log:
+            log(f'{policy}: {moved} row(s) -> {path.name} ({_rate(moved, time.monotonic() - batch_started)})')
+        if pause:
+            time.sleep(pause)
+    return _finish(stats, started)
+
+
+def _rate(rows, seconds):
+    return f'{rows / seconds:,.0f} rows/s' if seconds > 0 else 'n/a'
+
+
+def _finish(stats, started):
+    stats['seconds'] = time.monotonic() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return stats
+
+
+# ------------------------------------------------------------------------------
+# Restoring
+# ------------------------------------------------------------------------------
+def archive_files(policy):
+    return sorted(policy_root(policy).glob(f'{policy}-*.jsonl.gz'))
+
+
+def read_archive(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _instance(model, record):
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return model(**{name: fields[name].to_python(value) for name, value in record.items()})
+
+
+def restore_file(policy, path, batch_size=None, keep=False):
+    """
+    Re-insert the rows of one archive file; returns ``{'rows', 'skipped'
+    (already present), 'conflicts' (clash with another row), 'seconds',
+    'rows_per_second'}``. The file is deleted unless ``keep`` or a conflict.
+    """
+    model = POLICIES[policy]['model']
+    manager = model._default_manager.using(router.db_for_write(model))
+    # bulk_create stamps these with the current time; the archived values are written back.
+    stamped = [
+        field.name for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    started = time.monotonic()
+    stats = {'rows': 0, 'skipped': 0, 'conflicts': 0}
+    records = read_archive(path)
+    while batch := list(islice(records, batch_size or settings.RETENTION_BATCH_SIZE)):
+        objects = [_instance(model, record) for record in batch]
+        pks = [obj.pk for obj in objects]
+        with transaction.atomic(using=manager.db):
+            present = set(manager.filter(pk__in=pks).values_list('pk', flat=True))
+            manager.bulk_create(objects, ignore_conflicts=True)
+            inserted = set(manager.filter(pk__in=pks).values_list('pk', flat=True)) - present
+            if stamped and inserted:
+                archived = [_instance(model, record) for record in batch]
+                manager.bulk_update([obj for obj in archived if obj.pk in inserted], stamped)
+        stats['rows'] += len(inserted)
+        stats['skipped'] += len(present)
+        stats['conflicts'] += len(batch) - len(present) - len(inserted)
+    # A conflicting row (an email that subscribed again) only lives in the file.
+    if not keep and not stats['conflicts']:
+        Path(path).unlink()
+    return _finish(stats, started)
@@ -0,0 +1,201 @@
+"""
+Sitemaps and blog feeds, kept as files.
+
+``sitemap.xml`` is an index over ``sitemap-pages.xml`` and per-section shards
+(``sitemap-courses-<n>.xml``, ``sitemap-blog-<n>.xml``), each covering a range
+of ``SITEMAP_SHARD_SIZE`` primary keys. A course or post change rewrites only
+its shard and the index (plus the RSS/Atom feeds for posts); signals schedule
+that with ``transaction.on_commit`` and ``generate_sitemaps`` rebuilds
+everything. Files are replaced atomically under ``GENERATED_ROOT`` and served
+by ``views.generated_file``.
+"""
+import datetime
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.functions import Floor
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .models import BlogPost, Course
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+STATIC_PAGES = ['home', 'courses', 'blog', 'about', 'admissions', 'contact']
+FEED_SIZE = 20
+FEEDS = {'blog-rss.xml': Rss201rev2Feed, 'blog-atom.xml': Atom1Feed}
+
+
+def _course_urls(queryset):
+    for pk, updated_at in queryset.values_list('pk', 'updated_at'):
+        yield reverse('course_detail', args=[pk]), updated_at
+
+
+def _blog_urls(queryset):
+    for slug, updated_at in queryset.values_list('slug', 'updated_at'):
+        yield reverse('blog_detail', args=[slug]), updated_at
+
+
+SECTIONS = {
+    'courses': (lambda: Course.objects.all(), _course_urls),
+    'blog': (lambda: BlogPost.objects.filter(is_published=True), _blog_urls),
+}
+
+
+def shard_of(pk):
+    return pk // settings.SITEMAP_SHARD_SIZE
+
+
+def shard_name(section, shard):
+    return f"sitemap-{section}-{shard}.xml"
+
+
+def absolute(path):
+    return f"{settings.SITE_URL}{path}"
+
+
+def _w3c(value):
+    return value.astimezone(datetime.timezone.utc).isoformat(timespec='seconds')
+
+
+def _write(name, write):
+    """Write ``GENERATED_ROOT/name`` via a temp file so readers never see a partial file."""
+    root = settings.GENERATED_ROOT
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, name)
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp, 'w', encoding='utf-8', newline='') as handle:
+        write(handle)
+    os.replace(temp, path)
+
+
+def _remove(name):
+    try:
+        os.remove(os.path.join(settings.GENERATED_ROOT, name))
+    except FileNotFoundError:
+        pass
+
+
+def _write_xml(name, root_tag, child_tag, entries):
+    """Write ``<root_tag>`` with one ``<child_tag><loc/><lastmod/></child_tag>`` per entry."""
+    def write(handle):
+        xml = SimplerXMLGenerator(handle, 'utf-8')
+        xml.startDocument()
+        xml.startElement(root_tag, {'xmlns': SITEMAP_NS})
+        for loc, lastmod in entries:
+            xml.startElement(child_tag, {})
+            xml.addQuickElement('loc', loc)
+            if lastmod:
+                xml.addQuickElement('lastmod', _w3c(lastmod))
+            xml.endElement(child_tag)
+        xml.endElement(root_tag)
+        xml.endDocument()
+    _write(name, write)
+
+
+# ------------------------------------------------------------------------------
+# Sitemaps
+# ------------------------------------------------------------------------------
+def write_pages():
+    _write_xml('sitemap-pages.xml', 'urlset', 'url', [(absolute(reverse(name)), None) for name in STATIC_PAGES])
+
+
+def write_shard(section, shard):
+    queryset_factory, urls = SECTIONS[section]
+    size = settings.SITEMAP_SHARD_SIZE
+    queryset = queryset_factory().filter(pk__gte=shard * size, pk__lt=(shard + 1) * size).order_by('pk')
+    entries = [(absolute(path), updated_at) for path, updated_at in urls(queryset)]
+    if entries:
+        _write_xml(shard_name(section, shard), 'urlset', 'url', entries)
+    else:
+        _remove(shard_name(section, shard))
+
+
+def section_shards(section):
+    """Return ``[(shard, lastmod)]`` for every non-empty shard of ``section`` (one query)."""
+    queryset_factory, _urls = SECTIONS[section]
+    rows = (
+        queryset_factory()
+        .annotate(shard=Floor(F('pk') / settings.SITEMAP_SHARD_SIZE))
+        .values('shard')
+        .annotate(lastmod=Max('updated_at'))
+        .order_by('shard')
+    )
+    return [(int(row['shard']), row['lastmod']) for row in rows]
+
+
+def write_index():
+    entries = [(absolute(reverse('sitemap_shard', args=['sitemap-pages.xml'])), None)]
+    for section in SECTIONS:
+        for shard, lastmod in section_shards(section):
+            entries.append((absolute(reverse('sitemap_shard', args=[shard_name(section, shard)])), lastmod))
+    _write_xml('sitemap.xml', 'sitemapindex', 'sitemap', entries)
+
+
+# ------------------------------------------------------------------------------
+# Feeds
+# ------------------------------------------------------------------------------
+def write_feeds():
+    posts = list(
+        BlogPost.objects.filter(is_published=True)
+        .select_related('author')
+        .only('title', 'slug', 'excerpt', 'created_at', 'updated_at', 'author__first_name', 'author__last_name')
+        .order_by('-created_at')[:FEED_SIZE]
+    )
+    for name, feed_class in FEEDS.items():
+        feed = feed_class(
+            title='The Coding School Blog',
+            link=absolute(reverse('blog')),
+            description='News, tutorials and updates from The Coding School.',
+            feed_url=absolute(reverse('blog_rss' if feed_class is Rss201rev2Feed else 'blog_atom')),
+            language='en',
+        )
+        for post in posts:
+            link = absolute(post.get_absolute_url())
+            feed.add_item(
+                title=post.title,
+                link=link,
+                description=post.excerpt,
+                unique_id=link,
+                author_name=f"{post.author.first_name} {post.author.last_name}".strip() or None,
+                pubdate=post.created_at,
+                updateddate=post.updated_at,
+            )
+        _write(name, lambda handle, feed=feed: feed.write(handle, 'utf-8'))
+
+
+# ------------------------------------------------------------------------------
+# Entry points
+# ------------------------------------------------------------------------------
+def generate_all():
+    """Rewrite every sitemap file and feed; returns the number of shards written."""
+    write_pages()
+    shards = 0
+    for section in SECTIONS:
+        for shard, _lastmod in section_shards(section):
+            write_shard(section, shard)
+            shards += 1
+    write_index()
+    write_feeds()
+    return shards
+
+
+def refresh(section, pk):
+    """Rewrite what a change to one ``section`` object affects."""
+    try:
+        write_shard(section, shard_of(pk))
+        write_index()
+        if section == 'blog':
+            write_feeds()
+    except OSError:
+        logger.exception('Could not rewrite sitemap files for %s %s', section, pk)
+
+
+def schedule_refresh(section, pk):
+    transaction.on_commit(lambda: refresh(section, pk))
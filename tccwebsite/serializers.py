@@ -0,0 +1,64 @@
+from rest_framework import serializers
+
+from .models import BlogPost, Course, Instructor, Testimonial
+
+
+class SparseFieldsMixin:
+    """Drop every field not listed in the ``fields`` keyword argument."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class InstructorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Instructor
+        fields = ['id', 'name', 'bio', 'specialization', 'experience_years', 'profile_picture']
+
+    def get_name(self, instructor):
+        return f"{instructor.user.first_name} {instructor.user.last_name}".strip()
+
+
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    instructor_name = serializers.SerializerMethodField()
+    url = serializers.CharField(source='get_absolute_url', read_only=True)
+
+    class Meta:
+        model = Course
+        fields = [
+            'id', 'title', 'description', 'difficulty', 'duration', 'price',
+            'is_featured', 'course_image', 'instructor', 'instructor_name',
+            'url', 'created_at', 'updated_at',
+        ]
+
+    def get_instructor_name(self, course):
+        user = course.instructor.user
+        return f"{user.first_name} {user.last_name}".strip()
+
+
+class TestimonialSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Testimonial
+        fields = ['id', 'student_name', 'student_image', 'content', 'course', 'rating', 'is_featured', 'created_at']
+
+
+class BlogPostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # The rendered, sanitized body (blog_content.py); the raw markup stays private.
+    author_name = serializers.SerializerMethodField()
+    url = serializers.CharField(source='get_absolute_url', read_only=True)
+
+    class Meta:
+        model = BlogPost
+        fields = [
+            'id', 'title', 'slug', 'author_name', 'excerpt', 'content_html', 'toc', 'reading_time',
+            'featured_image', 'url', 'created_at', 'updated_at',
+        ]
+
+    def get_author_name(self, post):
+        return f"{post.author.first_name} {post.author.last_name}".strip()
@@ -0,0 +1,197 @@
+"""
+Model signal handlers that keep derived data (caches, read models) in sync.
+
+Connected from ``TccwebsiteConfig.ready``.
+"""
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+
+from . import analytics, blog_content, course_cards, http_cache, prerender, seo, trending
+from .dashboard import invalidate_student_dashboards
+from .models import BlogPost, Cohort, Course, Enrollment, Instructor, Newsletter, Testimonial
+from .versioning import bump_version
+
+
+@receiver(post_init, sender=Enrollment)
+def remember_enrollment_status(sender, instance, **kwargs):
+    # Lets post_save see which status transition just happened. Read the raw
+    # attribute: a deferred status must not cost a query per loaded row.
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=Enrollment)
+def load_deferred_status(sender, instance, **kwargs):
+    # Loaded without its status: read the stored one, so post_save still sees the transition.
+    if instance._loaded_status is None and not instance._state.adding:
+        instance._loaded_status = Enrollment.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(pre_save, sender=Enrollment)
+def stamp_completion_date(sender, instance, **kwargs):
+    # Certificates show the completion date; staff completing by hand leave it empty.
+    if instance.status == 'completed' and instance.completion_date is None:
+        instance.completion_date = timezone.now()
+
+
+@receiver(pre_save, sender=Newsletter)
+def stamp_deactivation_date(sender, instance, **kwargs):
+    # Retention counts from the unsubscribe, not the subscription.
+    if instance.is_active:
+        instance.deactivated_at = None
+    elif instance.deactivated_at is None:
+        instance.deactivated_at = timezone.now()
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, **kwargs):
+    invalidate_student_dashboards([instance.student_id])
+
+    if created:
+        analytics.record_enrollment_created(instance)
+        counted = course_cards.enrollment_changed(instance.course_id, None, instance.status)
+        trending.record_enrollment(instance)
+    else:
+        analytics.record_status_change(instance.course_id, instance._loaded_status, instance.status)
+        counted = course_cards.enrollment_changed(instance.course_id, instance._loaded_status, instance.status)
+    instance._loaded_status = instance.status
+    if counted:
+        # The card update sends no signals; the listing shows the count.
+        prerender.schedule_with_purge(instance)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    invalidate_student_dashboards([instance.student_id])
+    analytics.record_enrollment_deleted(instance)
+    if course_cards.enrollment_changed(instance.course_id, instance.status, None):
+        prerender.schedule_with_purge(instance)
+
+
+@receiver(post_save, sender=Course)
+def course_changed(sender, instance, created, **kwargs):
+    if not created:
+        # Title/price appear on the dashboards of everyone enrolled.
+        invalidate_student_dashboards(
+            Enrollment.objects.filter(course=instance).values_list('student_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Course)
+def sync_course_card(sender, instance, **kwargs):
+    course_cards.sync_course(instance)
+
+
+@receiver(post_save, sender=Instructor)
+def sync_instructor_course_cards(sender, instance, **kwargs):
+    course_cards.refresh_instructor(instance.pk)
+
+
+@receiver(post_init, sender=Testimonial)
+def remember_testimonial_course(sender, instance, **kwargs):
+    # A testimonial moved to another course changes both courses' ratings.
+    instance._loaded_course_id = instance.__dict__.get('course_id')
+
+
+@receiver([post_save, post_delete], sender=Testimonial)
+def refresh_course_card_ratings(sender, instance, **kwargs):
+    course_cards.refresh_ratings(instance.course_id)
+    if instance._loaded_course_id != instance.course_id:
+        course_cards.refresh_ratings(instance._loaded_course_id)
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_save, sender=Testimonial)
+def record_testimonial_activity(sender, instance, created, **kwargs):
+    if created:
+        trending.record_testimonial(instance)
+
+
+@receiver(post_delete, sender=Course)
+def drop_trending_course(sender, instance, **kwargs):
+    trending.forget(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def bump_course_version(sender, instance, **kwargs):
+    bump_version('course', instance.pk)
+    bump_version('catalog')
+    seo.schedule_refresh('courses', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Instructor)
+def bump_instructor_version(sender, instance, **kwargs):
+    bump_version('instructor', instance.pk)
+    bump_version('catalog')
+
+
+@receiver(post_save, sender=User)
+def bump_user_name_versions(sender, instance, created, update_fields=None, **kwargs):
+    # Instructor and author names live on the User row; logins only save last_login.
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    for instructor_id in Instructor.objects.filter(user=instance).values_list('pk', flat=True):
+        bump_version('instructor', instructor_id)
+        bump_version('catalog')
+        course_cards.refresh_instructor(instructor_id)
+    post_ids = list(BlogPost.objects.filter(author=instance).values_list('pk', flat=True))
+    for post_id in post_ids:
+        bump_version('blogpost', post_id)
+    if post_ids:
+        bump_version('blog')
+
+
+@receiver(pre_save, sender=BlogPost)
+def render_blog_content(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'content' in update_fields:
+        rendered = blog_content.render(instance.content)
+        instance.content_html = rendered['html']
+        instance.toc = rendered['toc']
+        instance.reading_time = rendered['reading_time']
+    instance.published_month = timezone.localdate(instance.created_at or timezone.now()).replace(day=1)
+
+
+@receiver([post_save, post_delete], sender=Testimonial)
+def bump_testimonial_version(sender, instance, **kwargs):
+    bump_version('testimonial', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=BlogPost)
+def bump_blogpost_version(sender, instance, **kwargs):
+    bump_version('blogpost', instance.pk)
+    bump_version('blog')
+    seo.schedule_refresh('blog', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Instructor)
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=Testimonial)
+def rebuild_prerendered_pages(sender, instance, **kwargs):
+    prerender.schedule(instance)
+
+
+@receiver(post_save, sender=User)
+def rebuild_prerendered_user_pages(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save last_login on every sign-in; only name changes matter here.
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    prerender.schedule(instance)
+    http_cache.schedule_purge(instance)
+
+
+@receiver(post_init, sender=BlogPost)
+def remember_blogpost_slug(sender, instance, **kwargs):
+    # A renamed post must also be purged under its old slug.
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Instructor)
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=Testimonial)
+@receiver([post_save, post_delete], sender=Cohort)
+def purge_http_cache(sender, instance, **kwargs):
+    http_cache.schedule_purge(instance)
@@ -0,0 +1,102 @@
+"""
+Streamed template rendering.
+
+``stream_render`` is an opt-in replacement for ``render()``. It renders
+everything in ``base.html`` before ``{% block content %}`` (the ``<head>``,
+the navbar and flash messages) while the view is still running, returns that
+as the first chunk of a ``StreamingHttpResponse`` and renders the rest while
+the response is being sent. Browsers start fetching CSS and drawing the
+navbar while the page body (lazy querysets in the context) is still being
+evaluated.
+
+Rules for views that use it:
+
+* do everything that can fail (``get_object_or_404``, permission checks,
+  redirects) before calling it; once the first chunk is out, an error can only
+  truncate the page;
+* pass querysets unevaluated so the work really happens after the first chunk;
+* response middleware runs before the body is rendered, so side effects of the
+  template must happen up front. The CSRF token is requested before the
+  response is returned (the ``csrf`` argument; templates pulled in with
+  ``{% include %}`` are not scanned) and messages are rendered in the first chunk.
+  Surrogate keys are resolved then too: a queryset passed to ``http_cache.tag``
+  that only the body evaluates contributes its collection key, not its rows'.
+"""
+import contextlib
+import itertools
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.defaulttags import CsrfTokenNode
+from django.template.loader import get_template
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+
+# The first chunk ends where this block of the root template starts.
+FLUSH_BEFORE_BLOCK = 'content'
+
+
+def _extends_node(template):
+    for node in template.nodelist:
+        if not isinstance(node, TextNode):
+            return node if isinstance(node, ExtendsNode) else None
+    return None
+
+
+def _chunks(template, context, csrf):
+    """Render ``template`` like ``Template.render`` does, yielding at the flush point."""
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(context.render_context.push_state(template))
+        stack.enter_context(context.bind_template(template))
+        context.template_name = template.name
+
+        # Walk up the {% extends %} chain as ExtendsNode.render does, then
+        # render the root template node by node instead of in one join.
+        root, chain = template, [template]
+        while (extends := _extends_node(root)) is not None:
+            parent = extends.get_parent(context)
+            if BLOCK_CONTEXT_KEY not in context.render_context:
+                context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+            block_context = context.render_context[BLOCK_CONTEXT_KEY]
+            block_context.add_blocks(extends.blocks)
+            if _extends_node(parent) is None:
+                block_context.add_blocks({n.name: n for n in parent.nodelist.get_nodes_by_type(BlockNode)})
+            stack.enter_context(context.render_context.push_state(parent, isolated_context=False))
+            root = parent
+            chain.append(parent)
+
+        if csrf is None:
+            csrf = any(t.nodelist.get_nodes_by_type(CsrfTokenNode) for t in chain)
+        if csrf:
+            # Set the token now, while CsrfViewMiddleware can still send the cookie.
+            get_token(context.request)
+
+        parts = []
+        for node in root.nodelist:
+            if isinstance(node, BlockNode) and node.name == FLUSH_BEFORE_BLOCK:
+                yield ''.join(parts)
+                parts = []
+            parts.append(node.render_annotated(context))
+        yield ''.join(parts)
+
+
+def stream_render(request, template_name, context=None, content_type=None, status=None, csrf=None):
+    """
+    Like ``render()``, but sends the page head before rendering the body.
+
+    ``csrf`` says whether the page will contain a CSRF token; by default that
+    is assumed whenever the templates contain ``{% csrf_token %}``, even in a
+    branch that is not taken. Such pages are not compressed (see
+    ``compression``), so views that know better should say so.
+    """
+    if not settings.STREAMING_RENDER_ENABLED:
+        return render(request, template_name, context, content_type, status)
+
+    template = get_template(template_name).template
+    context = make_context(context, request, autoescape=template.engine.autoescape)
+    chunks = _chunks(template, context, csrf)
+    head = next(chunks)
+    return StreamingHttpResponse(itertools.chain([head], chunks), content_type=content_type, status=status)
@@ -0,0 +1,186 @@
+"""
+Large synthetic dataset for query-plan checks (``query_plans.py``).
+
+Planners only pick indexes once tables are big enough for a sequential scan
+to cost more, so plans captured against the handful of rows ``load_courses``
+creates say nothing about production. ``manage.py generate_synthetic_data``
+bulk-loads instructors, courses, students, enrollments, testimonials, blog
+posts and newsletter subscribers in roughly production proportions (times
+``--scale``), spreads their timestamps over the last two years, rebuilds the
+derived tables (course cards, trending scores) and refreshes planner
+statistics.
+
+Everything is bulk-created, so no signals fire; every row is recognisable by
+``PREFIX`` (usernames, slugs, emails) and ``clear`` removes it all again.
+The generator is seeded, so a given ``--scale``/``--seed`` always produces the
+same data.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import course_cards, trending
+from .models import BlogPost, Course, Enrollment, Instructor, Newsletter, Testimonial
+
+PREFIX = 'synth-'
+BATCH_SIZE = 2000
+SPREAD_DAYS = 730
+
+# Rows per unit of --scale.
+INSTRUCTORS = 50
+COURSES = 2000
+STUDENTS = 20000
+ENROLLMENTS_PER_STUDENT = 3
+TESTIMONIALS = 5000
+POSTS = 2000
+SUBSCRIBERS = 20000
+
+FEATURED_RATE = 0.02
+PUBLISHED_RATE = 0.9
+ACTIVE_SUBSCRIBER_RATE = 0.85
+ENROLLMENT_STATUSES = [('active', 60), ('completed', 25), ('cancelled', 10), ('pending', 5)]
+WORDS = (
+    'python django data web design cloud security mobile analytics testing '
+    'design systems machine learning devops product javascript backend frontend'
+).split()
+
+
+def exists():
+    return User.objects.filter(username__startswith=PREFIX).exists()
+
+
+def clear():
+    """Delete every synthetic row; returns the number of rows deleted."""
+    # Children first: enrollment deletes record analytics rows against their
+    # course, which must not be deleted in the same cascade.
+    querysets = [
+        Enrollment.objects.filter(student__username__startswith=PREFIX),
+        Testimonial.objects.filter(student_name__startswith=PREFIX),
+        BlogPost.objects.filter(slug__startswith=PREFIX),
+        Course.objects.filter(instructor__user__username__startswith=PREFIX),
+        User.objects.filter(username__startswith=PREFIX),
+        Newsletter.objects.filter(email__startswith=PREFIX),
+    ]
+    return sum(queryset.delete()[0] for queryset in querysets)
+
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _backdate(rng, queryset, field, now, extra=None):
+    """Spread ``field`` over the last ``SPREAD_DAYS`` days (``auto_now_add`` ignores values given to bulk_create)."""
+    objects = list(queryset.only('pk'))
+    fields = [field, *(extra or {})]
+    for obj in objects:
+        stamp = now - timedelta(seconds=rng.randrange(SPREAD_DAYS * 86400))
+        setattr(obj, field, stamp)
+        for name, derive in (extra or {}).items():
+            setattr(obj, name, derive(stamp))
+    queryset.model.objects.bulk_update(objects, fields, batch_size=BATCH_SIZE)
+
+
+def generate(scale=1, seed=0, log=print):
+    """Load the dataset; returns ``{model name: rows created}``."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    counts = {}
+
+    def create(model, objects):
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        counts[model.__name__] = counts.get(model.__name__, 0) + len(objects)
+        log(f'{model.__name__}: {counts[model.__name__]}')
+
+    with transaction.atomic():
+        create(User, [
+            User(
+                username=f'{PREFIX}{n}', email=f'{PREFIX}{n}@example.com', password='!',
+                first_name=rng.choice(WORDS).title(), last_name=rng.choice(WORDS).title(),
+                date_joined=now - timedelta(seconds=rng.randrange(SPREAD_DAYS * 86400)),
+            )
+            for n in range((INSTRUCTORS + STUDENTS) * scale)
+        ])
+        users = list(User.objects.filter(username__startswith=PREFIX).order_by('pk').values_list('pk', flat=True))
+        instructor_users, students = users[:INSTRUCTORS * scale], users[INSTRUCTORS * scale:]
+
+        create(Instructor, [
+            Instructor(user_id=pk, bio=_phrase(rng, 30), specialization=_phrase(rng, 2), experience_years=rng.randint(1, 20))
+            for pk in instructor_users
+        ])
+        instructors = list(Instructor.objects.filter(user__username__startswith=PREFIX).values_list('pk', flat=True))
+
+        difficulties = [value for value, _label in Course.DIFFICULTY_CHOICES]
+        create(Course, [
+            Course(
+                title=f'{_phrase(rng, 3).title()} {n}', description=_phrase(rng, 80),
+                difficulty=rng.choice(difficulties), duration=f'{rng.randint(2, 24)} weeks',
+                price=rng.randrange(0, 500000, 5000), instructor_id=rng.choice(instructors),
+                is_featured=rng.random() < FEATURED_RATE,
+            )
+            for n in range(COURSES * scale)
+        ])
+        synthetic_courses = Course.objects.filter(instructor__user__username__startswith=PREFIX)
+        _backdate(rng, synthetic_courses, 'created_at', now)
+        courses = list(synthetic_courses.values_list('pk', flat=True))
+
+        statuses, weights = zip(*ENROLLMENT_STATUSES)
+        enrollments = []
+        for student in students:
+            for course in rng.sample(courses, ENROLLMENTS_PER_STUDENT):
+                status = rng.choices(statuses, weights)[0]
+                enrollments.append(Enrollment(
+                    student_id=student, course_id=course, status=status,
+                    progress_percentage=100 if status == 'completed' else rng.randint(0, 99),
+                ))
+        create(Enrollment, enrollments)
+        _backdate(
+            rng, Enrollment.objects.filter(student__username__startswith=PREFIX), 'enrollment_date', now,
+        )
+        Enrollment.objects.filter(
+            student__username__startswith=PREFIX, status='completed',
+        ).update(completion_date=now)
+
+        create(Testimonial, [
+            Testimonial(
+                student_name=f'{PREFIX}{rng.choice(WORDS)}', content=_phrase(rng, 40),
+                course_id=rng.choice(courses), rating=rng.randint(1, 5),
+                is_featured=rng.random() < FEATURED_RATE,
+            )
+            for _ in range(TESTIMONIALS * scale)
+        ])
+        _backdate(rng, Testimonial.objects.filter(student_name__startswith=PREFIX), 'created_at', now)
+
+        posts = []
+        for n in range(POSTS * scale):
+            body = ''.join(f'<p>{_phrase(rng, 60)}</p>' for _ in range(5))
+            posts.append(BlogPost(
+                title=_phrase(rng, 5).title(), slug=f'{PREFIX}post-{n}', author_id=rng.choice(instructor_users),
+                content=body, content_html=body, excerpt=_phrase(rng, 20),
+                is_published=rng.random() < PUBLISHED_RATE, reading_time=2,
+            ))
+        create(BlogPost, posts)
+        _backdate(
+            rng, BlogPost.objects.filter(slug__startswith=PREFIX), 'created_at', now,
+            extra={'published_month': lambda stamp: timezone.localdate(stamp).replace(day=1)},
+        )
+
+        create(Newsletter, [
+            Newsletter(email=f'{PREFIX}news-{n}@example.com', is_active=rng.random() < ACTIVE_SUBSCRIBER_RATE)
+            for n in range(SUBSCRIBERS * scale)
+        ])
+        _backdate(rng, Newsletter.objects.filter(email__startswith=PREFIX), 'subscribed_at', now)
+
+    course_cards.rebuild()
+    trending.rebuild()
+    analyze()
+    return counts
+
+
+def analyze():
+    """Refresh planner statistics after a bulk load."""
+    if connection.vendor in ('postgresql', 'sqlite'):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
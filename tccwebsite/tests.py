@@ -1,3 +1,1044 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import json
+import os
+import runpy
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import redis
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    admin_perf, certificates, cohorts, compression, course_cards, db_pool, db_router, exports, facets, http_cache,
+    hydration, offline, prerender, progress, query_plans, retention, seo, streaming, traffic, trending, warmup,
+)
+from .models import (
+    BlogPost, Certificate, Cohort, Contact, Course, CourseCard, Enrollment, EnrollmentDailyStat, Instructor, Newsletter,
+    Testimonial,
+)
+from .versioning import bump_version, get_version
+
+# Generated files (sitemaps, pre-rendered pages) of every test; removed once the module is done.
+_generated_dir = tempfile.TemporaryDirectory(prefix='tcc-tests-')
+_generated = _generated_dir.name
+
+
+def tearDownModule():
+    _generated_dir.cleanup()
+
+
+def make_course(title='Python Basics', price='1000.00', **fields):
+    user = User.objects.create(username=f'instructor-{User.objects.count()}', first_name='Ada', last_name='Lovelace')
+    instructor = Instructor.objects.create(user=user, bio='Teaches', specialization='Python', experience_years=5)
+    fields = {'description': 'A course', 'difficulty': 'beginner', 'duration': '4 weeks', **fields}
+    return Course.objects.create(title=title, price=Decimal(price), instructor=instructor, **fields)
+
+
+def make_student(username='student'):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pw')
+
+
+# Signal handlers write sitemaps and pre-rendered pages on commit; keep them out of the tree.
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class AnalyticsDeltaTests(TestCase):
+    def setUp(self):
+        self.course = make_course()
+        self.student = make_student()
+
+    def stats(self):
+        return EnrollmentDailyStat.objects.filter(course=self.course)
+
+    def test_enrollment_books_revenue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.course, status='active')
+        stat = self.stats().get()
+        self.assertEqual((stat.enrollments, stat.revenue), (1, Decimal('1000.00')))
+
+    def test_cancellation_reverses_revenue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = Enrollment.objects.create(student=self.student, course=self.course, status='active')
+            enrollment.status = 'cancelled'
+            enrollment.save()
+        stat = self.stats().get()
+        self.assertEqual((stat.cancellations, stat.revenue), (1, Decimal('0.00')))
+
+    def test_deleting_an_enrollment_reverses_it(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = Enrollment.objects.create(student=self.student, course=self.course, status='completed')
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+        stat = self.stats().get()
+        self.assertEqual((stat.enrollments, stat.completions, stat.revenue), (0, 0, Decimal('0.00')))
+
+    def test_deleting_a_course_with_enrollments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.course, status='active')
+            Enrollment.objects.create(student=make_student('other'), course=self.course, status='completed')
+        course_id = self.course.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        self.assertFalse(Course.objects.filter(pk=course_id).exists())
+        self.assertFalse(EnrollmentDailyStat.objects.filter(course_id=course_id).exists())
+
+    def test_backfill_matches_the_signal_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.course, status='completed')
+            cancelled = Enrollment.objects.create(student=make_student('other'), course=self.course, status='active')
+            cancelled.status = 'cancelled'
+            cancelled.save()
+        fields = ('date', 'enrollments', 'completions', 'cancellations', 'revenue')
+        live = list(self.stats().order_by('date').values_list(*fields))
+        call_command('backfill_analytics', courses_per_batch=1, stdout=StringIO())
+        self.assertEqual(list(self.stats().order_by('date').values_list(*fields)), live)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class CertificateRowTests(TestCase):
+    def setUp(self):
+        self.enrollment = Enrollment.objects.create(student=make_student(), course=make_course(), status='completed')
+
+    def result(self, **fields):
+        return {
+            'enrollment_id': self.enrollment.pk, 'number': 'TCC-1', 'student_name': 'Ada Student',
+            'course_title': 'Python Basics', 'instructor_name': 'Ada Lovelace',
+            'completion_date': date(2026, 1, 5), 'png': 'certificates/aa/a.png', 'pdf': 'certificates/aa/a.pdf',
+            **fields,
+        }
+
+    def test_save_rows_updates_an_existing_certificate(self):
+        certificates.save_rows([self.result()])
+        certificates.save_rows([self.result(student_name='Ada Renamed', png='certificates/bb/b.png')])
+        certificate = Certificate.objects.get()
+        self.assertEqual((certificate.student_name, certificate.png.name), ('Ada Renamed', 'certificates/bb/b.png'))
+
+    def test_save_rows_without_conflict_targets(self):
+        # MySQL/MariaDB: ON DUPLICATE KEY UPDATE, no unique_fields.
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            certificates.save_rows([self.result()])
+        self.assertEqual(Certificate.objects.get().number, 'TCC-1')
+
+
+class AdminPerformanceTests(TestCase):
+    def test_estimate_is_used_above_the_threshold(self):
+        queryset = Course.objects.order_by('pk')
+        with mock.patch.object(admin_perf, 'estimate_count', return_value=250000):
+            self.assertEqual(admin_perf.EstimatedCountPaginator(queryset, 100).count, 250000)
+        with mock.patch.object(admin_perf, 'estimate_count', return_value=12):
+            self.assertEqual(admin_perf.EstimatedCountPaginator(queryset, 100).count, 0)
+
+    def test_backends_without_estimates_fall_back_to_count(self):
+        self.assertIsNone(admin_perf.estimate_count(Course.objects.all()))
+
+    @override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+    def test_changelist_filters_by_autocomplete(self):
+        course, other = make_course(), make_course('Django')
+        Enrollment.objects.create(student=make_student('ada'), course=course)
+        Enrollment.objects.create(student=make_student('bob'), course=other)
+        self.client.force_login(User.objects.create_superuser('admin', password='pw'))
+        response = self.client.get(
+            reverse('admin:tccwebsite_enrollment_changelist'), {'course__id__exact': course.pk},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list.values_list('student__username', flat=True)), ['ada'])
+        self.assertContains(response, 'data-filter-param="course__id__exact"')
+        self.assertContains(response, f'<option value="{course.pk}" selected>')
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.course = make_course()
+        for username in ('ada', 'bob', 'cy'):
+            Enrollment.objects.create(student=make_student(username), course=self.course)
+
+    def test_enrollment_csv_joins_names_per_chunk(self):
+        rows = list(csv.reader(''.join(exports.export_chunks('enrollments', chunk_size=2)).splitlines()))
+        self.assertEqual(rows[0], exports.EXPORTS['enrollments']['header'])
+        self.assertEqual([row[2] for row in rows[1:]], ['ada', 'bob', 'cy'])
+        self.assertEqual({row[6] for row in rows[1:]}, {'Python Basics'})
+
+    def test_gzipped_jsonl_round_trip(self):
+        data = gzip.decompress(b''.join(exports.export_chunks('enrollments', fmt='jsonl', compress=True)))
+        records = [json.loads(line) for line in data.decode().splitlines()]
+        self.assertEqual([record['username'] for record in records], ['ada', 'bob', 'cy'])
+        self.assertEqual(records[0]['status'], 'pending')
+
+    def test_mysql_pages_by_primary_key(self):
+        mysql = {'default': mock.Mock(vendor='mysql')}
+        with mock.patch.object(exports, 'connections', mysql), self.assertNumQueries(3):
+            pks = [row[0] for row in exports.iterate_values(Enrollment.objects.all(), ['id'], chunk_size=2)]
+        self.assertEqual(pks, sorted(Enrollment.objects.values_list('pk', flat=True)))
+
+    def test_admin_action_streams_the_selection(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='pw'))
+        selected = Enrollment.objects.filter(student__username='bob').get()
+        response = self.client.post(reverse('admin:tccwebsite_enrollment_changelist'), {
+            'action': 'export_csv', '_selected_action': [selected.pk],
+        })
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="enrollments-', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 2)
+        self.assertIn('bob', body)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False, COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=0)
+class ApiConditionalGetTests(TestCase):
+    def setUp(self):
+        for n in range(3):
+            make_course(title=f'Course {n}')
+        self.url = reverse('api-course-list')
+
+    def round_trip(self, **headers):
+        first = self.client.get(self.url, **headers)
+        self.assertEqual(first.status_code, 200)
+        second = self.client.get(self.url, headers={'If-None-Match': first['ETag']}, **headers)
+        return first, second
+
+    def test_identity_round_trip(self):
+        first, second = self.round_trip()
+        self.assertFalse(first.has_header('Content-Encoding'))
+        self.assertEqual(second.status_code, 304)
+
+    def assertCompressedRoundTrip(self, encoding):
+        first, second = self.round_trip(HTTP_ACCEPT_ENCODING=encoding)
+        self.assertEqual(first['Content-Encoding'], encoding)
+        self.assertTrue(first['ETag'].startswith('W/'))
+        self.assertEqual(second.status_code, 304)
+
+    def test_gzip_round_trip(self):
+        self.assertCompressedRoundTrip('gzip')
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_round_trip(self):
+        self.assertCompressedRoundTrip('br')
+
+    def test_changed_payload_is_sent_again(self):
+        etag = self.client.get(self.url)['ETag']
+        course = Course.objects.first()
+        course.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class FacetCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_course('Python Basics', '100000.00')
+        make_course('Advanced Python', '300000.00', difficulty='advanced')
+        make_course('Django', '200000.00', difficulty='advanced', duration='8 weeks')
+
+    def counts(self, **params):
+        counts = facets.get_facet_counts(facets.parse_filters(params))
+        return counts['total'], {
+            facet['name']: {bucket['value']: bucket['count'] for bucket in facet['buckets']}
+            for facet in counts['facets']
+        }
+
+    def test_counts_without_filters(self):
+        total, counts = self.counts()
+        self.assertEqual(total, 3)
+        self.assertEqual(counts['difficulty'], {'beginner': 1, 'intermediate': 0, 'advanced': 2})
+        self.assertEqual(counts['duration'], {'4 weeks': 2, '8 weeks': 1})
+        self.assertEqual(counts['price'], {'under-150k': 1, '150k-250k': 1, '250k-350k': 1, '350k-plus': 0})
+
+    def test_a_facet_ignores_its_own_selection(self):
+        total, counts = self.counts(difficulty='advanced')
+        self.assertEqual(total, 2)
+        # Still shows what picking another level would give...
+        self.assertEqual(counts['difficulty'], {'beginner': 1, 'intermediate': 0, 'advanced': 2})
+        # ...while the other facets only count advanced courses.
+        self.assertEqual(counts['duration'], {'4 weeks': 1, '8 weeks': 1})
+        self.assertEqual(counts['price']['under-150k'], 0)
+
+    def test_search_narrows_every_facet(self):
+        total, counts = self.counts(search='python')
+        self.assertEqual(total, 2)
+        self.assertEqual(counts['difficulty'], {'beginner': 1, 'intermediate': 0, 'advanced': 1})
+
+    def test_unknown_values_are_dropped(self):
+        state = facets.parse_filters({'difficulty': 'expert', 'price': '150k-250k', 'sort': 'newest'})
+        self.assertEqual(state, {'price': '150k-250k'})
+
+    def test_counts_are_cached_until_the_catalog_changes(self):
+        self.counts()
+        with self.assertNumQueries(0):
+            self.counts()
+        make_course('Flask')
+        self.assertEqual(self.counts()[0], 4)
+
+    def test_course_list_renders_the_counts(self):
+        response = self.client.get(reverse('courses'), {'difficulty': 'advanced'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['facet_counts']['total'], 2)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class CourseCardTests(TestCase):
+    def setUp(self):
+        self.course = make_course(description='word ' * 50)
+
+    def card(self):
+        return CourseCard.objects.get(course_id=self.course.pk)
+
+    def test_course_save_rewrites_the_listing_columns(self):
+        self.course.title, self.course.price = 'Python Deep Dive', Decimal('5.00')
+        self.course.save()
+        card = self.card()
+        self.assertEqual((card.title, card.price), ('Python Deep Dive', Decimal('5.00')))
+        self.assertEqual(card.instructor_name, 'Ada Lovelace')
+        self.assertEqual(card.summary, 'word ' * 19 + 'word…')
+
+    def test_instructor_rename_reaches_the_card(self):
+        user = self.course.instructor.user
+        user.last_name = 'Byron'
+        user.save()
+        self.assertEqual(self.card().instructor_name, 'Ada Byron')
+
+    def test_testimonials_move_the_rating(self):
+        Testimonial.objects.create(student_name='A', content='Good', course=self.course, rating=5)
+        review = Testimonial.objects.create(student_name='B', content='Fine', course=self.course, rating=2)
+        self.assertEqual((self.card().rating_avg, self.card().review_count), (Decimal('3.50'), 2))
+        review.course = make_course('Django')
+        review.save()
+        self.assertEqual((self.card().rating_avg, self.card().review_count), (Decimal('5.00'), 1))
+
+    def test_only_seat_holders_are_counted(self):
+        enrollment = Enrollment.objects.create(student=make_student('ada'), course=self.course, status='active')
+        Enrollment.objects.create(student=make_student('bob'), course=self.course, status='waitlisted')
+        self.assertEqual(self.card().enrollment_count, 1)
+        enrollment.status = 'cancelled'
+        enrollment.save()
+        self.assertEqual(self.card().enrollment_count, 0)
+
+    def test_enrollments_loaded_without_their_status(self):
+        Enrollment.objects.create(student=make_student('ada'), course=self.course, status='active')
+        with self.assertNumQueries(1):
+            enrollment, = Enrollment.objects.only('pk', 'course_id', 'student_id')
+        enrollment.status = 'cancelled'
+        enrollment.save()
+        self.assertEqual(self.card().enrollment_count, 0)
+
+    def test_rebuild_repairs_drift(self):
+        Enrollment.objects.create(student=make_student('ada'), course=self.course, status='active')
+        # Writes that bypass signals leave the cards behind.
+        Course.objects.filter(pk=self.course.pk).update(title='Renamed')
+        CourseCard.objects.filter(course_id=self.course.pk).update(enrollment_count=7)
+        missing = make_course('Django')
+        CourseCard.objects.filter(course_id=missing.pk).delete()
+
+        out = StringIO()
+        call_command('rebuild_course_cards', '--dry-run', stdout=out)
+        self.assertIn('Found 1 missing, 1 stale and 0 orphaned', out.getvalue())
+        self.assertEqual(self.card().title, 'Python Basics')
+
+        call_command('rebuild_course_cards', stdout=StringIO())
+        self.assertEqual((self.card().title, self.card().enrollment_count), ('Renamed', 1))
+        self.assertTrue(CourseCard.objects.filter(course_id=missing.pk).exists())
+        self.assertEqual(course_cards.rebuild(), (0, 0, 0))
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False, REDIS_URL=None, TRENDING_HALF_LIFE_HOURS=24)
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.old, self.new, self.quiet = make_course('Old'), make_course('New'), make_course('Quiet')
+
+    def score(self, course):
+        return trending.current_score(CourseCard.objects.get(course_id=course.pk).trending_score, self.now)
+
+    def test_scores_halve_every_half_life(self):
+        trending.record(self.old.pk, 4, self.now - timedelta(hours=48))
+        self.assertAlmostEqual(self.score(self.old), 1.0)
+        later = self.now + timedelta(hours=24)
+        self.assertAlmostEqual(trending.current_score(trending.increment(1, self.now), later), 0.5)
+
+    def test_recent_activity_outranks_older_activity(self):
+        for _ in range(3):
+            trending.record(self.old.pk, 1, self.now - timedelta(hours=72))
+        trending.record(self.new.pk, 1, self.now)
+        self.assertEqual([card.pk for card in trending.top_cards(5)], [self.new.pk, self.old.pk])
+        response = self.client.get(reverse('courses'), {'sort': 'trending'})
+        self.assertEqual(
+            [card.pk for card in response.context['page_obj']], [self.new.pk, self.old.pk, self.quiet.pk],
+        )
+
+    def test_signals_score_enrollments_and_reviews(self):
+        Enrollment.objects.create(student=make_student('ada'), course=self.new)
+        Testimonial.objects.create(student_name='A', content='Great', course=self.old, rating=5)
+        self.assertAlmostEqual(self.score(self.new), 1.0, places=3)
+        self.assertAlmostEqual(self.score(self.old), 2.0, places=3)
+
+    def test_rebuild_matches_the_incremental_scores(self):
+        Enrollment.objects.create(student=make_student('ada'), course=self.new)
+        Enrollment.objects.create(student=make_student('bob'), course=self.old)
+        Enrollment.objects.filter(course=self.old).update(enrollment_date=self.now - timedelta(hours=24))
+        # The update bypassed the signals; the rebuild picks up the backdated enrollment.
+        call_command('rebuild_trending', stdout=StringIO())
+        self.assertAlmostEqual(self.score(self.new), 1.0, places=3)
+        self.assertAlmostEqual(self.score(self.old), 0.5, places=3)
+        self.assertEqual(self.score(self.quiet), 0.0)
+
+    def test_redis_outage_falls_back_to_the_column(self):
+        trending.record(self.old.pk, 1, self.now)
+        client = mock.Mock(**{'zrevrange.side_effect': redis.RedisError})
+        with mock.patch.object(trending, '_redis', return_value=client), self.assertLogs('tccwebsite.trending'):
+            self.assertEqual(trending.top_course_ids(3), [self.old.pk])
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class OfflineCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.kept, self.renamed, self.removed = make_course('Kept'), make_course('Renamed'), make_course('Removed')
+        self.since = offline.current_version()
+
+    def test_delta_has_only_changed_and_removed_rows(self):
+        self.renamed.title = 'Python for Data'
+        self.renamed.save()
+        removed_pk = self.removed.pk
+        self.removed.delete()
+        added = make_course('Added', '250000.00')
+
+        delta = offline.delta(self.since)
+        self.assertFalse(delta['full'])
+        self.assertNotEqual(delta['version'], self.since)
+        rows = {row[0]: dict(zip(delta['fields'], row)) for row in delta['courses']}
+        self.assertEqual(set(rows), {self.renamed.pk, added.pk})
+        self.assertEqual(rows[self.renamed.pk]['title'], 'Python for Data')
+        self.assertEqual(rows[added.pk]['price'], '₦250,000')
+        self.assertEqual(delta['removed'], [removed_pk])
+
+    def test_unchanged_catalog_keeps_its_version(self):
+        # Saves that leave the bundled columns alone bump the catalog but not the bundle.
+        self.kept.save()
+        self.assertEqual(offline.delta(self.since), {
+            'version': self.since, 'fields': offline.FIELDS, 'full': False, 'courses': [], 'removed': [],
+        })
+
+    def test_unknown_versions_get_the_full_bundle(self):
+        delta = offline.delta('stale')
+        self.assertTrue(delta['full'])
+        self.assertEqual(len(delta['courses']), 3)
+
+    def test_version_endpoint_revalidates(self):
+        url = reverse('offline_catalog_version')
+        self.assertEqual(self.client.get(url).json(), {'version': self.since})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{self.since}"').status_code, 304)
+        response = self.client.get(reverse('offline_catalog'), {'since': self.since})
+        self.assertEqual(response['X-Catalog-Version'], self.since)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class QueryPlanTests(TestCase):
+    def scanned(self, queryset):
+        with CaptureQueriesContext(connection) as context:
+            list(queryset)
+        return query_plans.explain('default', context.captured_queries[-1]['sql'])[1]
+
+    def test_hot_filters_use_their_indexes(self):
+        self.assertEqual(self.scanned(Course.objects.filter(is_featured=True).order_by('-created_at')), set())
+        self.assertEqual(self.scanned(Course.objects.order_by('-created_at')[:21]), set())
+        self.assertEqual(self.scanned(Course.objects.filter(duration='4 weeks')), {'tccwebsite_course'})
+
+    def test_compare_reports_new_and_fixed_scans(self):
+        results = {
+            'courses': {'queries': 3, 'scans': {'tccwebsite_coursecard': [('sql', [])] * 2}},
+            'blog': {'queries': 1, 'scans': {}},
+        }
+        baseline = {'courses': {'tccwebsite_coursecard': 1}, 'blog': {'tccwebsite_blogpost': 1}}
+        self.assertEqual(
+            query_plans.compare(results, baseline),
+            ({'courses': ['tccwebsite_coursecard']}, {'blog': ['tccwebsite_blogpost']}),
+        )
+        self.assertEqual(query_plans.compare(results, {'courses': {'tccwebsite_coursecard': 2}}), ({}, {}))
+
+    def test_baseline_keeps_other_vendors(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'baseline.json')
+            with open(path, 'w') as handle:
+                json.dump({'mysql': {'home': {}}}, handle)
+            query_plans.save_baseline({'home': {'queries': 1, 'scans': {'django_session': [('sql', [])]}}}, path)
+            self.assertEqual(query_plans.load_baseline(path), {'home': {'django_session': 1}})
+            with open(path) as handle:
+                self.assertIn('mysql', json.load(handle))
+
+    def test_fallback_indexes_without_partial_index_support(self):
+        migration = importlib.import_module('tccwebsite.migrations.0016_full_index_fallbacks')
+        schema_editor = mock.Mock()
+        schema_editor.connection.vendor = 'mysql'
+        schema_editor.connection.features.supports_partial_indexes = False
+        migration.create_fallback_indexes(django_apps, schema_editor)
+        self.assertEqual(schema_editor.add_index.call_count, len(migration.FALLBACK_INDEXES))
+        schema_editor.execute.assert_called_once_with(
+            f'CREATE INDEX {migration.EMAIL_INDEX_NAME} ON auth_user (email)'
+        )
+
+        schema_editor.reset_mock()
+        schema_editor.connection.vendor = 'postgresql'
+        schema_editor.connection.features.supports_partial_indexes = True
+        migration.create_fallback_indexes(django_apps, schema_editor)
+        schema_editor.add_index.assert_not_called()
+        schema_editor.execute.assert_not_called()
+
+
+@override_settings(CONTACT_RETENTION_DAYS=30, NEWSLETTER_RETENTION_DAYS=30)
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(self.settings(RETENTION_ROOT=self.root))
+        old = timezone.now() - timedelta(days=60)
+        for index in range(5):
+            Contact.objects.create(name=f'Visitor {index}', email=f'v{index}@example.com', subject='Hi', message='Hi')
+        Contact.objects.update(is_read=True, created_at=old)
+        self.recent = Contact.objects.create(
+            name='New', email='n@example.com', subject='Hi', message='Hi', is_read=True,
+        )
+        self.archived = list(Contact.objects.exclude(pk=self.recent.pk).order_by('pk').values())
+
+    def test_archive_and_restore_round_trip(self):
+        stats = retention.archive('contacts', batch_size=2)
+        self.assertEqual((stats['rows'], stats['batches']), (5, 3))
+        self.assertEqual(list(Contact.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertEqual(len(retention.archive_files('contacts')), 3)
+
+        call_command('restore_archive', 'contacts', stdout=StringIO())
+        self.assertEqual(list(Contact.objects.exclude(pk=self.recent.pk).order_by('pk').values()), self.archived)
+        self.assertEqual(retention.archive_files('contacts'), [])
+
+    def test_an_interrupted_run_resumes(self):
+        self.assertEqual(retention.archive('contacts', batch_size=2, max_batches=1)['rows'], 2)
+        write = retention._write
+
+        def crash_after_writing(path, chunks):
+            write(path, chunks)
+            raise KeyboardInterrupt
+
+        # The file is written but the delete never commits: the rows stay and the retry rewrites the same file.
+        with mock.patch.object(retention, '_write', crash_after_writing), self.assertRaises(KeyboardInterrupt):
+            retention.archive('contacts', batch_size=2)
+        self.assertEqual(Contact.objects.count(), 4)
+        partial = retention.archive_files('contacts')
+        contents = {path: path.read_bytes() for path in partial}
+
+        self.assertEqual(retention.archive('contacts', batch_size=2)['rows'], 3)
+        files = retention.archive_files('contacts')
+        self.assertEqual(len(files), 3)
+        self.assertEqual({path: path.read_bytes() for path in partial}, contents)
+        restored = sum(len(list(retention.read_archive(path))) for path in files)
+        self.assertEqual(restored, 5)
+
+    def test_restore_keeps_a_file_that_clashes(self):
+        Newsletter.objects.create(email='gone@example.com', is_active=False)
+        Newsletter.objects.update(deactivated_at=timezone.now() - timedelta(days=60))
+        retention.archive('newsletter')
+        Newsletter.objects.create(email='gone@example.com')
+        [path] = retention.archive_files('newsletter')
+
+        stats = retention.restore_file('newsletter', path)
+        self.assertEqual((stats['rows'], stats['conflicts']), (0, 1))
+        self.assertTrue(path.exists())
+
+
+@override_settings(
+    GENERATED_ROOT=_generated, PRERENDER_ENABLED=False, STREAMING_RENDER_ENABLED=True,
+)
+class StreamedSurrogateKeyTests(TestCase):
+    def setUp(self):
+        self.course = make_course(is_featured=True)
+        self.purged = http_cache.get_purger().purged
+        self.purged.clear()
+
+    def test_streamed_pages_tag_lazy_rows_by_collection(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        featured = CourseCard.objects.filter(is_featured=True)
+        http_cache.tag(request, featured)
+        response = streaming.stream_render(request, 'home.html', {'featured_courses': featured}, csrf=False)
+        http_cache.apply_policy(request, response, http_cache.Policy(max_age=60))
+        # The featured cards render after the headers are final.
+        self.assertEqual(response['Surrogate-Key'], 'courses')
+        self.assertIn('Ada Lovelace', b''.join(response.streaming_content).decode())
+
+    def test_instructor_renames_purge_the_course_collection(self):
+        user = self.course.instructor.user
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Grace'
+            user.save()
+        self.assertIn('courses', self.purged)
+        self.purged.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.instructor.save()
+        self.assertIn('courses', self.purged)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class CourseListingCountTests(TestCase):
+    def setUp(self):
+        self.course = make_course()
+        self.purged = http_cache.get_purger().purged
+        self.purged.clear()
+
+    def test_counted_enrollment_purges_the_listing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=make_student(), course=self.course, status='active')
+        self.assertIn('courses', self.purged)
+
+    def test_uncounted_transition_leaves_the_listing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = Enrollment.objects.create(student=make_student(), course=self.course, status='waitlisted')
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.status = 'cancelled'
+            enrollment.save()
+        self.assertNotIn('courses', self.purged)
+
+    @override_settings(PRERENDER_ENABLED=True)
+    def test_purge_waits_for_the_rebuild(self):
+        with mock.patch.object(prerender, 'enqueue') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                Enrollment.objects.create(student=make_student(), course=self.course, status='active')
+        enqueue.assert_called_with({'courses'}, {'courses'})
+        self.assertNotIn('courses', self.purged)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class BlogPostApiTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = BlogPost.objects.create(
+                title='Hello', slug='hello', author=make_student('author'), is_published=True,
+                content='<h2>Intro</h2><p>Hi</p><script>alert(1)</script>',
+            )
+
+    def test_serves_the_sanitized_body(self):
+        data = self.client.get(reverse('api-post-detail', args=[self.post.slug])).json()
+        self.assertNotIn('content', data)
+        self.assertNotIn('<script>', data['content_html'])
+        self.assertEqual([entry['title'] for entry in data['toc']], ['Intro'])
+        self.assertEqual(data['reading_time'], 1)
+
+    def test_raw_content_is_not_a_field(self):
+        response = self.client.get(reverse('api-post-list'), {'fields': 'content'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_renaming_the_author_updates_the_cached_post(self):
+        url = reverse('api-post-detail', args=[self.post.slug])
+        self.assertEqual(self.client.get(url).json()['author_name'], '')
+        author = self.post.author
+        author.first_name, author.last_name = 'Ada', 'Lovelace'
+        author.save()
+        self.assertEqual(self.client.get(url).json()['author_name'], 'Ada Lovelace')
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'mirror.example.com'])
+    def test_cached_file_urls_are_host_relative(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(featured_image='blog/hello.png')
+        url = reverse('api-post-detail', args=[self.post.slug])
+        self.client.get(url, HTTP_HOST='mirror.example.com')
+        self.assertEqual(self.client.get(url).json()['featured_image'], '/media/blog/hello.png')
+
+
+class VersioningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(VERSION_TIMEOUT=None)
+    def test_shared_cache_counters_persist(self):
+        version = get_version('catalog')
+        self.assertEqual(bump_version('catalog'), version + 1)
+        with mock.patch('time.time', return_value=time.time() + 86400 * 365):
+            self.assertEqual(get_version('catalog'), version + 1)
+
+    @override_settings(VERSION_TIMEOUT=10)
+    def test_local_cache_counters_expire(self):
+        # Another worker's bump never reaches this cache; the reseed picks it up.
+        version = get_version('catalog')
+        with mock.patch('time.time', return_value=time.time() + 11):
+            self.assertNotEqual(get_version('catalog'), version)
+
+
+class WarmupTests(SimpleTestCase):
+    def test_typeahead_only_closes_connections_it_opened(self):
+        warmed, idle = mock.Mock(connection=object()), mock.Mock(connection=None)
+        index = mock.Mock(entries=['python'])
+        with mock.patch.object(warmup, 'db_connections', {'default': warmed, 'replica': idle}), \
+                mock.patch('tccwebsite.typeahead.get_index', return_value=index):
+            self.assertEqual(warmup.warm_typeahead(), 1)
+        warmed.close.assert_not_called()
+        idle.close.assert_called_once_with()
+
+
+class GunicornConfigTests(SimpleTestCase):
+    def load(self, **env):
+        with mock.patch.dict(os.environ, env), mock.patch('multiprocessing.cpu_count', return_value=4):
+            config = runpy.run_path(settings.BASE_DIR / 'tccproject' / 'gunicorn_config.py')
+            return config, os.environ.get('TCC_WARMUP_CONNECTIONS')
+
+    def test_sync_workers_oversubscribe_the_cpus(self):
+        config, warm_connections = self.load(GUNICORN_WORKER_CLASS='sync', WEB_CONCURRENCY='')
+        self.assertEqual((config['workers'], config['threads']), (8, 1))
+        self.assertEqual(config['wsgi_app'], 'tccproject.wsgi:application')
+        self.assertTrue(config['preload_app'])
+        # The preloading master must not open connections its workers would share.
+        self.assertEqual(warm_connections, 'false')
+
+    def test_uvicorn_workers_load_the_asgi_app(self):
+        config, _ = self.load(GUNICORN_WORKER_CLASS='uvicorn', WEB_CONCURRENCY='')
+        self.assertEqual(config['workers'], 5)
+        self.assertEqual(config['worker_class'], 'uvicorn_worker.UvicornWorker')
+        self.assertEqual(config['wsgi_app'], 'tccproject.asgi:application')
+
+    def test_web_concurrency_overrides_the_worker_count(self):
+        config, _ = self.load(GUNICORN_WORKER_CLASS='gthread', WEB_CONCURRENCY='3', GUNICORN_THREADS='6')
+        self.assertEqual((config['workers'], config['threads']), (3, 6))
+
+    def test_unknown_worker_class_is_rejected(self):
+        with self.assertRaisesMessage(RuntimeError, 'GUNICORN_WORKER_CLASS'):
+            self.load(GUNICORN_WORKER_CLASS='eventlet')
+
+    def test_warm_up_without_connections_leaves_the_database_alone(self):
+        with mock.patch.object(warmup, 'warm_connections') as warm_connections, \
+                mock.patch.object(warmup, 'warm_typeahead') as warm_typeahead, \
+                self.assertLogs('tccwebsite.warmup', 'INFO'):
+            timings = warmup.warm_up(connections=False)
+        warm_connections.assert_not_called()
+        warm_typeahead.assert_not_called()
+        self.assertEqual(set(timings), {'imports', 'url_resolvers', 'templates'})
+
+
+class ConnectionPoolTests(TestCase):
+    def test_persistent_connections_are_counted(self):
+        stats = db_pool.pool_stats()['default']
+        self.assertEqual(stats['mode'], 'persistent')
+        self.assertGreaterEqual(stats['connections_opened'], 1)
+
+    def test_pool_wait_time_is_averaged_over_checkouts(self):
+        pool = mock.Mock(min_size=2, max_size=10)
+        pool.get_stats.return_value = {'requests_num': 4, 'requests_wait_ms': 10, 'pool_size': 3}
+        with mock.patch.object(db_pool, 'connections', {'default': mock.Mock(pool=pool)}):
+            stats = db_pool.pool_stats()['default']
+        self.assertEqual((stats['mode'], stats['checkouts'], stats['checkout_wait_ms_avg']), ('pool', 4, 2.5))
+        self.assertEqual(stats['pool_size'], 3)
+
+    def test_warm_connections_hands_pooled_connections_back(self):
+        pooled = mock.Mock(pool=mock.Mock(timeout=5))
+        persistent = mock.Mock(pool=None)
+        with mock.patch.object(warmup, 'db_connections', {'default': pooled, 'mysql': persistent}):
+            self.assertEqual(warmup.warm_connections(), ['default', 'mysql'])
+        pooled.pool.open.assert_called_once_with(wait=True, timeout=5)
+        pooled.close.assert_called_once_with()
+        persistent.ensure_connection.assert_called_once_with()
+        persistent.close.assert_not_called()
+
+    def test_metrics_are_staff_only(self):
+        url = reverse('db_pool_status')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('ops', password='pw', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('default', response.json()['databases'])
+
+
+@override_settings(TRAFFIC_CAPTURE_ENABLED=True)
+class TrafficCaptureTests(TestCase):
+    def test_admin_requests_are_not_recorded(self):
+        with mock.patch.object(traffic, 'write_record') as write_record:
+            self.client.get(reverse('admin:index'))
+        write_record.assert_not_called()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_PIN_SECONDS=15)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        db_router._reset_state()
+        db_router._replica_health.clear()
+        self.router = db_router.PrimaryReplicaRouter()
+        healthy = mock.patch.object(db_router, 'replica_is_healthy', return_value=True)
+        self.replica_is_healthy = healthy.start()
+        self.addCleanup(healthy.stop)
+        self.addCleanup(db_router._reset_state)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Course), 'replica_0')
+        self.assertEqual(self.router.db_for_write(Course), 'default')
+
+    def test_a_write_pins_the_rest_of_the_request(self):
+        self.router.db_for_write(Enrollment)
+        self.assertEqual(self.router.db_for_read(Course), 'default')
+
+    def test_unhealthy_replicas_fall_back_to_the_primary(self):
+        self.replica_is_healthy.return_value = False
+        self.assertEqual(self.router.db_for_read(Course), 'default')
+
+    def test_the_pin_cookie_follows_the_client(self):
+        routed = []
+
+        def view(request):
+            if request.method == 'POST':
+                self.router.db_for_write(Enrollment)
+            routed.append(self.router.db_for_read(Course))
+            return HttpResponse()
+
+        middleware = db_router.ReadYourWritesMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.post('/courses/1/enroll/'))
+        cookie = response.cookies[db_router.PIN_COOKIE_NAME]
+
+        pinned = factory.get('/courses/')
+        pinned.COOKIES[db_router.PIN_COOKIE_NAME] = cookie.value
+        middleware(pinned)
+        middleware(factory.get('/courses/'))
+        self.assertEqual(routed, ['default', 'default', 'replica_0'])
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False)
+class CohortEnrollmentTests(TestCase):
+    def setUp(self):
+        self.course = make_course()
+        self.cohort = Cohort.objects.create(
+            course=self.course, name='Spring', start_date=timezone.localdate() + timedelta(days=30), capacity=2,
+        )
+
+    def enroll(self, username):
+        return cohorts.enroll(make_student(username), self.course)
+
+    def test_capacity_then_waitlist(self):
+        outcomes = [self.enroll(f'student-{n}')[1] for n in range(4)]
+        self.assertEqual(outcomes, [cohorts.ENROLLED, cohorts.ENROLLED, cohorts.WAITLISTED, cohorts.WAITLISTED])
+        self.cohort.refresh_from_db()
+        self.assertEqual(self.cohort.seats_taken, 2)
+
+    def test_repeated_enroll_returns_the_existing_enrollment(self):
+        student = make_student()
+        first, _ = cohorts.enroll(student, self.course)
+        again, outcome = cohorts.enroll(student, self.course)
+        self.assertEqual((again.pk, outcome), (first.pk, cohorts.EXISTING))
+
+    def test_cancel_promotes_the_oldest_waitlisted(self):
+        seated, _ = self.enroll('seated')
+        self.enroll('other')
+        first, _ = self.enroll('first-in-line')
+        second, _ = self.enroll('second-in-line')
+        self.assertEqual((cohorts.waitlist_position(first), cohorts.waitlist_position(second)), (1, 2))
+
+        self.assertEqual(cohorts.cancel(seated), first)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ('active', 'waitlisted'))
+        self.cohort.refresh_from_db()
+        self.assertEqual(self.cohort.seats_taken, 2)
+
+    def test_cancel_without_a_waitlist_frees_the_seat(self):
+        seated, _ = self.enroll('seated')
+        self.assertIsNone(cohorts.cancel(seated))
+        self.assertIsNone(cohorts.cancel(seated))
+        self.cohort.refresh_from_db()
+        self.assertEqual(self.cohort.seats_taken, 0)
+
+    def test_deleting_a_course_with_cohort_enrollments(self):
+        self.enroll('seated')
+        self.enroll('other')
+        self.enroll('waiting')
+        course_id = self.course.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        self.assertFalse(Enrollment.objects.filter(course_id=course_id).exists())
+        self.assertFalse(Cohort.objects.filter(course_id=course_id).exists())
+
+    def test_deleting_a_cohort_keeps_its_enrollments(self):
+        enrollment, _ = self.enroll('seated')
+        self.cohort.delete()
+        enrollment.refresh_from_db()
+        self.assertEqual((enrollment.cohort_id, enrollment.status), (None, 'active'))
+
+    def test_cancelling_a_waitlisted_enrollment_keeps_the_seats(self):
+        self.enroll('a')
+        self.enroll('b')
+        waiting, _ = self.enroll('waiting')
+        self.assertIsNone(cohorts.cancel(waiting))
+        self.cohort.refresh_from_db()
+        self.assertEqual(self.cohort.seats_taken, 2)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False, HYDRATION_ENABLED=True)
+class HydrationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = make_course()
+        self.student = make_student('ada')
+
+    def test_course_page_is_the_same_for_everyone(self):
+        url = reverse('course_detail', args=[self.course.pk])
+        anonymous = self.client.get(url).content
+        Enrollment.objects.create(student=self.student, course=self.course, status='active')
+        self.client.force_login(self.student)
+        # Only the current cohort is looked up; the session is never loaded.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).content, anonymous)
+        self.assertNotIn(b'ada', anonymous)
+
+    def test_fragments_carry_the_visitors_state(self):
+        other = make_course('Django')
+        Enrollment.objects.create(student=self.student, course=self.course, status='active')
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('hydrate'), {'courses': f'{self.course.pk},{other.pk},junk'})
+        self.assertIn('no-store', response['Cache-Control'])
+        data = response.json()
+        self.assertEqual(data['username'], 'ada')
+        self.assertTrue(data['csrf_token'])
+        self.assertEqual(
+            {course_id: state['state'] for course_id, state in data['courses'].items()},
+            {str(self.course.pk): hydration.ENROLLED, str(other.pk): hydration.CAN_ENROLL},
+        )
+
+    def test_anonymous_visitors_get_no_csrf_token(self):
+        data = self.client.get(reverse('hydrate'), {'courses': str(self.course.pk)}).json()
+        self.assertIsNone(data['csrf_token'])
+        self.assertEqual(data['courses'][str(self.course.pk)]['state'], hydration.ANONYMOUS)
+
+    def test_course_ids_are_capped(self):
+        ids = hydration.parse_course_ids(','.join(str(pk) for pk in range(1, 100)) + ',-1, 7 ,x')
+        self.assertEqual(ids, list(range(1, hydration.MAX_COURSES + 1)))
+
+
+@override_settings(PRERENDER_ENABLED=False, SITEMAP_SHARD_SIZE=2, SITE_URL='https://example.com')
+class SitemapTests(TestCase):
+    def setUp(self):
+        self.root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(GENERATED_ROOT=self.root))
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), encoding='utf-8') as handle:
+            return handle.read()
+
+    def test_a_course_save_rewrites_its_shard_and_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = make_course()
+        name = seo.shard_name('courses', seo.shard_of(course.pk))
+        self.assertIn(f'https://example.com/courses/{course.pk}/', self.read(name))
+        self.assertIn(f'https://example.com/{name}', self.read('sitemap.xml'))
+
+    def test_an_emptied_shard_is_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = make_course()
+        name = seo.shard_name('courses', seo.shard_of(course.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertFalse(os.path.exists(os.path.join(self.root, name)))
+        self.assertNotIn(name, self.read('sitemap.xml'))
+
+    def test_drafts_stay_out_of_feeds_and_sitemaps(self):
+        author = make_student('author')
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPost.objects.create(title='Live', slug='live', author=author, is_published=True, content='<p>Hi</p>')
+            BlogPost.objects.create(title='Draft', slug='draft', author=author, is_published=False, content='<p>Hi</p>')
+        for name in seo.FEEDS:
+            self.assertIn('/blog/live/', self.read(name))
+            self.assertNotIn('/blog/draft/', self.read(name))
+        self.assertNotIn('/blog/draft/', ''.join(self.read(name) for name in os.listdir(self.root)))
+
+    def test_first_request_generates_and_revalidates(self):
+        make_course()
+        response = self.client.get(reverse('sitemap'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        response = self.client.get(reverse('sitemap'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=True, PRERENDER_ROOT=f'{_generated}/prerendered')
+class PrerenderTests(TestCase):
+    def setUp(self):
+        # Rebuilds run synchronously below, not on the background worker.
+        patcher = mock.patch.object(prerender, 'enqueue')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.post = BlogPost.objects.create(
+            title='Hello', slug='hello', author=make_student('author'), is_published=True, content='<p>Hi</p>',
+        )
+        self.url = reverse('blog_detail', args=[self.post.slug])
+
+    def test_published_post_is_served_from_its_file(self):
+        prerender.build({f'blog_detail:{self.post.slug}'})
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Prerendered'], '1')
+
+    def test_unpublished_post_file_is_removed(self):
+        prerender.build({f'blog_detail:{self.post.slug}'})
+        self.post.is_published = False
+        self.post.save()
+        prerender.build({'blog', f'blog_detail:{self.post.slug}'})
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_pruning_survives_a_deleted_post(self):
+        prerender.build({prerender.ALL_DETAILS})
+        self.post.delete()
+        prerender.build({prerender.ALL_DETAILS, f'blog_detail:{self.post.slug}'})
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+@override_settings(GENERATED_ROOT=_generated, PRERENDER_ENABLED=False, PROGRESS_BUFFERED=True)
+class ProgressBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enrollment = Enrollment.objects.create(student=make_student(), course=make_course(), status='active')
+
+    def test_pings_are_buffered_until_a_flush(self):
+        self.assertTrue(progress.record(self.enrollment.pk, 40))
+        progress.record(self.enrollment.pk, 30)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress_percentage, 0)
+
+        self.assertEqual(progress.flush(), (1, 1, 0))
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress_percentage, 40)
+        self.assertEqual(progress.flush(), (0, 0, 0))
+
+    def test_reaching_100_completes_the_enrollment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            progress.record(self.enrollment.pk, 100)
+            self.assertEqual(progress.flush(), (1, 1, 1))
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.status, self.enrollment.progress_percentage), ('completed', 100))
+        self.assertIsNotNone(self.enrollment.completion_date)
+        self.assertEqual(EnrollmentDailyStat.objects.get(course=self.enrollment.course).completions, 1)
+
+    def test_a_racing_lower_ping_does_not_lose_the_completion(self):
+        progress.record(self.enrollment.pk, 100)
+        cache.set(progress._value_key(self.enrollment.pk), 90)  # a slower ping's write
+        progress.flush()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.status, 'completed')
+
+    def test_flush_waits_for_a_numbered_but_unwritten_slot(self):
+        progress._next_slot()  # another worker between incr and set
+        progress.record(self.enrollment.pk, 50)
+        self.assertEqual(progress.flush(), (0, 0, 0))
+        cache.set(progress._slot_key(1), self.enrollment.pk)
+        self.assertEqual(progress.flush(), (1, 1, 0))
+
+    def test_flush_skips_an_abandoned_slot(self):
+        progress._next_slot()
+        progress.record(self.enrollment.pk, 50)
+        progress.flush()
+        with mock.patch('time.time', return_value=time.time() + progress.SLOT_GRACE_SECONDS + 1):
+            self.assertEqual(progress.flush(), (1, 1, 0))
@@ -0,0 +1,121 @@
+"""
+Production traffic capture, for replaying real load locally.
+
+``TrafficCaptureMiddleware`` (off unless ``TRAFFIC_CAPTURE_ENABLED``) appends
+one JSON line per request to ``TRAFFIC_CAPTURE_PATH`` (``strftime`` patterns
+allowed, e.g. one file per day)::
+
+    {"ts": 1760888000.123, "method": "GET", "path": "/courses/", "url_name": "courses",
+     "query": [["difficulty", "beginner"], ["page", "2"]], "auth": "anon",
+     "status": 200, "duration_ms": 41.7}
+
+Only the shape of a request is kept: no headers, cookies, bodies or client
+addresses, and query values only for parameters listed in
+``TRAFFIC_CAPTURE_QUERY_PARAMS`` (catalog filters, paging); other values are
+replaced by ``REDACTED``. ``auth`` is ``anon``, ``user`` or ``staff``.
+Streaming responses are timed to their first chunk.
+
+``manage.py replay_traffic`` sends a captured file to a running server.
+"""
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+REDACTED = '-'
+
+
+def sanitize_query(query_dict):
+    allowed = settings.TRAFFIC_CAPTURE_QUERY_PARAMS
+    return [
+        [name, value[:100] if name in allowed else REDACTED]
+        for name, values in query_dict.lists()
+        for value in values
+    ]
+
+
+def auth_kind(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    return 'staff' if user.is_staff else 'user'
+
+
+def url_name(request):
+    # Pre-rendered pages are answered before URL resolution.
+    if request.resolver_match is not None:
+        return request.resolver_match.view_name
+    try:
+        return resolve(request.path_info).view_name
+    except Resolver404:
+        return None
+
+
+def capture_path(when=None):
+    return Path(datetime.fromtimestamp(when or time.time()).strftime(str(settings.TRAFFIC_CAPTURE_PATH)))
+
+
+def write_record(record):
+    path = capture_path(record['ts'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+    # One write() on an O_APPEND descriptor: lines from several workers don't interleave.
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_records(paths):
+    """Yield captured records from ``paths`` in timestamp order."""
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as handle:
+            records.extend(json.loads(line) for line in handle if line.strip())
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class TrafficCaptureMiddleware:
+    """Record the shape and timing of every request (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.TRAFFIC_CAPTURE_ENABLED or request.path.startswith(settings.TRAFFIC_CAPTURE_EXCLUDE):
+            return self.get_response(request)
+        started = time.time()
+        timer = time.perf_counter()
+        response = self.get_response(request)
+        duration_ms = round((time.perf_counter() - timer) * 1000, 2)
+        try:
+            write_record({
+                'ts': round(started, 3),
+                'method': request.method,
+                'path': request.path,
+                'url_name': url_name(request),
+                'query': sanitize_query(request.GET),
+                'auth': auth_kind(request),
+                'status': response.status_code,
+                'duration_ms': duration_ms,
+            })
+        except OSError:
+            logger.warning('Could not write traffic capture record', exc_info=True)
+        return response
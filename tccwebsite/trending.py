@@ -0,0 +1,180 @@
+"""
+Time-decayed "trending" ranking of courses.
+
+Every enrollment and testimonial adds ``weight * 2 ** (-age / half_life)`` to
+its course's score. Decaying every score on every tick would mean rewriting
+all of them; instead each event adds ``weight * exp(rate * (t - epoch))``.
+All scores decay by the same factor ``exp(-rate * (now - epoch))``, so the
+order of these undecayed sums is the order of the decayed scores and an event
+is a single increment (``current_score`` undoes the scaling for display).
+
+Scores live in two sorted structures, both bumped per event:
+
+* ``CourseCard.trending_score`` (indexed), which ``courses?sort=trending``
+  orders by, combined with the facet filters;
+* a Redis sorted set (when ``REDIS_URL`` is set), which ``top_cards`` reads
+  for the homepage with ``ZREVRANGE``. If Redis is unreachable it falls back to
+  the column.
+
+The increments grow by a factor of two every half-life, which a float holds
+for about a thousand half-lives past ``TRENDING_EPOCH``; move the epoch
+forward and run ``rebuild_trending`` well before then. ``rebuild_trending``
+also recomputes both structures from history after writes that bypassed the
+signals (or a flushed Redis).
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CourseCard, Enrollment, Testimonial
+
+logger = logging.getLogger(__name__)
+
+ZSET_KEY = 'trending:courses'
+# Events older than this many half-lives weigh less than 0.1% and are skipped by rebuilds.
+REBUILD_HALF_LIVES = 10
+
+_client = None
+
+
+def _redis():
+    global _client
+    if _client is None and settings.REDIS_URL:
+        _client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=settings.TRENDING_REDIS_TIMEOUT)
+    return _client
+
+
+def _rate():
+    return math.log(2) / timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS).total_seconds()
+
+
+def _epoch():
+    return datetime.fromisoformat(settings.TRENDING_EPOCH).replace(tzinfo=timezone.get_current_timezone()).timestamp()
+
+
+def increment(weight, when):
+    """An event's contribution, scaled to the epoch."""
+    return weight * math.exp(_rate() * (when.timestamp() - _epoch()))
+
+
+def current_score(stored, now=None):
+    """A stored score decayed to ``now``: the weighted event count, half-life adjusted."""
+    if stored <= 0:
+        return 0.0
+    now = now or timezone.now()
+    return math.exp(math.log(stored) - _rate() * (now.timestamp() - _epoch()))
+
+
+def testimonial_weight(testimonial):
+    # A five-star review counts fully, a one-star one a fifth.
+    return settings.TRENDING_REVIEW_WEIGHT * testimonial.rating / 5
+
+
+# ------------------------------------------------------------------------------
+# Online updates (called from signals.py)
+# ------------------------------------------------------------------------------
+def record(course_id, weight, when=None):
+    if course_id is None or weight <= 0:
+        return
+    amount = increment(weight, when or timezone.now())
+    CourseCard.objects.filter(course_id=course_id).update(trending_score=F('trending_score') + amount)
+    client = _redis()
+    if client is not None:
+        transaction.on_commit(lambda: _zincrby(client, course_id, amount))
+
+
+def record_enrollment(enrollment):
+    record(enrollment.course_id, settings.TRENDING_ENROLLMENT_WEIGHT, enrollment.enrollment_date)
+
+
+def record_testimonial(testimonial):
+    record(testimonial.course_id, testimonial_weight(testimonial), testimonial.created_at)
+
+
+def _zincrby(client, course_id, amount):
+    try:
+        client.zincrby(ZSET_KEY, amount, course_id)
+    except redis.RedisError:
+        # The column still has it; rebuild_trending brings the set back in line.
+        logger.warning('Could not update trending score of course %s', course_id, exc_info=True)
+
+
+def forget(course_id):
+    client = _redis()
+    if client is not None:
+        transaction.on_commit(lambda: _zrem(client, course_id))
+
+
+def _zrem(client, course_id):
+    try:
+        client.zrem(ZSET_KEY, course_id)
+    except redis.RedisError:
+        logger.warning('Could not remove course %s from trending', course_id, exc_info=True)
+
+
+# ------------------------------------------------------------------------------
+# Reads
+# ------------------------------------------------------------------------------
+def top_course_ids(limit):
+    client = _redis()
+    if client is not None:
+        try:
+            return [int(member) for member in client.zrevrange(ZSET_KEY, 0, limit - 1)]
+        except redis.RedisError:
+            logger.warning('Trending set unavailable, ranking from the database', exc_info=True)
+    return list(
+        CourseCard.objects.filter(trending_score__gt=0)
+        .order_by('-trending_score').values_list('pk', flat=True)[:limit]
+    )
+
+
+def top_cards(limit):
+    """The ``limit`` highest-scoring course cards, best first (courses without activity are left out)."""
+    ids = top_course_ids(limit)
+    cards = CourseCard.objects.in_bulk(ids)
+    return [cards[course_id] for course_id in ids if course_id in cards]
+
+
+# ------------------------------------------------------------------------------
+# Full rebuild
+# ------------------------------------------------------------------------------
+def history_scores(now=None):
+    """Recompute ``{course_id: score}`` from recent enrollments and testimonials."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS * REBUILD_HALF_LIVES)
+    scores = {}
+    enrollments = Enrollment.objects.filter(enrollment_date__gte=since).values_list('course_id', 'enrollment_date')
+    for course_id, when in enrollments.iterator(chunk_size=2000):
+        scores[course_id] = scores.get(course_id, 0.0) + increment(settings.TRENDING_ENROLLMENT_WEIGHT, when)
+    testimonials = Testimonial.objects.filter(created_at__gte=since, course__isnull=False)
+    for testimonial in testimonials.only('course_id', 'rating', 'created_at').iterator(chunk_size=2000):
+        scores[testimonial.course_id] = (
+            scores.get(testimonial.course_id, 0.0) + increment(testimonial_weight(testimonial), testimonial.created_at)
+        )
+    return scores
+
+
+def rebuild():
+    """Replace both structures with scores from history; returns the number of courses with a score."""
+    scores = history_scores()
+    with transaction.atomic():
+        cards = list(CourseCard.objects.only('pk', 'trending_score'))
+        for card in cards:
+            card.trending_score = scores.get(card.pk, 0.0)
+        CourseCard.objects.bulk_update(cards, ['trending_score'], batch_size=500)
+    client = _redis()
+    if client is not None:
+        known = {card.pk for card in cards}
+        pipeline = client.pipeline(transaction=True)
+        pipeline.delete(ZSET_KEY)
+        mapping = {course_id: score for course_id, score in scores.items() if course_id in known and score > 0}
+        if mapping:
+            pipeline.zadd(ZSET_KEY, mapping)
+        pipeline.execute()
+    return sum(1 for score in scores.values() if score > 0)
@@ -0,0 +1,102 @@
+"""
+In-process prefix index for the course search box.
+
+Every course title, instructor name and specialization is indexed at each of
+its word starts ("web development" is found by "web" and by "dev"), as a
+sorted list of ``(key, entry)`` pairs searched with ``bisect``. The index is
+built once per worker (see ``warmup.py``) and rebuilt when the ``catalog``
+version changes, which ``signals.py`` bumps on course and instructor writes.
+"""
+import re
+import threading
+from bisect import bisect_left
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from .models import Course, Instructor
+from .versioning import get_version
+
+MAX_QUERY_LENGTH = 50
+DEFAULT_LIMIT = 8
+
+# Lower sorts first when several entries match the same prefix.
+KIND_RANK = {'course': 0, 'instructor': 1, 'specialization': 2}
+
+_WORD_START = re.compile(r'\b\w', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        # entries: [{'label', 'type', 'url'}], de-duplicated by (type, label)
+        self.entries = sorted(entries, key=lambda entry: (KIND_RANK[entry['type']], entry['label'].lower()))
+        keys = []
+        for position, entry in enumerate(self.entries):
+            text = normalize(entry['label'])
+            for match in _WORD_START.finditer(text):
+                keys.append((text[match.start():], position))
+        keys.sort()
+        self.keys = keys
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        prefix = normalize(query)[:MAX_QUERY_LENGTH]
+        if not prefix:
+            return []
+        found = set()
+        index = bisect_left(self.keys, (prefix,))
+        while index < len(self.keys) and self.keys[index][0].startswith(prefix):
+            found.add(self.keys[index][1])
+            index += 1
+        return [self.entries[position] for position in sorted(found)[:limit]]
+
+
+def build_index():
+    courses_url = reverse('courses')
+    entries = [
+        {'label': title, 'type': 'course', 'url': reverse('course_detail', args=[pk])}
+        for pk, title in Course.objects.values_list('pk', 'title')
+    ]
+    specializations = set()
+    for pk, first_name, last_name, specialization in Instructor.objects.values_list(
+        'pk', 'user__first_name', 'user__last_name', 'specialization'
+    ):
+        name = f"{first_name} {last_name}".strip()
+        if name:
+            entries.append({
+                'label': name,
+                'type': 'instructor',
+                'url': f"{courses_url}?{urlencode({'instructor': pk})}",
+            })
+        if specialization and specialization.lower() not in specializations:
+            specializations.add(specialization.lower())
+            entries.append({
+                'label': specialization,
+                'type': 'specialization',
+                'url': f"{courses_url}?{urlencode({'search': specialization})}",
+            })
+    return PrefixIndex(entries)
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_index():
+    """Return this worker's index, rebuilding it if the catalog has changed."""
+    global _index, _index_version
+    version = get_version('catalog')
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = build_index()
+                _index_version = version
+    return _index
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    return get_index().search(query, limit)
@@ -1,14 +1,24 @@
-from django.urls import path
-from . import views
+from django.urls import include, path, re_path
+from rest_framework.routers import DefaultRouter
+from . import api, views
+
+api_router = DefaultRouter()
+api_router.register('courses', api.CourseViewSet, basename='api-course')
+api_router.register('instructors', api.InstructorViewSet, basename='api-instructor')
+api_router.register('testimonials', api.TestimonialViewSet, basename='api-testimonial')
+api_router.register('posts', api.BlogPostViewSet, basename='api-post')
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('courses/', views.courses, name='courses'),
+    path('courses/suggest/', views.course_suggest, name='course_suggest'),
     path('courses/<int:pk>/', views.course_detail, name='course_detail'),
     path('courses/<int:pk>/enroll/', views.enroll_course, name='enroll_course'),
+    path('courses/<int:pk>/cancel/', views.cancel_enrollment, name='cancel_enrollment'),
     path('about/', views.about, name='about'),
     path('admissions/', views.admissions, name='admissions'),
     path('blog/', views.blog, name='blog'),
+    path('blog/archive/<int:year>/<int:month>/', views.blog_archive, name='blog_archive'),
     path('blog/<slug:slug>/', views.blog_detail, name='blog_detail'),
     path('contact/', views.contact, name='contact'),
     
@@ -18,7 +28,32 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
+    re_path(r'^enrollments/(?P<pk>\d+)/certificate\.(?P<fmt>png|pdf)$', views.certificate_download, name='certificate_download'),
     
     # AJAX URLs
     path('newsletter/subscribe/', views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('hydrate/', views.hydrate, name='hydrate'),
+
+    # Offline catalog (service worker, see offline.py)
+    path('sw.js', views.service_worker, name='service_worker'),
+    path('offline/', views.offline_page, name='offline'),
+    path('offline/catalog.json', views.offline_catalog, name='offline_catalog'),
+    path('offline/catalog-version.json', views.offline_catalog_version, name='offline_catalog_version'),
+    path('enrollments/<int:pk>/progress/', views.record_progress, name='record_progress'),
+
+    # Sitemaps and feeds (generated files, see seo.py)
+    path('sitemap.xml', views.generated_file, {'name': 'sitemap.xml'}, name='sitemap'),
+    re_path(r'^(?P<name>sitemap-(?:pages|courses-\d+|blog-\d+)\.xml)$', views.generated_file, name='sitemap_shard'),
+    path('blog/rss.xml', views.generated_file, {'name': 'blog-rss.xml'}, name='blog_rss'),
+    path('blog/atom.xml', views.generated_file, {'name': 'blog-atom.xml'}, name='blog_atom'),
+
+    # Read-only catalog API
+    path('api/v1/', include(api_router.urls)),
+
+    # Staff analytics
+    path('analytics/', views.analytics_dashboard, name='analytics_dashboard'),
+    path('analytics/data.json', views.analytics_data, name='analytics_data'),
+
+    # Operations
+    path('ops/db-pool/', views.db_pool_status, name='db_pool_status'),
 ]
@@ -0,0 +1,61 @@
+"""
+Cache-backed version counters for objects and namespaces.
+
+Anything cached from model data (serialized API objects, facet counts, search
+indexes, rendered pages) embeds the relevant version in its cache key, and
+``signals.py`` bumps versions on save/delete, so invalidation never has to
+enumerate keys. A missing counter (first use, or evicted) is seeded from the
+clock rather than 1, so an eviction can never resurrect an old key.
+
+Counters never expire in a shared cache. In a per-process one (no Redis) a
+bump only reaches the worker that made it, so counters expire after
+``VERSION_TIMEOUT`` and every worker reseeds them: a change shows everywhere
+within that time. The reseed also orphans every entry keyed on the old
+version, changed or not, so without Redis the versioned caches (API objects,
+facet counts, hydrated pages, the typeahead index) are rebuilt at least once
+per ``VERSION_TIMEOUT`` in every worker. That is the price of bounded
+staleness: raise ``VERSION_TIMEOUT`` to trade freshness for hit rate.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(namespace, pk=None):
+    return f"version:{namespace}" if pk is None else f"version:{namespace}:{pk}"
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+def get_version(namespace, pk=None):
+    key = _key(namespace, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), settings.VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespace, pks):
+    """Return ``{pk: version}`` for many objects with a single cache round trip."""
+    keys = {_key(namespace, pk): pk for pk in pks}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    missing = {key: _seed() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, settings.VERSION_TIMEOUT)
+        versions.update({keys[key]: version for key, version in missing.items()})
+    return versions
+
+
+def bump_version(namespace, pk=None):
+    key = _key(namespace, pk)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _seed()
+        cache.set(key, version, settings.VERSION_TIMEOUT)
+        return version
@@ -1,99 +1,243 @@
+import hashlib
+import json
+import os
+from datetime import date
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.views import LoginView
-from django.db.models import Q
-from django.http import JsonResponse
+from django.db.models import Count
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.http import require_POST
-from django.urls import reverse_lazy
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET, require_POST
+from django.urls import reverse, reverse_lazy
 from django.core.cache import cache
-from .models import Course, Instructor, Testimonial, BlogPost, Contact, StudentProfile, Enrollment, Newsletter
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .models import Course, CourseCard, Instructor, Testimonial, BlogPost, Contact, StudentProfile, Enrollment, Newsletter
 from .forms import ContactForm, CustomUserCreationForm, StudentProfileForm, UserUpdateForm, NewsletterForm
+from .db_pool import pool_stats
+from .dashboard import get_student_dashboard
+from .streaming import stream_render
+from .versioning import get_version
+from . import analytics, certificates, cohorts, facets, hydration, offline, progress, seo, trending, typeahead
+from .http_cache import PRIVATE, SHARED, cache_policy, tag
+
+COURSES_PER_PAGE = 6
+HOME_TRENDING_COURSES = 3
+BLOG_POSTS_PER_PAGE = 5
+# Post listings show the excerpt only.
+BLOG_LIST_DEFERRED = ('content', 'content_html', 'toc')
+CERTIFICATE_MAX_AGE = 60 * 60 * 24
 
+@cache_policy(max_age=60, s_maxage=300, stale_while_revalidate=600)
 def home(request):
-    """Homepage with featured courses and testimonials"""
-    featured_courses = Course.objects.filter(is_featured=True)[:3]
+    """Homepage with featured and trending courses and testimonials"""
+    featured_courses = CourseCard.objects.filter(is_featured=True)[:3]
+    trending_courses = trending.top_cards(HOME_TRENDING_COURSES)
     testimonials = Testimonial.objects.filter(is_featured=True)[:3]
-    recent_posts = BlogPost.objects.filter(is_published=True)[:3]
+    recent_posts = BlogPost.objects.filter(is_published=True).defer(*BLOG_LIST_DEFERRED)[:3]
     
     context = {
         'featured_courses': featured_courses,
+        'trending_courses': trending_courses,
         'testimonials': testimonials,
         'recent_posts': recent_posts,
         'newsletter_form': NewsletterForm(),
     }
-    return render(request, 'home.html', context)
+    tag(request, featured_courses, trending_courses, testimonials, recent_posts)
+    return stream_render(request, 'home.html', context)
 
+@cache_policy(max_age=60, s_maxage=300, stale_while_revalidate=600, keys=['courses'])
 def courses(request):
-    """Courses listing page with filtering"""
-    courses = Course.objects.all().order_by('-created_at')
-    difficulty_filter = request.GET.get('difficulty')
-    search_query = request.GET.get('search')
+    """Courses listing page with faceted filtering"""
+    buckets = facets.get_buckets()
+    filters = facets.parse_filters(request.GET, buckets)
+    courses = facets.apply_sort(facets.apply_filters(CourseCard.objects.all(), filters, buckets), filters)
     
-    if difficulty_filter:
-        courses = courses.filter(difficulty=difficulty_filter)
-    
-    if search_query:
-        courses = courses.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(instructor__user__first_name__icontains=search_query) |
-            Q(instructor__user__last_name__icontains=search_query)
-        )
-    
-    paginator = Paginator(courses, 6)  # Show 6 courses per page
+    paginator = Paginator(courses, COURSES_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
     context = {
         'page_obj': page_obj,
-        'difficulty_filter': difficulty_filter,
-        'search_query': search_query,
-        'difficulty_choices': Course.DIFFICULTY_CHOICES,
+        'search_query': filters.get('search', ''),
+        'facet_counts': facets.get_facet_counts(filters, buckets),
+        'sort_options': facets.sort_options(filters),
+        'filter_querystring': facets.filter_querystring(filters),
     }
+    tag(request, page_obj)
     return render(request, 'courses.html', context)
 
+@require_GET
+@cache_policy(max_age=300, s_maxage=300, per_user=SHARED, keys=['courses'])
+def course_suggest(request):
+    """Typeahead suggestions for the course search box"""
+    query = request.GET.get('q', '')[:typeahead.MAX_QUERY_LENGTH]
+    return JsonResponse({'q': query, 'results': typeahead.suggest(query)})
+
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=600, per_user=SHARED)
 def course_detail(request, pk):
-    """Individual course detail page"""
+    """Individual course detail page (shared body, per-user bits hydrated by the browser)"""
+    cohort = cohorts.current_cohort(pk)
+    if settings.HYDRATION_ENABLED:
+        # Seat counts change without model signals, so the cohort shown is part of the key.
+        shown = (cohort.pk, cohort.name, cohort.start_date, cohort.seats_left) if cohort else None
+        key = f"hydrated:course_detail:{pk}:{get_version('catalog')}:{hashlib.md5(repr(shown).encode()).hexdigest()}"
+        html, keys = hydration.shared_page(key, 'course_detail.html', lambda: {
+            **_course_detail_context(get_object_or_404(Course, pk=pk), cohort),
+            'enrollment_state': hydration.ANONYMOUS,
+        })
+        tag(request, *keys)
+        return HttpResponse(html)
+
     course = get_object_or_404(Course, pk=pk)
-    related_courses = Course.objects.filter(
-        difficulty=course.difficulty
-    ).exclude(pk=pk)[:3]
-    
-    is_enrolled = False
-    if request.user.is_authenticated:
-        is_enrolled = Enrollment.objects.filter(
-            student=request.user, course=course
-        ).exists()
-    
+    state = hydration.course_states(request.user, [course.pk])[course.pk]
     context = {
+        **_course_detail_context(course, cohort),
+        'enrollment_state': state['state'],
+        'waitlist_position': state['waitlist_position'],
+    }
+    tag(request, course, context['related_courses'])
+    # Only the cancel form embeds a CSRF token; other visitors get a compressible page.
+    return stream_render(
+        request, 'course_detail.html', context,
+        csrf=state['state'] in (hydration.ENROLLED, hydration.WAITLISTED),
+    )
+
+def _course_detail_context(course, cohort):
+    return {
         'course': course,
-        'related_courses': related_courses,
-        'is_enrolled': is_enrolled,
+        'related_courses': CourseCard.objects.filter(difficulty=course.difficulty).exclude(pk=course.pk)[:3],
+        'cohort': cohort,
     }
-    return render(request, 'course_detail.html', context)
+
+@require_GET
+@cache_control(private=True, no_store=True)
+def hydrate(request):
+    """Per-user fragments for hydrated pages (auth state, enrollments, messages)"""
+    course_ids = hydration.parse_course_ids(request.GET.get('courses', ''))
+    return JsonResponse(hydration.user_fragments(request, course_ids))
+
+@require_GET
+@cache_policy(max_age=0, s_maxage=300, per_user=SHARED)
+def service_worker(request):
+    """Service worker script, served from the site root so it can control every page"""
+    precache = offline.precache_urls()
+    config = {
+        'enabled': settings.OFFLINE_ENABLED,
+        'cacheVersion': hashlib.md5(json.dumps(precache).encode()).hexdigest()[:12],
+        'precache': precache,
+        'offlineUrl': reverse('offline'),
+        'catalogUrl': reverse('offline_catalog'),
+        'catalogVersionUrl': reverse('offline_catalog_version'),
+        'coursesUrl': reverse('courses'),
+        'authUrls': [reverse('login'), reverse('logout'), reverse('register')],
+        'syncInterval': settings.OFFLINE_SYNC_INTERVAL * 1000,
+    }
+    context = {'config': json.dumps(config)}
+    return render(request, 'sw.js', context, content_type='application/javascript; charset=utf-8')
+
+@require_GET
+@cache_policy(max_age=0, s_maxage=600, per_user=SHARED, keys=['courses'])
+def offline_page(request):
+    """Offline shell: renders courses from the cached catalog bundle (static/js/offline.js)"""
+    html, _keys = hydration.shared_page('hydrated:offline', 'offline.html', dict)
+    return HttpResponse(html)
+
+@require_GET
+@cache_policy(max_age=0, s_maxage=60, per_user=SHARED, keys=['courses'])
+def offline_catalog(request):
+    """Catalog bundle for the service worker; ?since=<version> returns only what changed"""
+    payload = offline.delta(request.GET.get('since', ''))
+    response = JsonResponse(payload, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+    response['X-Catalog-Version'] = payload['version']
+    return response
+
+@require_GET
+@cache_policy(max_age=0, s_maxage=60, per_user=SHARED, keys=['courses'])
+def offline_catalog_version(request):
+    """Current catalog bundle version, polled by the service worker"""
+    version = offline.current_version()
+    response = get_conditional_response(request, etag=f'"{version}"')
+    if response is None:
+        response = JsonResponse({'version': version})
+    response['ETag'] = f'"{version}"'
+    return response
 
 @login_required
 def enroll_course(request, pk):
-    """Enroll user in a course"""
+    """Enroll user in a course (or its waitlist when the cohort is full)"""
     course = get_object_or_404(Course, pk=pk)
     
-    enrollment, created = Enrollment.objects.get_or_create(
-        student=request.user,
-        course=course,
-        defaults={'status': 'active'}
-    )
+    enrollment, outcome = cohorts.enroll(request.user, course)
     
-    if created:
+    if outcome == cohorts.ENROLLED:
         messages.success(request, f'Successfully enrolled in {course.title}!')
+    elif outcome == cohorts.WAITLISTED:
+        messages.info(request, f'{course.title} is full, so you have been added to the waitlist. '
+                               'We will enroll you automatically when a seat opens up.')
+    elif enrollment.status == 'waitlisted':
+        messages.info(request, f'You are already on the waitlist for {course.title}.')
     else:
         messages.info(request, f'You are already enrolled in {course.title}.')
     
     return redirect('course_detail', pk=pk)
 
+@login_required
+@require_POST
+def cancel_enrollment(request, pk):
+    """Cancel the user's enrollment (or waitlist place) in a course"""
+    enrollment = get_object_or_404(
+        Enrollment.objects.exclude(status='cancelled'), student=request.user, course_id=pk
+    )
+    cohorts.cancel(enrollment)
+    messages.success(request, f'Your enrollment in {enrollment.course.title} has been cancelled.')
+    return redirect('course_detail', pk=pk)
+
+@login_required
+@require_POST
+def record_progress(request, pk):
+    """Progress ping from the lesson player (buffered, see progress.py)"""
+    try:
+        value = int(request.POST.get('progress', ''))
+    except ValueError:
+        value = -1
+    if not 0 <= value <= 100:
+        return JsonResponse({'success': False, 'message': 'progress must be a whole number from 0 to 100.'}, status=400)
+    if progress.owner_id(pk) != request.user.id:
+        return JsonResponse({'success': False, 'message': 'Enrollment not found.'}, status=404)
+    
+    buffered = progress.record(pk, value)
+    return JsonResponse({'success': True, 'progress': value, 'buffered': buffered})
+
+@login_required
+@require_GET
+@cache_policy(max_age=CERTIFICATE_MAX_AGE, per_user=PRIVATE)
+def certificate_download(request, pk, fmt):
+    """Download the certificate of a completed enrollment (stored file, see certificates.py)"""
+    enrollment = get_object_or_404(Enrollment, pk=pk, status='completed')
+    if enrollment.student_id != request.user.id and not request.user.is_staff:
+        raise Http404('No such certificate')
+    certificate = certificates.ensure(enrollment)
+    stored = getattr(certificate, fmt)
+    # File names are content hashes, so they make strong validators.
+    etag = f'"{os.path.splitext(os.path.basename(stored.name))[0]}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(
+            stored.open('rb'), as_attachment=True, filename=f'certificate-{certificate.number}.{fmt}',
+        )
+    response['ETag'] = etag
+    return response
+
+@cache_policy(max_age=300, s_maxage=3600, stale_while_revalidate=86400, keys=['instructors'])
 def about(request):
     """About page with instructors"""
     instructors = Instructor.objects.all()
@@ -101,36 +245,81 @@ def about(request):
     context = {
         'instructors': instructors,
     }
+    tag(request, instructors)
     return render(request, 'about.html', context)
 
+@cache_policy(max_age=300, s_maxage=3600, stale_while_revalidate=86400)
 def admissions(request):
     """Admissions information page"""
     return render(request, 'admissions.html')
 
+def _archive_months():
+    """Months that have published posts, newest first, with post counts"""
+    key = f"blog:archive-months:{get_version('blog')}"
+    months = cache.get(key)
+    if months is None:
+        months = list(
+            BlogPost.objects.filter(is_published=True, published_month__isnull=False)
+            .values('published_month')
+            .annotate(count=Count('id'))
+            .order_by('-published_month')
+        )
+        cache.set(key, months, 60 * 60 * 24)
+    return months
+
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=600, keys=['posts'])
 def blog(request):
     """Blog listing page"""
-    posts = BlogPost.objects.filter(is_published=True)
+    posts = BlogPost.objects.filter(is_published=True).select_related('author').defer(*BLOG_LIST_DEFERRED)
     
-    paginator = Paginator(posts, 5)  # Show 5 posts per page
+    paginator = Paginator(posts, BLOG_POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
     context = {
         'page_obj': page_obj,
+        'archive_months': _archive_months(),
+    }
+    tag(request, page_obj)
+    return render(request, 'blog.html', context)
+
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=600, keys=['posts'])
+def blog_archive(request, year, month):
+    """Blog posts published in one month"""
+    try:
+        archive_month = date(year, month, 1)
+    except ValueError:
+        raise Http404('Invalid month')
+    posts = BlogPost.objects.filter(
+        is_published=True, published_month=archive_month
+    ).select_related('author').defer(*BLOG_LIST_DEFERRED)
+    
+    paginator = Paginator(posts, BLOG_POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    context = {
+        'page_obj': page_obj,
+        'archive_month': archive_month,
+        'archive_months': _archive_months(),
     }
+    tag(request, page_obj)
     return render(request, 'blog.html', context)
 
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=600)
 def blog_detail(request, slug):
     """Individual blog post detail"""
-    post = get_object_or_404(BlogPost, slug=slug, is_published=True)
+    post = get_object_or_404(
+        BlogPost.objects.select_related('author').defer('content'), slug=slug, is_published=True
+    )
     recent_posts = BlogPost.objects.filter(
         is_published=True
-    ).exclude(slug=slug)[:3]
+    ).exclude(slug=slug).defer(*BLOG_LIST_DEFERRED)[:3]
     
     context = {
         'post': post,
         'recent_posts': recent_posts,
     }
+    tag(request, post, recent_posts)
     return render(request, 'blog_detail.html', context)
 
 def contact(request):
@@ -191,11 +380,12 @@ def profile(request):
     except StudentProfile.DoesNotExist:
         student_profile = StudentProfile.objects.create(user=request.user)
     
-    enrollments = Enrollment.objects.filter(student=request.user)
+    dashboard = get_student_dashboard(request.user)
     
     context = {
         'student_profile': student_profile,
-        'enrollments': enrollments,
+        'enrollments': dashboard['enrollments'],
+        'stats': dashboard['stats'],
     }
     return render(request, 'registration/profile.html', context)
 
@@ -278,3 +468,58 @@ def custom_logout(request):
     logout(request)
     messages.success(request, 'You have been successfully logged out.')
     return redirect('home')
+
+GENERATED_CONTENT_TYPES = {
+    'blog-rss.xml': 'application/rss+xml; charset=utf-8',
+    'blog-atom.xml': 'application/atom+xml; charset=utf-8',
+}
+
+@require_GET
+@cache_policy(per_user=SHARED, keys=['courses', 'posts'])
+def generated_file(request, name):
+    """Serve a generated sitemap or feed with validators and caching headers"""
+    path = os.path.join(settings.GENERATED_ROOT, name)
+    if not os.path.exists(os.path.join(settings.GENERATED_ROOT, 'sitemap.xml')):
+        # First request on a fresh instance (the directory is not deployed).
+        seo.generate_all()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('No such file')
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type=GENERATED_CONTENT_TYPES.get(name, 'application/xml'))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_cache_control(response, public=True, max_age=settings.GENERATED_MAX_AGE)
+    return response
+
+@staff_member_required
+def analytics_dashboard(request):
+    """Staff analytics page (reads the rollup tables only)"""
+    context = {
+        'course_summary': analytics.course_summary(),
+        'monthly_revenue': analytics.monthly_revenue(),
+    }
+    return render(request, 'analytics.html', context)
+
+@staff_member_required
+def analytics_data(request):
+    """Rollup data as JSON for charts and external dashboards"""
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 366)
+        months = min(max(int(request.GET.get('months', 12)), 1), 60)
+    except ValueError:
+        return JsonResponse({'error': 'days and months must be integers'}, status=400)
+    return JsonResponse({
+        'courses': analytics.course_summary(),
+        'monthly': analytics.monthly_revenue(months),
+        'daily': analytics.daily_enrollments(days),
+    })
+
+@staff_member_required
+def db_pool_status(request):
+    """Connection pool metrics for the worker that serves this request."""
+    return JsonResponse({'pid': os.getpid(), 'databases': pool_stats()})
@@ -0,0 +1,123 @@
+"""
+Worker warm-up: pay one-off startup costs before the first request does.
+
+Called from ``tccproject/wsgi.py`` once the application is loaded. Opening
+database connections can be skipped (``connections=False``) when warming a
+process that will fork afterwards, since sockets must not be shared.
+"""
+import importlib
+import logging
+import os
+import time
+
+from django.db import DatabaseError, connections as db_connections
+from django.template import engines
+from django.template.exceptions import TemplateSyntaxError
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+# Modules Django only imports on first use (password hashing, image fields).
+LAZY_IMPORTS = [
+    'argon2',
+    'PIL.Image',
+    'django.contrib.auth.hashers',
+    'django.contrib.admin.views.main',
+    'django.core.files.images',
+]
+
+
+def warm_imports():
+    """Import modules that would otherwise be loaded during the first request."""
+    for module in LAZY_IMPORTS:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            logger.warning('Could not import %s during warm-up', module)
+
+
+def warm_url_resolvers():
+    """Populate the URL resolver caches used by ``reverse()`` and request routing."""
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - property access populates the resolver
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, 'url_patterns'):
+            pattern.reverse_dict  # noqa: B018
+
+
+def warm_templates():
+    """Compile every project template into the cached template loader."""
+    compiled = 0
+    for engine in engines.all():
+        for template_dir in getattr(engine, 'dirs', []):
+            for root, _dirs, files in os.walk(template_dir):
+                for filename in files:
+                    if not filename.endswith('.html'):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), template_dir)
+                    try:
+                        engine.get_template(name.replace(os.sep, '/'))
+                        compiled += 1
+                    except TemplateSyntaxError:
+                        logger.warning('Template %s failed to compile during warm-up', name)
+    return compiled
+
+
+def warm_connections():
+    """Open one connection per database alias (filling pools to ``min_size``)."""
+    opened = []
+    for alias in db_connections:
+        connection = db_connections[alias]
+        try:
+            pool = getattr(connection, 'pool', None)
+            if pool is not None:
+                pool.open(wait=True, timeout=pool.timeout)
+            else:
+                connection.ensure_connection()
+            opened.append(alias)
+        except DatabaseError:
+            logger.warning('Could not open a connection to %s during warm-up', alias, exc_info=True)
+        finally:
+            if getattr(connection, 'pool', None) is not None:
+                # Hand the pooled connection back instead of pinning it to this thread.
+                connection.close()
+    return opened
+
+
+def warm_typeahead():
+    """Build this worker's search suggestion index (needs the database)."""
+    from .typeahead import get_index
+
+    idle = [alias for alias in db_connections if db_connections[alias].connection is None]
+    try:
+        return len(get_index().entries)
+    except DatabaseError:
+        logger.warning('Could not build the typeahead index during warm-up', exc_info=True)
+        return 0
+    finally:
+        # Only close what the build opened: a connection warm_connections()
+        # opened is the one a sync worker's requests reuse.
+        for alias in idle:
+            db_connections[alias].close()
+
+
+def warm_up(connections=True):
+    """Run every warm-up step and return how long each one took (ms)."""
+    timings = {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        result = func()
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    timed('imports', warm_imports)
+    timed('url_resolvers', warm_url_resolvers)
+    templates = timed('templates', warm_templates)
+    if connections:
+        timed('typeahead', warm_typeahead)
+        timed('connections', warm_connections)
+
+    logger.info('Worker warm-up finished: %s (%d templates)', timings, templates)
+    return timings
@@ -0,0 +1,203 @@
+/*
+ * Service worker (served by views.service_worker; see tccwebsite/offline.py).
+ *
+ * - Precaches the assets of base.html and the offline shell on install.
+ * - Course pages (the listing and course_detail) are answered from cache at
+ *   once and refreshed in the background; a course page that was never cached
+ *   falls back to the offline shell, which renders it from the catalog bundle.
+ * - The catalog bundle is kept in sync with deltas: the worker polls the
+ *   catalog version and only downloads the rows that changed.
+ * - Everything else, and every non-GET request (enrolling), goes to the network.
+ */
+const CONFIG = {{ config|safe }};
+const STATIC_CACHE = 'tcc-static-' + CONFIG.cacheVersion;
+const PAGES_CACHE = 'tcc-pages';
+const CATALOG_CACHE = 'tcc-catalog';
+const MAX_PAGES = 60;
+const COURSE_PAGE = new RegExp('^' + CONFIG.coursesUrl + '(\\d+/)?$');
+
+let lastSync = 0;
+
+self.addEventListener('install', function(event) {
+    if (!CONFIG.enabled) {
+        self.skipWaiting();
+        return;
+    }
+    event.waitUntil(caches.open(STATIC_CACHE).then(function(cache) {
+        return Promise.all(CONFIG.precache.concat([CONFIG.offlineUrl]).map(function(url) {
+            const crossOrigin = new URL(url, self.location).origin !== self.location.origin;
+            return fetch(new Request(url, crossOrigin ? {mode: 'no-cors'} : {})).then(function(response) {
+                return cache.put(url, response);
+            });
+        }));
+    }).then(function() {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener('activate', function(event) {
+    if (!CONFIG.enabled) {
+        // Kill switch: drop our caches and step aside.
+        event.waitUntil(caches.keys().then(function(names) {
+            return Promise.all(names.filter(function(name) {
+                return name.startsWith('tcc-');
+            }).map(function(name) {
+                return caches.delete(name);
+            }));
+        }).then(function() {
+            return self.registration.unregister();
+        }));
+        return;
+    }
+    event.waitUntil(caches.keys().then(function(names) {
+        return Promise.all(names.filter(function(name) {
+            return name.startsWith('tcc-static-') && name !== STATIC_CACHE;
+        }).map(function(name) {
+            return caches.delete(name);
+        }));
+    }).then(function() {
+        return self.clients.claim();
+    }).then(syncCatalog));
+});
+
+function storedVersion() {
+    return caches.open(CATALOG_CACHE).then(function(cache) {
+        return cache.match(CONFIG.catalogUrl);
+    }).then(function(response) {
+        return response ? response.json() : null;
+    });
+}
+
+function merge(bundle, delta) {
+    if (delta.full || !bundle) {
+        return {version: delta.version, fields: delta.fields, courses: delta.courses};
+    }
+    const changed = {};
+    delta.courses.forEach(function(row) { changed[row[0]] = row; });
+    const removed = new Set(delta.removed);
+    const courses = bundle.courses.filter(function(row) {
+        return !removed.has(row[0]) && !changed[row[0]];
+    }).concat(delta.courses).sort(function(a, b) { return a[0] - b[0]; });
+    return {version: delta.version, fields: delta.fields, courses: courses};
+}
+
+function forgetPages(delta) {
+    // Changed courses: their cached pages, and every listing that shows them.
+    const stale = new Set(delta.courses.map(function(row) { return row[0]; }).concat(delta.removed));
+    return caches.open(PAGES_CACHE).then(function(cache) {
+        return cache.keys().then(function(requests) {
+            return Promise.all(requests.filter(function(request) {
+                const match = new URL(request.url).pathname.match(COURSE_PAGE);
+                return delta.full || !match || !match[1] || stale.has(parseInt(match[1], 10));
+            }).map(function(request) {
+                return cache.delete(request);
+            }));
+        });
+    });
+}
+
+function syncCatalog() {
+    if (Date.now() - lastSync < CONFIG.syncInterval) {
+        return Promise.resolve();
+    }
+    lastSync = Date.now();
+    return Promise.all([
+        storedVersion(),
+        fetch(CONFIG.catalogVersionUrl, {cache: 'no-cache'}).then(function(response) { return response.json(); })
+    ]).then(function(results) {
+        const bundle = results[0];
+        if (bundle && bundle.version === results[1].version) {
+            return;
+        }
+        const since = bundle ? '?since=' + encodeURIComponent(bundle.version) : '';
+        return fetch(CONFIG.catalogUrl + since).then(function(response) {
+            return response.json();
+        }).then(function(delta) {
+            const merged = merge(bundle, delta);
+            return caches.open(CATALOG_CACHE).then(function(cache) {
+                return cache.put(CONFIG.catalogUrl, new Response(JSON.stringify(merged), {
+                    headers: {'Content-Type': 'application/json'}
+                }));
+            }).then(function() {
+                return bundle ? forgetPages(delta) : null;
+            });
+        });
+    }).then(function() {
+        // Pick up template changes in the offline shell.
+        return fetch(CONFIG.offlineUrl).then(function(response) {
+            return response.ok ? caches.open(STATIC_CACHE).then(function(cache) {
+                return cache.put(CONFIG.offlineUrl, response);
+            }) : null;
+        });
+    }).catch(function(error) {
+        // Offline or the server is unreachable: keep what we have.
+        console.warn('catalog sync failed', error);
+    });
+}
+
+function trimPages(cache) {
+    return cache.keys().then(function(requests) {
+        return Promise.all(requests.slice(0, Math.max(0, requests.length - MAX_PAGES)).map(function(request) {
+            return cache.delete(request);
+        }));
+    });
+}
+
+function coursePage(event) {
+    return caches.open(PAGES_CACHE).then(function(cache) {
+        return cache.match(event.request).then(function(cached) {
+            const refresh = fetch(event.request).then(function(response) {
+                if (response.ok && !response.redirected) {
+                    return cache.put(event.request, response.clone()).then(function() {
+                        return trimPages(cache);
+                    }).then(function() {
+                        return response;
+                    });
+                }
+                return response;
+            });
+            if (cached) {
+                event.waitUntil(refresh.catch(function() {}));
+                return cached;
+            }
+            return refresh.catch(function() {
+                return caches.match(CONFIG.offlineUrl);
+            });
+        });
+    });
+}
+
+self.addEventListener('fetch', function(event) {
+    const request = event.request;
+    if (!CONFIG.enabled) {
+        return;
+    }
+    const url = new URL(request.url);
+    const sameOrigin = url.origin === self.location.origin;
+
+    if (request.mode === 'navigate' && sameOrigin && CONFIG.authUrls.includes(url.pathname)) {
+        // Listing pages show who is logged in; don't serve them across a login change.
+        event.waitUntil(caches.delete(PAGES_CACHE));
+        return;
+    }
+    if (request.method !== 'GET') {
+        return;
+    }
+    if (CONFIG.precache.includes(sameOrigin ? url.pathname : request.url)) {
+        event.respondWith(caches.match(request.url).then(function(cached) {
+            return cached || fetch(request);
+        }));
+        return;
+    }
+    if (!sameOrigin || request.mode !== 'navigate') {
+        return;
+    }
+    event.waitUntil(syncCatalog());
+    if (COURSE_PAGE.test(url.pathname)) {
+        event.respondWith(coursePage(event));
+        return;
+    }
+    event.respondWith(fetch(request).catch(function() {
+        return caches.match(CONFIG.offlineUrl);
+    }));
+});